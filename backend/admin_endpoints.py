@@ -0,0 +1,104 @@
+# Admin API endpoints for diagnosing the RMSS chatbot backend
+# Protected by ADMIN_API_TOKEN (sent as X-Admin-Token). Without a token every request is refused,
+# unless ADMIN_API_OPEN=1 opens the endpoints for local development.
+
+import os
+import hmac
+import asyncio
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import PlainTextResponse
+
+from tracing import trace_buffer
+from command_monitor import command_monitor
+from db_pool import pool_monitor
+from loop_watchdog import loop_watchdog
+from llm_cassette import llm_cassette
+from startup_profile import startup_profile
+from profiler import sampling_profiler, ProfilerBusy, to_collapsed, top_functions
+
+
+def require_admin(x_admin_token: Optional[str] = Header(default=None)):
+    """Reject the request unless it carries the configured admin token"""
+    expected = os.environ.get("ADMIN_API_TOKEN")
+    if not expected:
+        if os.environ.get("ADMIN_API_OPEN", "false").lower() in ("1", "true", "yes"):
+            return
+        raise HTTPException(status_code=403, detail="Admin API disabled: set ADMIN_API_TOKEN")
+    if not hmac.compare_digest(x_admin_token or "", expected):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+
+# Create admin router
+admin_router = APIRouter(prefix="/api/admin", dependencies=[Depends(require_admin)])
+
+
+@admin_router.get("/traces")
+async def list_traces(limit: int = 50, min_duration_ms: float = 0.0, path: Optional[str] = None):
+    """Most recent request traces, e.g. ?path=/api/chat&min_duration_ms=2000 for slow chats"""
+    return [trace.to_dict(include_spans=False) for trace in trace_buffer.recent(limit, min_duration_ms, path)]
+
+
+@admin_router.get("/traces/{trace_id}")
+async def get_trace(trace_id: str):
+    """Full span timeline of one request; the trace id is its X-Request-ID"""
+    trace = trace_buffer.get(trace_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail="Trace not found (it may have rotated out of the buffer)")
+    return trace.to_dict()
+
+
+@admin_router.get("/profile")
+async def profile_worker(seconds: float = 5.0, interval_ms: float = 5.0, format: str = "collapsed",
+                         include_idle: bool = False):
+    """Sample this worker's stacks for `seconds`; format=collapsed (flamegraph input) or json (top functions)"""
+    if format not in ("collapsed", "json"):
+        raise HTTPException(status_code=400, detail="format must be 'collapsed' or 'json'")
+    try:
+        # Sampling runs on a worker thread so the event loop - the thing being profiled - keeps serving
+        result = await asyncio.to_thread(sampling_profiler.profile, seconds, interval_ms, include_idle)
+    except ProfilerBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    if format == "json":
+        return {
+            "duration_seconds": result["duration_seconds"],
+            "interval_ms": result["interval_ms"],
+            "samples": result["samples"],
+            "top_functions": top_functions(result),
+        }
+    return PlainTextResponse(to_collapsed(result))
+
+
+@admin_router.get("/db/pool")
+async def get_db_pool_stats():
+    """MongoDB connection pool usage and checkout wait times"""
+    return pool_monitor.snapshot()
+
+
+@admin_router.get("/mongo/commands")
+async def get_mongo_command_stats():
+    """Per-collection MongoDB command latency, recent slow commands and their query plans"""
+    return command_monitor.snapshot()
+
+
+@admin_router.get("/loop/stalls")
+async def get_loop_stalls(limit: int = 50):
+    """Recent event-loop stalls with the blocking stack, route and request id"""
+    return {
+        "threshold_ms": loop_watchdog.threshold * 1000,
+        "stalls": loop_watchdog.recent_stalls(limit),
+    }
+
+
+@admin_router.get("/llm/cassette")
+async def get_llm_cassette():
+    """LLM cassette mode, hit/miss counts and recorded versus replayed prompt tokens"""
+    return llm_cassette.summary()
+
+
+@admin_router.get("/startup")
+async def get_startup_profile(top: int = 25):
+    """Startup milestones, time to first request, peak RSS and the slowest module imports"""
+    return startup_profile.report(top)
@@ -0,0 +1,117 @@
+# RMSS 2026 course catalog
+# Structured copy of the fee and lesson data in RMSS_SYSTEM_MESSAGE so that the backend can
+# resolve prices and course names without asking the LLM.
+
+CATALOG_VERSION = "2026.1"
+
+LOCATIONS = ["Marine Parade", "Punggol", "Bishan", "Jurong", "Kovan"]
+
+LEVELS = ["P2", "P3", "P4", "P5", "P6", "S1", "S2", "S3", "S4", "J1", "J2"]
+
+# Monthly fee (GST inclusive) and lesson structure per level and subject. "locations" is given
+# where the reservation forms state which centres run the course; other courses list none.
+COURSES = {
+    "P2": {
+        "Math": {"fee": 261.60, "lessons": "1 lesson/week × 2 hours", "locations": LOCATIONS},
+        "English": {"fee": 261.60, "lessons": "1 lesson/week × 2 hours", "locations": ["Jurong", "Kovan", "Bishan"]},
+        "Chinese": {"fee": 261.60, "lessons": "1 lesson/week × 2 hours", "locations": ["Bishan"]},
+    },
+    "P3": {
+        "Math": {"fee": 277.95, "lessons": "1 lesson/week × 2 hours", "locations": LOCATIONS},
+        "Science": {"fee": 277.95, "lessons": "1 lesson/week × 2 hours", "locations": LOCATIONS},
+        "English": {"fee": 277.95, "lessons": "1 lesson/week × 2 hours", "locations": LOCATIONS},
+        "Chinese": {"fee": 277.95, "lessons": "1 lesson/week × 2 hours", "locations": ["Punggol", "Bishan"]},
+    },
+    "P4": {
+        "Math": {"fee": 332.45, "lessons": "2 lessons/week × 1.5 hours each"},
+        "English": {"fee": 288.85, "lessons": "1 lesson/week × 2 hours"},
+        "Science": {"fee": 288.85, "lessons": "1 lesson/week × 2 hours"},
+        "Chinese": {"fee": 288.85, "lessons": "1 lesson/week × 2 hours"},
+    },
+    "P5": {
+        "Math": {"fee": 346.62, "lessons": "2 lessons/week × 1.5 hours each"},
+        "Science": {"fee": 303.02, "lessons": "1 lesson/week × 2 hours"},
+        "English": {"fee": 299.75, "lessons": "1 lesson/week × 2 hours"},
+        "Chinese": {"fee": 299.75, "lessons": "1 lesson/week × 2 hours"},
+        "Chinese Enrichment": {"fee": 321.55, "lessons": "1 lesson/week × 2 hours"},
+    },
+    "P6": {
+        "Math": {"fee": 357.52, "lessons": "2 lessons/week × 1.5 hours each"},
+        "Science": {"fee": 313.92, "lessons": "1 lesson/week × 2 hours"},
+        "English": {"fee": 310.65, "lessons": "1 lesson/week × 2 hours"},
+        "Chinese": {"fee": 310.65, "lessons": "1 lesson/week × 2 hours"},
+        "Chinese Enrichment": {"fee": 321.55, "lessons": "1 lesson/week × 2 hours"},
+    },
+    "S1": {
+        "Math": {"fee": 370.60, "lessons": "2 lessons/week × 1.5 hours each"},
+        "Science": {"fee": 327.00, "lessons": "1 lesson/week × 2 hours"},
+        "English": {"fee": 321.55, "lessons": "1 lesson/week × 2 hours"},
+        "Chinese": {"fee": 321.55, "lessons": "1 lesson/week × 2 hours"},
+    },
+    "S2": {
+        "Math": {"fee": 381.50, "lessons": "2 lessons/week × 1.5 hours each"},
+        "Science": {"fee": 327.00, "lessons": "1 lesson/week × 2 hours"},
+        "English": {"fee": 321.55, "lessons": "1 lesson/week × 2 hours"},
+        "Chinese": {"fee": 321.55, "lessons": "1 lesson/week × 2 hours"},
+    },
+    "S3": {
+        "EMath": {"fee": 343.35, "lessons": "1 lesson/week × 2 hours"},
+        "AMath": {"fee": 397.85, "lessons": "2 lessons/week × 1.5 hours each"},
+        "Chemistry": {"fee": 343.35, "lessons": "1 lesson/week × 2 hours"},
+        "Physics": {"fee": 343.35, "lessons": "1 lesson/week × 2 hours"},
+        "Biology": {"fee": 343.35, "lessons": "1 lesson/week × 2 hours"},
+        "Combined Science (Phy/Chem)": {"fee": 343.35, "lessons": "1 lesson/week × 2 hours"},
+        "Combined Science (Bio/Chem)": {"fee": 343.35, "lessons": "1 lesson/week × 2 hours"},
+        "English": {"fee": 332.45, "lessons": "1 lesson/week × 2 hours"},
+        "Chinese": {"fee": 332.45, "lessons": "1 lesson/week × 2 hours"},
+    },
+    "S4": {
+        "EMath": {"fee": 408.75, "lessons": "2 lessons/week × 1.5 hours each"},
+        "AMath": {"fee": 408.75, "lessons": "2 lessons/week × 1.5 hours each"},
+        "Chemistry": {"fee": 343.35, "lessons": "1 lesson/week × 2 hours"},
+        "Physics": {"fee": 343.35, "lessons": "1 lesson/week × 2 hours"},
+        "Biology": {"fee": 343.35, "lessons": "1 lesson/week × 2 hours"},
+        "Combined Science (Phy/Chem)": {"fee": 343.35, "lessons": "1 lesson/week × 2 hours"},
+        "Combined Science (Bio/Chem)": {"fee": 343.35, "lessons": "1 lesson/week × 2 hours"},
+        "English": {"fee": 332.45, "lessons": "1 lesson/week × 2 hours"},
+        "Chinese": {"fee": 332.45, "lessons": "1 lesson/week × 2 hours"},
+    },
+    "J1": {
+        "Math": {"fee": 401.12, "lessons": "1 lesson/week × 2 hours"},
+        "Chemistry": {"fee": 401.12, "lessons": "1 lesson/week × 2 hours", "locations": ["Jurong", "Marine Parade", "Bishan"]},
+        "Physics": {"fee": 401.12, "lessons": "1 lesson/week × 2 hours", "locations": ["Marine Parade", "Bishan"]},
+        "Biology": {"fee": 401.12, "lessons": "1 lesson/week × 2 hours", "locations": ["Marine Parade"]},
+        "Economics": {"fee": 401.12, "lessons": "1 lesson/week × 2 hours", "locations": ["Marine Parade", "Bishan"]},
+    },
+    "J2": {
+        "Math": {"fee": 444.72, "lessons": "2 lessons/week × 1.5 hours"},
+        "Chemistry": {"fee": 412.02, "lessons": "1 lesson/week × 2 hours", "locations": ["Jurong", "Marine Parade", "Bishan"]},
+        "Physics": {"fee": 412.02, "lessons": "1 lesson/week × 2 hours", "locations": ["Marine Parade", "Bishan"]},
+        "Biology": {"fee": 412.02, "lessons": "1 lesson/week × 2 hours", "locations": ["Marine Parade"]},
+        "Economics": {"fee": 412.02, "lessons": "1 lesson/week × 2 hours", "locations": ["Marine Parade", "Bishan"]},
+    },
+}
+
+
+def course_name(level: str, subject: str) -> str:
+    """Display name used in prompts, e.g. "J1 Math" """
+    return f"{level} {subject}"
+
+
+def get_course(level: str, subject: str):
+    """Catalog entry for a level and subject, or None if RMSS does not list it"""
+    return COURSES.get(level, {}).get(subject)
+
+
+def course_offered_at(level: str, subject: str, location: str) -> bool:
+    """Whether the catalog records that the course runs at the location"""
+    course = get_course(level, subject)
+    return bool(course) and location in course.get("locations", ())
+
+
+def get_course_price(level: str, subject: str) -> str:
+    """Formatted monthly fee, e.g. "$401.12" """
+    course = get_course(level, subject)
+    if not course:
+        return "Contact for pricing"
+    return f"${course['fee']:.2f}"
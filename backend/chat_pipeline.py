@@ -0,0 +1,211 @@
+# Cost-ordered request pipeline for /api/chat
+# Resolvers run cheapest first - personal student data, deterministic catalog answers, the response
+# cache, and finally the LLM - and the first one that answers short-circuits the rest, so a
+# "my fees" question never pays for the history read or prompt assembly.
+
+import re
+import time
+import uuid
+import logging
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Optional
+
+from cachetools import TTLCache
+
+from catalog import CATALOG_VERSION, get_course, course_offered_at
+from conversation_state import (
+    extract_entities, apply_user_message, apply_assistant_message, load_state, save_state
+)
+from demo_auth import DemoAuthService
+from response_templates import render_catalog_course
+from session_tokens import authenticate
+from metrics import STAGE_DURATION, CHAT_ANSWERS, CACHE_REQUESTS
+from tracing import span
+
+logger = logging.getLogger(__name__)
+
+PERSONAL_QUERIES = [
+    "my fees", "outstanding", "balance", "payment", "my schedule",
+    "my classes", "my subjects", "my profile", "my information"
+]
+
+FEE_KEYWORDS = ["fee", "fees", "price", "pricing", "cost", "how much"]
+_FEE_PATTERN = re.compile(r"\b(" + "|".join(FEE_KEYWORDS) + r")\b")
+
+# Words that may accompany a bare fee follow-up such as "What about the pricing?"
+_FOLLOW_UP_FILLER = {
+    "what", "about", "how", "and", "the", "is", "it", "its", "are", "they", "does", "do", "that", "this",
+    "for", "of", "so", "then", "ok", "okay", "please", "tell", "me", "much", "s", "monthly", "course", "class",
+}
+
+# First-turn answers for anonymous visitors, keyed by catalog version and normalised message
+RESPONSE_CACHE = TTLCache(maxsize=1024, ttl=600)
+
+_NORMALISE_PATTERN = re.compile(r"[^a-z0-9 ]+")
+
+
+class ChatContext:
+    """Per-request state shared by the pipeline stages"""
+
+    def __init__(self, request, session_id: str, db):
+        self.request = request
+        self.session_id = session_id
+        self.db = db
+        self.message_lower = request.message.lower()
+        self.entities = extract_entities(request.message)
+        self.student_data = None
+        self.state = None
+        self.follow_up = None
+        self.cache_key = None
+        self.persist = True  # store the turn in chat_messages and chat_sessions
+        self.answered_by = None
+        self.timings = {}  # stage name -> milliseconds
+        self.identities = {}  # rate limit identities: session, ip, student
+
+    @contextmanager
+    def timed(self, stage: str):
+        """Record a stage's latency on the context, in the stage histogram and as a trace span"""
+        start = time.perf_counter()
+        try:
+            with span(f"chat.{stage}"):
+                yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.timings[stage] = elapsed * 1000
+            STAGE_DURATION.labels("chat", stage).observe(elapsed)
+
+    async def load_state(self):
+        """Load the session state once and fold this turn's entities into it"""
+        if self.state is None:
+            with self.timed("state_load"):
+                self.state = await load_state(self.db, self.session_id)
+            self.follow_up = apply_user_message(self.state, self.entities)
+        return self.state
+
+
+async def resolve_personal_data(ctx: ChatContext) -> Optional[str]:
+    """Authenticated students asking about their own fees, schedule or profile"""
+    if not ctx.request.auth_token:
+        return None
+
+    claims = await authenticate(ctx.request.auth_token)
+    ctx.student_data = await DemoAuthService.get_student_data(claims["sid"]) if claims else None
+    if not ctx.student_data:
+        return None
+
+    message_lower = ctx.message_lower
+    if not any(query in message_lower for query in PERSONAL_QUERIES):
+        return None
+
+    # Personal answers are not stored with the conversation
+    ctx.persist = False
+    student_data = ctx.student_data
+    if "fees" in message_lower or "outstanding" in message_lower or "balance" in message_lower or "payment" in message_lower:
+        return DemoAuthService.format_fees_info(student_data)
+    elif "schedule" in message_lower or "classes" in message_lower:
+        return DemoAuthService.format_schedule_info(student_data)
+    elif "profile" in message_lower or "information" in message_lower:
+        return DemoAuthService.format_profile_info(student_data)
+
+    ctx.persist = True
+    return None
+
+
+def _is_fee_follow_up(ctx: ChatContext) -> bool:
+    """A fee question that only refers back to the course, e.g. "What about the pricing?" """
+    words = _NORMALISE_PATTERN.sub(" ", _FEE_PATTERN.sub(" ", ctx.message_lower)).split()
+    location_words = set(ctx.entities.get("location", "").lower().split())
+    return all(word in _FOLLOW_UP_FILLER or word in location_words for word in words)
+
+
+async def resolve_catalog_answer(ctx: ChatContext) -> Optional[str]:
+    """Fee questions about a specific course, answered straight from the catalog.
+
+    The course must be named in this message, or the message must be a bare fee follow-up while
+    the assistant is waiting on a question about the course; anything else goes to the LLM.
+    """
+    message_lower = ctx.message_lower
+    if not _FEE_PATTERN.search(message_lower):
+        return None
+    if any(query in message_lower for query in PERSONAL_QUERIES):
+        return None
+
+    state = await ctx.load_state()
+    if "level" in ctx.entities and "subject" in ctx.entities:
+        level, subject = ctx.entities["level"], ctx.entities["subject"]
+    elif state.pending_question and state.last_course and _is_fee_follow_up(ctx):
+        level, subject = state.level, state.subject
+    else:
+        return None
+
+    course = get_course(level, subject)
+    if not course:
+        return None
+
+    # Only name a location on the card when the catalog says the course runs there
+    location = ctx.entities.get("location")
+    if location and not course_offered_at(level, subject, location):
+        return None
+
+    return render_catalog_course(level, subject, course, location)
+
+
+def _normalise(message: str) -> str:
+    return " ".join(_NORMALISE_PATTERN.sub(" ", message.lower()).split())
+
+
+async def resolve_cached_answer(ctx: ChatContext) -> Optional[str]:
+    """Opening questions from anonymous visitors that were already answered recently"""
+    state = await ctx.load_state()
+    if ctx.student_data or ctx.request.auth_token or state.turns > 0 or ctx.follow_up:
+        return None
+
+    ctx.cache_key = (CATALOG_VERSION, _normalise(ctx.request.message))
+    response = RESPONSE_CACHE.get(ctx.cache_key)
+    CACHE_REQUESTS.labels("response", "miss" if response is None else "hit").inc()
+    return response
+
+
+def remember_answer(ctx: ChatContext, response: str):
+    """Cache an LLM answer when the request was eligible for the response cache"""
+    if ctx.cache_key is not None and ctx.answered_by == "llm":
+        RESPONSE_CACHE[ctx.cache_key] = response
+
+
+async def run_pipeline(ctx: ChatContext, stages) -> str:
+    """Run (name, resolver) stages in order until one returns an answer"""
+    for name, resolver in stages:
+        with ctx.timed(name):
+            response = await resolver(ctx)
+        if response is not None:
+            ctx.answered_by = name
+            CHAT_ANSWERS.labels(name).inc()
+            return response
+    raise RuntimeError("No chat pipeline stage produced a response")
+
+
+async def persist_turn(ctx: ChatContext, response: str) -> str:
+    """Store the user message and reply, and the updated session state; returns the reply id"""
+    state = await ctx.load_state()
+    user_msg_dict = {
+        "id": str(uuid.uuid4()),
+        "session_id": ctx.session_id,
+        "message": ctx.request.message,
+        "sender": "user",
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "user_type": ctx.request.user_type
+    }
+    ai_msg_id = str(uuid.uuid4())
+    ai_msg_dict = {
+        "id": ai_msg_id,
+        "session_id": ctx.session_id,
+        "message": response,
+        "sender": "assistant",
+        "timestamp": datetime.now(timezone.utc).isoformat()
+    }
+    apply_assistant_message(state, response)
+    with ctx.timed("persist"):
+        await ctx.db.chat_messages.insert_many([user_msg_dict, ai_msg_dict])
+        await save_state(ctx.db, ctx.session_id, state)
+    return ai_msg_id
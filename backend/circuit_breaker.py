@@ -0,0 +1,96 @@
+# Circuit breaker for calls to the LLM provider
+# After LLM_CIRCUIT_FAILURES consecutive failures the circuit opens and chat requests that need the
+# LLM fail fast for LLM_CIRCUIT_RESET_SECONDS instead of each waiting on a failing provider. Then a
+# single trial call is let through (half-open): success closes the circuit, failure re-opens it.
+
+import os
+import time
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with a single half-open trial call"""
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_seconds: float = 30.0, clock=time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+        self.last_error = None
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == OPEN and self._clock() - self._opened_at >= self.reset_seconds:
+                return HALF_OPEN
+            return self._state
+
+    def allow(self) -> bool:
+        """Whether a call may go ahead now; in half-open state only one trial call is allowed"""
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            if self._state == OPEN:
+                if self._clock() - self._opened_at < self.reset_seconds:
+                    return False
+                self._state = HALF_OPEN
+            if self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            if self._state != CLOSED:
+                logger.info(f"Circuit '{self.name}' closed")
+            self._state = CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def release_trial(self):
+        """Give up a call without an outcome (e.g. cancelled), so a half-open circuit can try again"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self, error: Exception = None):
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            self.last_error = f"{type(error).__name__}: {str(error)}" if error is not None else None
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    logger.warning(f"Circuit '{self.name}' opened after {self._failures} failures",
+                                   extra={"last_error": self.last_error})
+                self._state = OPEN
+                self._opened_at = self._clock()
+
+    def snapshot(self):
+        state = self.state
+        with self._lock:
+            retry_in = None
+            if self._state == OPEN and state == OPEN:
+                retry_in = round(self.reset_seconds - (self._clock() - self._opened_at), 1)
+            return {
+                "state": state,
+                "consecutive_failures": self._failures,
+                "retry_in_seconds": retry_in,
+                "last_error": self.last_error,
+            }
+
+
+llm_circuit = CircuitBreaker(
+    "llm",
+    failure_threshold=int(os.environ.get("LLM_CIRCUIT_FAILURES", "5")),
+    reset_seconds=float(os.environ.get("LLM_CIRCUIT_RESET_SECONDS", "30")),
+)
@@ -0,0 +1,217 @@
+# MongoDB command latency monitoring for the RMSS chatbot backend
+# A pymongo CommandListener on the Motor client records every collection command: latency
+# percentiles per collection and command go to the metrics surface, commands slower than
+# MONGO_SLOW_COMMAND_MS are logged with their query shape, and with MONGO_EXPLAIN_SLOW=true the
+# first slow occurrence of each shape is explained in the background to capture its plan.
+
+import os
+import logging
+import threading
+from collections import deque, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from pymongo import monitoring
+
+from metrics import percentile
+
+logger = logging.getLogger(__name__)
+
+SLOW_COMMAND_MS = float(os.environ.get("MONGO_SLOW_COMMAND_MS", "100"))
+EXPLAIN_SLOW = os.environ.get("MONGO_EXPLAIN_SLOW", "false").lower() in ("1", "true", "yes")
+
+EXPLAINABLE_COMMANDS = {"find", "aggregate", "count", "distinct"}
+
+
+def _shape(value):
+    """Replace literal values with their type so queries differing only in values share a shape"""
+    if isinstance(value, dict):
+        return {key: _shape(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_shape(item) for item in value[:3]]
+    return type(value).__name__
+
+
+def query_shape(command_name: str, command) -> str:
+    """Compact description of what a command asks for, without its literal values"""
+    parts = [command_name]
+    if command_name == "find":
+        parts.append(f"filter={_shape(command.get('filter', {}))}")
+        if command.get("sort"):
+            parts.append(f"sort={dict(command['sort'])}")
+    elif command_name == "aggregate":
+        parts.append("pipeline=" + ",".join(next(iter(stage), "?") for stage in command.get("pipeline", [])))
+    elif command_name in ("count", "distinct"):
+        parts.append(f"query={_shape(command.get('query', {}))}")
+    elif command_name in ("update", "delete"):
+        statements = command.get("updates") or command.get("deletes") or []
+        if statements:
+            parts.append(f"q={_shape(statements[0].get('q', {}))}")
+    return " ".join(parts)
+
+
+def summarize_plan(explain: dict) -> str:
+    """Winning plan as a stage chain, e.g. 'LIMIT <- FETCH <- IXSCAN(session_id_1)' or 'COLLSCAN'"""
+    planner = explain.get("queryPlanner")
+    if planner is None:
+        # aggregate explains nest the cursor stage's planner
+        for stage in explain.get("stages", []):
+            if "$cursor" in stage:
+                planner = stage["$cursor"].get("queryPlanner")
+                break
+    if not planner:
+        return "unknown"
+
+    plan = planner.get("winningPlan", {})
+    plan = plan.get("queryPlan", plan)  # slot-based engine wraps the classic plan
+    stages = []
+    while plan:
+        name = plan.get("stage", "?")
+        if plan.get("indexName"):
+            name += f"({plan['indexName']})"
+        stages.append(name)
+        plan = plan.get("inputStage") or (plan.get("inputStages") or [None])[0]
+    return " <- ".join(stages) or "unknown"
+
+
+class CommandLatencyMonitor(monitoring.CommandListener):
+    """Per-collection command latency, slow-command log and optional explain of slow query shapes"""
+
+    def __init__(self, slow_ms: float = SLOW_COMMAND_MS, explain_slow: bool = EXPLAIN_SLOW,
+                 max_samples: int = 1024, max_shapes: int = 500, max_slow: int = 200):
+        self.slow_ms = slow_ms
+        self.explain_slow = explain_slow
+        self.explain_client = None  # sync pymongo client (the Motor client's delegate)
+        self._lock = threading.Lock()
+        self._started = {}
+        self._samples = {}  # (collection, command) -> recent durations in ms
+        self._counts = {}
+        self._max_samples = max_samples
+        self._plans = OrderedDict()  # query shape -> plan summary, bounded
+        self._max_shapes = max_shapes
+        self.slow_commands = deque(maxlen=max_slow)
+        self._explainer = None
+
+    def started(self, event):
+        command = event.command
+        name = event.command_name
+        collection = command.get("collection") if name == "getMore" else command.get(name)
+        if not isinstance(collection, str):
+            return  # hello, ping, auth and other non-collection commands
+        self._started[(event.connection_id, event.request_id)] = (
+            collection, event.database_name, query_shape(name, command),
+            command if self.explain_slow and name in EXPLAINABLE_COMMANDS else None
+        )
+
+    def succeeded(self, event):
+        self._finish(event, failed=False)
+
+    def failed(self, event):
+        self._finish(event, failed=True)
+
+    def _finish(self, event, failed: bool):
+        started = self._started.pop((event.connection_id, event.request_id), None)
+        if started is None:
+            return
+        collection, database, shape, command = started
+        duration_ms = event.duration_micros / 1000
+        key = (collection, event.command_name)
+
+        with self._lock:
+            samples = self._samples.get(key)
+            if samples is None:
+                samples = self._samples[key] = deque(maxlen=self._max_samples)
+            samples.append(duration_ms)
+            self._counts[key] = self._counts.get(key, 0) + 1
+            plan = self._plans.get(shape)
+
+        if duration_ms < self.slow_ms:
+            return
+
+        if event.command_name == "find" and not failed:
+            batch = event.reply.get("cursor", {}).get("firstBatch")
+            returned = len(batch) if batch is not None else None
+        else:
+            returned = None
+        entry = {
+            "collection": collection,
+            "command": event.command_name,
+            "duration_ms": round(duration_ms, 3),
+            "shape": shape,
+            "docs_returned": returned,
+            "plan": plan,
+            "failed": failed,
+        }
+        self.slow_commands.append(entry)
+        logger.warning("Slow MongoDB command", extra=entry)
+
+        if command is not None and plan is None:
+            self._schedule_explain(database, shape, command)
+
+    def _schedule_explain(self, database: str, shape: str, command):
+        if self.explain_client is None:
+            return
+        with self._lock:
+            if shape in self._plans:
+                return
+            self._plans[shape] = "pending"
+            while len(self._plans) > self._max_shapes:
+                self._plans.popitem(last=False)
+            if self._explainer is None:
+                self._explainer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="mongo-explain")
+        # Runs off both the event loop and the driver's thread; one explain at a time
+        self._explainer.submit(self._explain, database, shape, command)
+
+    def _explain(self, database: str, shape: str, command):
+        explained = {key: value for key, value in command.items() if key not in ("lsid", "$db", "$clusterTime",
+                                                                                   "$readPreference", "txnNumber")}
+        try:
+            result = self.explain_client[database].command("explain", explained, verbosity="queryPlanner")
+            plan = summarize_plan(result)
+        except Exception as e:
+            plan = f"explain failed: {str(e)}"
+        with self._lock:
+            if shape in self._plans:
+                self._plans[shape] = plan
+        logger.info("MongoDB query plan", extra={"shape": shape, "plan": plan})
+
+    def percentiles(self):
+        """(collection, command) -> count and p50/p95/p99/max over the recent sample window"""
+        with self._lock:
+            windows = {key: sorted(samples) for key, samples in self._samples.items()}
+            counts = dict(self._counts)
+        stats = {}
+        for key, samples in windows.items():
+            stats[key] = {"count": counts[key], "max_ms": round(samples[-1], 3)}
+            for label, quantile in (("p50_ms", 0.50), ("p95_ms", 0.95), ("p99_ms", 0.99)):
+                stats[key][label] = round(percentile(samples, quantile), 3)
+        return stats
+
+    def snapshot(self):
+        """Latency percentiles, known plans for slow shapes and the most recent slow commands"""
+        with self._lock:
+            plans = dict(self._plans)
+        return {
+            "slow_threshold_ms": self.slow_ms,
+            "collections": [
+                {"collection": collection, "command": command, **stats}
+                for (collection, command), stats in sorted(self.percentiles().items())
+            ],
+            "plans": plans,
+            "slow_commands": list(self.slow_commands)[::-1],
+        }
+
+    def close(self):
+        if self._explainer is not None:
+            self._explainer.shutdown(wait=False, cancel_futures=True)
+
+
+command_monitor = CommandLatencyMonitor()
+
+
+def latency_metric_samples(monitor: CommandLatencyMonitor = command_monitor):
+    """Callback-metric rows: ((collection, command, quantile), milliseconds)"""
+    rows = []
+    for (collection, command), stats in monitor.percentiles().items():
+        for quantile, field in (("0.5", "p50_ms"), ("0.95", "p95_ms"), ("0.99", "p99_ms")):
+            rows.append(((collection, command, quantile), stats[field]))
+    return rows
@@ -0,0 +1,138 @@
+# Per-session structured conversation state
+# Replaces re-scanning the last assistant message on every turn: the level, subject and location
+# the user is talking about are extracted once per message and stored with the session.
+
+import re
+from datetime import datetime, timezone
+from typing import Optional
+from pydantic import BaseModel, ConfigDict
+
+from catalog import LOCATIONS, LEVELS, course_name, get_course_price
+
+_LEVEL_PATTERN = re.compile(
+    r"\b(?:(p|pri|primary)\s*([2-6])|(s|sec|secondary)\s*([1-4])|(j|jc)\s*([12]))\b"
+)
+
+# Longest aliases first so "a math" wins over "math"
+_SUBJECT_ALIASES = [
+    ("chinese enrichment", "Chinese Enrichment"),
+    ("additional math", "AMath"),
+    ("elementary math", "EMath"),
+    ("a math", "AMath"),
+    ("amath", "AMath"),
+    ("e math", "EMath"),
+    ("emath", "EMath"),
+    ("mathematics", "Math"),
+    ("maths", "Math"),
+    ("math", "Math"),
+    ("chemistry", "Chemistry"),
+    ("chem", "Chemistry"),
+    ("physics", "Physics"),
+    ("biology", "Biology"),
+    ("bio", "Biology"),
+    ("economics", "Economics"),
+    ("econs", "Economics"),
+    ("science", "Science"),
+    ("english", "English"),
+    ("chinese", "Chinese"),
+]
+_SUBJECT_PATTERN = re.compile(r"\b(" + "|".join(re.escape(alias) for alias, _ in _SUBJECT_ALIASES) + r")\b")
+_SUBJECTS = dict(_SUBJECT_ALIASES)
+
+_LOCATION_PATTERN = re.compile(r"\b(" + "|".join(loc.lower() for loc in LOCATIONS) + r")\b")
+
+_QUESTION_PATTERN = re.compile(r"[^.?!\n]*\?")
+
+
+class ConversationState(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+
+    level: Optional[str] = None
+    subject: Optional[str] = None
+    location: Optional[str] = None
+    pending_question: Optional[str] = None  # 'location', 'level' or 'subject' the assistant asked for
+    last_course: Optional[str] = None  # e.g. "J1 Math"
+    turns: int = 0  # assistant replies stored for this session
+
+
+def extract_entities(text: str):
+    """Extract level, subject and location mentioned in a message"""
+    lowered = text.lower()
+    entities = {}
+
+    level_match = _LEVEL_PATTERN.search(lowered)
+    if level_match:
+        if level_match.group(2):
+            level = f"P{level_match.group(2)}"
+        elif level_match.group(4):
+            level = f"S{level_match.group(4)}"
+        else:
+            level = f"J{level_match.group(6)}"
+        if level in LEVELS:
+            entities["level"] = level
+
+    subject_match = _SUBJECT_PATTERN.search(lowered)
+    if subject_match:
+        entities["subject"] = _SUBJECTS[subject_match.group(1)]
+
+    location_match = _LOCATION_PATTERN.search(lowered)
+    if location_match:
+        entities["location"] = location_match.group(1).title()
+
+    return entities
+
+
+def detect_pending_question(assistant_message: str) -> Optional[str]:
+    """Work out which detail the assistant just asked the user for"""
+    for question in _QUESTION_PATTERN.findall(assistant_message.lower()):
+        if "location" in question or "branch" in question:
+            return "location"
+        if "level" in question:
+            return "level"
+        if "subject" in question:
+            return "subject"
+    return None
+
+
+def apply_user_message(state: ConversationState, entities: dict):
+    """Fold this turn's entities into the state.
+
+    Returns a follow-up resolution (course, location, price) when the message answers the
+    question the assistant asked on the previous turn, otherwise None.
+    """
+    pending = state.pending_question
+    for field in ("level", "subject", "location"):
+        if field in entities:
+            setattr(state, field, entities[field])
+
+    if state.level and state.subject:
+        state.last_course = course_name(state.level, state.subject)
+
+    if pending and pending in entities and state.last_course and state.location:
+        return {
+            "course": state.last_course,
+            "location": state.location,
+            "price": get_course_price(state.level, state.subject),
+        }
+    return None
+
+
+def apply_assistant_message(state: ConversationState, assistant_message: str):
+    """Record what the assistant is waiting for after its reply"""
+    state.pending_question = detect_pending_question(assistant_message)
+    state.turns += 1
+
+
+async def load_state(db, session_id: str) -> ConversationState:
+    doc = await db.chat_sessions.find_one({"session_id": session_id}, {"_id": 0, "state": 1})
+    if doc and doc.get("state"):
+        return ConversationState(**doc["state"])
+    return ConversationState()
+
+
+async def save_state(db, session_id: str, state: ConversationState):
+    await db.chat_sessions.update_one(
+        {"session_id": session_id},
+        {"$set": {"state": state.model_dump(), "updated_at": datetime.now(timezone.utc).isoformat()}},
+        upsert=True
+    )
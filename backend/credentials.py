@@ -0,0 +1,101 @@
+# Password hashing and verification off the event loop
+# bcrypt is deliberately CPU-heavy; running it inline would stall every concurrent /api/chat request.
+# Work runs on a small bounded thread pool (bcrypt releases the GIL while hashing), the cost factor is
+# tunable with BCRYPT_ROUNDS, and recent successful verifications are cached briefly.
+
+import os
+import hmac
+import asyncio
+import hashlib
+import logging
+import secrets
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+from cachetools import TTLCache
+
+from metrics import QUEUE_WAIT
+
+logger = logging.getLogger(__name__)
+
+BCRYPT_PREFIXES = ("$2a$", "$2b$", "$2y$")
+
+
+class CredentialVerifier:
+    """Hashes and checks passwords on a bounded worker pool"""
+
+    def __init__(self, rounds: int = None, max_workers: int = None, max_pending: int = None,
+                 cache_ttl_seconds: float = 300, cache_size: int = 4096):
+        self.rounds = rounds or int(os.environ.get("BCRYPT_ROUNDS", "12"))
+        self.max_workers = max_workers or int(os.environ.get("BCRYPT_WORKERS", str(min(4, os.cpu_count() or 1))))
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="bcrypt")
+        # Caps queued work so a login burst cannot pile up unbounded hashing jobs
+        self._pending = asyncio.Semaphore(max_pending or self.max_workers * 8)
+        # Keys are HMACs under a per-process secret, so the cache never holds anything password-derivable
+        self._cache_secret = secrets.token_bytes(32)
+        self._recent = TTLCache(cache_size, cache_ttl_seconds)
+        self.cache_hits = 0
+        self._dummy_hash = None
+
+    async def _run(self, func, *args):
+        queued_at = time.perf_counter()
+        async with self._pending:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, self._timed, queued_at, func, *args)
+
+    @staticmethod
+    def _timed(queued_at, func, *args):
+        # Runs on the worker thread: the time until here is the wait for a free bcrypt worker
+        QUEUE_WAIT.labels("bcrypt").observe(time.perf_counter() - queued_at)
+        return func(*args)
+
+    def _cache_key(self, password: str, stored_hash: str) -> bytes:
+        return hmac.new(self._cache_secret, f"{stored_hash}\0{password}".encode(), hashlib.sha256).digest()
+
+    async def hash_password(self, password: str) -> str:
+        salt = bcrypt.gensalt(self.rounds)
+        hashed = await self._run(bcrypt.hashpw, password.encode(), salt)
+        return hashed.decode()
+
+    async def verify(self, password: str, stored_hash: str) -> bool:
+        if not stored_hash or not stored_hash.startswith(BCRYPT_PREFIXES):
+            logger.warning("Rejecting credential check against a non-bcrypt password hash")
+            return False
+
+        key = self._cache_key(password, stored_hash)
+        if key in self._recent:
+            self.cache_hits += 1
+            return True
+
+        matches = await self._run(bcrypt.checkpw, password.encode(), stored_hash.encode())
+        if matches:
+            self._recent[key] = True
+        return matches
+
+    async def warm_up(self):
+        """Create the hash that unknown accounts are checked against, so the first miss is not slower"""
+        if self._dummy_hash is None:
+            self._dummy_hash = await self.hash_password(secrets.token_urlsafe(16))
+
+    async def verify_unknown(self, password: str) -> bool:
+        """Do a full bcrypt check for an account that does not exist; always False.
+
+        A miss then takes as long as a wrong password, so response times do not reveal which
+        accounts exist.
+        """
+        await self.warm_up()
+        await self._run(bcrypt.checkpw, password.encode(), self._dummy_hash.encode())
+        return False
+
+    def needs_rehash(self, stored_hash: str) -> bool:
+        """True when the hash was made with a different cost factor than the current one"""
+        try:
+            return int(stored_hash.split("$")[2]) != self.rounds
+        except (IndexError, ValueError):
+            return True
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+credential_verifier = CredentialVerifier()
@@ -0,0 +1,167 @@
+# MongoDB connection pool configuration for the RMSS chatbot backend
+# Pool sizing, timeouts, compression and read preference are read from the environment
+# and the pool is warmed up at startup so the first requests after a deploy skip the handshakes.
+
+import os
+import time
+import asyncio
+import logging
+import threading
+from collections import deque
+from typing import Optional
+
+from pymongo import monitoring
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from metrics import QUEUE_WAIT, percentile
+
+logger = logging.getLogger(__name__)
+
+
+def _env_int(name: str, default: Optional[int]) -> Optional[int]:
+    value = os.environ.get(name)
+    if value is None or value == "":
+        return default
+    return int(value)
+
+
+def mongo_client_options():
+    """Build AsyncIOMotorClient keyword arguments from environment settings"""
+    options = {
+        "maxPoolSize": _env_int("MONGO_MAX_POOL_SIZE", 100),
+        "minPoolSize": _env_int("MONGO_MIN_POOL_SIZE", 5),
+        "maxIdleTimeMS": _env_int("MONGO_MAX_IDLE_TIME_MS", 300000),
+        "connectTimeoutMS": _env_int("MONGO_CONNECT_TIMEOUT_MS", 10000),
+        "serverSelectionTimeoutMS": _env_int("MONGO_SERVER_SELECTION_TIMEOUT_MS", 5000),
+        "socketTimeoutMS": _env_int("MONGO_SOCKET_TIMEOUT_MS", None),
+        "waitQueueTimeoutMS": _env_int("MONGO_WAIT_QUEUE_TIMEOUT_MS", None),
+        "readPreference": os.environ.get("MONGO_READ_PREFERENCE", "primary"),
+    }
+
+    # e.g. "zstd,snappy,zlib" - zlib needs no extra packages
+    compressors = os.environ.get("MONGO_COMPRESSORS")
+    if compressors:
+        options["compressors"] = compressors
+
+    return {key: value for key, value in options.items() if value is not None}
+
+
+class PoolCheckoutMonitor(monitoring.ConnectionPoolListener):
+    """Tracks how long requests wait to check a connection out of the pool"""
+
+    def __init__(self, max_samples: int = 2048):
+        self._lock = threading.Lock()
+        # Motor runs each operation on an executor thread, so checkout start and finish
+        # for one operation always happen on the same thread
+        self._started = {}
+        self._samples = deque(maxlen=max_samples)
+        self.checkouts = 0
+        self.failed_checkouts = 0
+        self.total_wait_ms = 0.0
+        self.max_wait_ms = 0.0
+        self.connections_open = 0
+        self.checked_out = 0
+
+    def _finish_wait(self, event):
+        started = self._started.pop((event.address, threading.get_ident()), None)
+        if started is None:
+            return None
+        return (time.perf_counter() - started) * 1000
+
+    def connection_check_out_started(self, event):
+        self._started[(event.address, threading.get_ident())] = time.perf_counter()
+
+    def connection_checked_out(self, event):
+        wait_ms = self._finish_wait(event)
+        with self._lock:
+            self.checkouts += 1
+            self.checked_out += 1
+            if wait_ms is not None:
+                self._samples.append(wait_ms)
+                self.total_wait_ms += wait_ms
+                self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+        if wait_ms is not None:
+            QUEUE_WAIT.labels("mongo_pool").observe(wait_ms / 1000)
+
+    def connection_check_out_failed(self, event):
+        wait_ms = self._finish_wait(event)
+        with self._lock:
+            self.failed_checkouts += 1
+            if wait_ms is not None:
+                self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+        logger.warning(f"MongoDB pool checkout failed ({event.reason}) after {wait_ms or 0:.1f}ms")
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.checked_out = max(0, self.checked_out - 1)
+
+    def connection_created(self, event):
+        with self._lock:
+            self.connections_open += 1
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.connections_open = max(0, self.connections_open - 1)
+
+    def connection_ready(self, event):
+        pass
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def snapshot(self):
+        """Current pool usage and checkout wait statistics"""
+        with self._lock:
+            samples = sorted(self._samples)
+            checkouts = self.checkouts
+            stats = {
+                "checkouts": checkouts,
+                "failed_checkouts": self.failed_checkouts,
+                "connections_open": self.connections_open,
+                "checked_out": self.checked_out,
+                "wait_ms_avg": round(self.total_wait_ms / checkouts, 3) if checkouts else 0.0,
+                "wait_ms_max": round(self.max_wait_ms, 3),
+            }
+
+        for label, quantile in (("wait_ms_p50", 0.50), ("wait_ms_p95", 0.95), ("wait_ms_p99", 0.99)):
+            stats[label] = round(percentile(samples, quantile), 3) if samples else 0.0
+        return stats
+
+
+pool_monitor = PoolCheckoutMonitor()
+
+
+def create_mongo_client(mongo_url: str, pool_monitor: Optional[PoolCheckoutMonitor] = None, listeners=()):
+    """Create the shared Motor client with the configured pool settings and event listeners"""
+    options = mongo_client_options()
+    event_listeners = list(listeners)
+    if pool_monitor is not None:
+        event_listeners.append(pool_monitor)
+    if event_listeners:
+        options["event_listeners"] = event_listeners
+    return AsyncIOMotorClient(mongo_url, **options)
+
+
+async def warm_up_pool(client, connections: Optional[int] = None):
+    """Ping the server and open `connections` pooled connections ahead of traffic"""
+    if connections is None:
+        connections = _env_int("MONGO_WARMUP_CONNECTIONS", client.options.pool_options.min_pool_size)
+
+    start = time.perf_counter()
+    await client.admin.command("ping")
+    # Concurrent pings force the pool to open one connection per in-flight command
+    if connections > 1:
+        await asyncio.gather(*(client.admin.command("ping") for _ in range(connections - 1)))
+
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    logger.info(f"MongoDB pool warmed up with {max(connections, 1)} connections in {elapsed_ms:.1f}ms")
+    return elapsed_ms
@@ -1,10 +1,14 @@
 # Mock Authentication System for RMSS Demo
 # This demonstrates how student authentication would work with real RMSS database
 
-import uuid
-from datetime import datetime, timezone, timedelta
+from datetime import datetime, timezone
 import random
 import hashlib
+from otp_store import create_otp_store
+from session_tokens import issue_token
+from student_repository import CachedStudentRepository, FixtureStudentRepository
+import response_templates
+from credentials import credential_verifier
 
 # Mock student database for demo purposes
 DEMO_STUDENTS = {
@@ -13,7 +17,7 @@ DEMO_STUDENTS = {
         "full_name": "Emily Tan Wei Ling",
         "email": "emily.tan@email.com", 
         "phone": "+6591234567",
-        "password_hash": "hashed_password_123",  # In real system, this would be bcrypt hashed
+        "password_hash": "$2b$12$PIui6sP87Lwue9YfKg.46eTZ5W5sYFPw.7B3gvT.Xy/KWePKTAfC2",  # bcrypt hash of the demo password
         "enrollments": [
             {
                 "course": "P6 Mathematics",
@@ -44,7 +48,7 @@ DEMO_STUDENTS = {
         "full_name": "Ryan Lee Jun Wei",
         "email": "ryan.lee@email.com",
         "phone": "+6598765432",
-        "password_hash": "hashed_password_456",
+        "password_hash": "$2b$12$kLRsPQZBlJvnwcnSyOG8eOr4FmAlLD11FI4Jvvvm.1ZpMX0mgdY.O",
         "enrollments": [
             {
                 "course": "S3 AMath",
@@ -75,7 +79,7 @@ DEMO_STUDENTS = {
         "full_name": "Sarah Chua Mei Lin", 
         "email": "sarah.chua@email.com",
         "phone": "+6591111111",
-        "password_hash": "hashed_password_789",
+        "password_hash": "$2b$12$K3iMxgI9FWCYnzHeonckmuyqi/GSNM9goKT84diN/DAyjUF/PTVMO",
         "enrollments": [
             {
                 "course": "J2 Mathematics",
@@ -96,155 +100,90 @@ DEMO_STUDENTS = {
     }
 }
 
-# Mock OTP storage for demo (in real system, use Redis with expiration)
-DEMO_OTP_STORAGE = {}
+# Student lookups go through a read-through cache; the demo data is the default backing store.
+# server.py swaps in the Mongo-backed repository when STUDENT_DATA_SOURCE=mongo.
+student_repository = CachedStudentRepository(FixtureStudentRepository(DEMO_STUDENTS))
+
+def set_student_repository(repository):
+    """Replace the repository used by DemoAuthService"""
+    global student_repository
+    student_repository = repository
+
+# OTP storage with 5-minute expiry - in memory, or in Redis when workers must share it (OTP_STORE_URL)
+DEMO_OTP_STORE = create_otp_store(ttl_seconds=5 * 60, max_attempts=3)
 
 class DemoAuthService:
     """Mock authentication service demonstrating RMSS integration"""
     
     @staticmethod
-    def verify_student_credentials(student_id: str, password: str = None, phone: str = None):
+    async def verify_student_credentials(student_id: str, password: str = None, phone: str = None):
         """Verify student credentials - multiple verification methods"""
-        student = DEMO_STUDENTS.get(student_id.upper())
-        if not student:
-            return None
-            
         # Password verification (for web widget)
         if password:
-            # In real system, use bcrypt.checkpw()
-            return student if password == "demo123" else None
+            student = await student_repository.get_by_id(student_id)
+            if not student:
+                # Same bcrypt work as a wrong password, so unknown student IDs cannot be told apart
+                await credential_verifier.verify_unknown(password)
+                return None
+            # bcrypt runs on the verifier's worker pool, off the event loop
+            return student if await credential_verifier.verify(password, student["password_hash"]) else None
             
-        # Phone verification (for WhatsApp)  
+        # Phone verification (for WhatsApp) - look up the student, then match the registered phone.
+        # Not the other way round: siblings can share a parent's number.
         if phone:
-            return student if student["phone"] == phone else None
+            student = await student_repository.get_by_id(student_id)
+            if not student or student.get("phone") != phone:
+                return None
+            return student
             
         return None
     
     @staticmethod
-    def generate_otp(student_id: str):
+    async def generate_otp(student_id: str):
         """Generate OTP for WhatsApp verification"""
         otp = f"{random.randint(100000, 999999):06d}"
-        # Store with 5-minute expiration
-        DEMO_OTP_STORAGE[student_id] = {
-            "otp": otp,
-            "expires": datetime.now() + timedelta(minutes=5),
-            "attempts": 0
-        }
+        await DEMO_OTP_STORE.issue(student_id, otp)
         return otp
     
     @staticmethod
-    def verify_otp(student_id: str, submitted_otp: str):
+    async def verify_otp(student_id: str, submitted_otp: str):
         """Verify OTP code"""
-        stored_data = DEMO_OTP_STORAGE.get(student_id)
-        if not stored_data:
-            return False
-            
-        # Check expiration
-        if datetime.now() > stored_data["expires"]:
-            del DEMO_OTP_STORAGE[student_id]
-            return False
-            
-        # Check attempts limit
-        stored_data["attempts"] += 1
-        if stored_data["attempts"] > 3:
-            del DEMO_OTP_STORAGE[student_id]
-            return False
-            
-        # Verify OTP
-        if stored_data["otp"] == submitted_otp:
-            del DEMO_OTP_STORAGE[student_id]  # Remove after successful verification
-            return True
-            
-        return False
+        # Expiry, the 3-attempt limit and single use are enforced by the store
+        return await DEMO_OTP_STORE.verify(student_id, submitted_otp)
     
     @staticmethod
     def create_session_token(student_id: str):
         """Create session token for authenticated access"""
-        # In real system, use JWT tokens
+        # HMAC-signed token carrying student id, scope and expiry - validated without a session lookup
+        token, claims = issue_token(student_id.upper())
         token_data = {
-            "student_id": student_id,
-            "created": datetime.now().isoformat(),
-            "expires": (datetime.now() + timedelta(minutes=30)).isoformat()
+            "student_id": claims["sid"],
+            "created": datetime.fromtimestamp(claims["iat"], timezone.utc).isoformat(),
+            "expires": datetime.fromtimestamp(claims["exp"], timezone.utc).isoformat()
         }
-        # Simple demo token - real system would use JWT
-        token = f"demo_token_{student_id}_{uuid.uuid4().hex[:8]}"
         return token, token_data
     
     @staticmethod 
-    def get_student_data(student_id: str):
+    async def get_student_data(student_id: str):
         """Get comprehensive student data"""
-        return DEMO_STUDENTS.get(student_id.upper())
+        return await student_repository.get_by_id(student_id)
     
     @staticmethod
     def format_fees_info(student_data):
         """Format fees information for chatbot response"""
-        fees = student_data["fees"]
-        
-        if fees["outstanding"] > 0:
-            return f"""💰 **Your Fees Information:**
-
-📊 **Current Status:**
-• Total Monthly Fees: ${fees['total_fees']:.2f}
-• Amount Paid: ${fees['paid_amount']:.2f}
-• Outstanding Balance: ${fees['outstanding']:.2f}
-• Due Date: {fees['due_date']}
-
-⚠️ **Payment Required:** Please settle your outstanding balance by {fees['due_date']}
-
-💳 **Payment Methods:**
-• Bank Transfer: DBS 123-456789-0 (RMSS Pte Ltd)
-• Cash: Any RMSS location during office hours
-• PayNow: 6222-8222
-
-📞 **Need Help?** Call 6222 8222 for payment assistance"""
-
-        else:
-            return f"""💰 **Your Fees Information:**
-
-✅ **Account Status: PAID IN FULL**
-
-📊 **Details:**
-• Total Monthly Fees: ${fees['total_fees']:.2f}  
-• Last Payment: {fees['last_payment']}
-• Next Payment Due: {(datetime.now() + timedelta(days=30)).strftime('%Y-%m-%d')}
-
-😊 Thank you for keeping your payments up to date!"""
+        return response_templates.render_fees(student_data)
     
     @staticmethod
     def format_schedule_info(student_data):
         """Format schedule information for chatbot response"""
-        enrollments = student_data["enrollments"]
-        
-        schedule_text = "📅 **Your Class Schedule:**\n\n"
-        
-        for enrollment in enrollments:
-            schedule_text += f"""📚 **{enrollment['course']}**
-📍 Location: {enrollment['location']}
-👨‍🏫 Tutor: {enrollment['tutor']}
-⏰ Schedule: {enrollment['schedule']}
-📆 Started: {enrollment['start_date']}
-
-"""
-        
-        schedule_text += """📞 **Schedule Changes:**
-Need to modify your schedule? Call 6222 8222
-
-🎓 **Free Trial:** Interested in additional subjects? Ask about our free trial lessons!"""
-
-        return schedule_text
+        return response_templates.render_schedule(student_data)
     
     @staticmethod
     def format_profile_info(student_data):
         """Format profile information for chatbot response"""
-        return f"""👨‍🎓 **Your Profile Information:**
-
-📝 **Student Details:**
-• Name: {student_data['full_name']}
-• Student ID: {student_data['student_id']}
-• Email: {student_data['email']}
-• Phone: {student_data['phone']}
-
-📚 **Current Enrollments:** {len(student_data['enrollments'])} subjects
-💰 **Outstanding Fees:** ${student_data['fees']['outstanding']:.2f}
-
-📞 **Update Profile:** Call 6222 8222 to update contact details"""
\ No newline at end of file
+        return response_templates.render_profile(student_data)
+    
+    @staticmethod
+    async def invalidate_student(student_id: str):
+        """Call after a student's fees or enrolments change, so the cached record is re-read"""
+        await student_repository.invalidate(student_id)
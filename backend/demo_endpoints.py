@@ -1,12 +1,13 @@
 # Demo API Endpoints for RMSS Student Authentication
 # This shows how real RMSS database integration would work
 
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request
 from pydantic import BaseModel
 from typing import Optional, Dict, Any
 import uuid
-from datetime import datetime, timezone, timedelta
 from demo_auth import DemoAuthService
+from session_tokens import authenticate, revoke_token
+from rate_limit import admit, client_ip
 
 # Create demo router
 demo_router = APIRouter(prefix="/api/demo")
@@ -34,20 +35,20 @@ class StudentDataRequest(BaseModel):
     session_token: str
     data_type: str  # 'profile', 'fees', 'schedule'
 
+class LogoutRequest(BaseModel):
+    session_token: str
+
 class StudentDataResponse(BaseModel):
     success: bool
     data: Optional[str] = None
     error: Optional[str] = None
 
-# Mock session storage (in real system, use Redis)
-DEMO_SESSIONS = {}
-
 @demo_router.post("/login", response_model=AuthResponse)
 async def demo_student_login(request: StudentLoginRequest):
     """Demo student login for web widget"""
     try:
         # Verify student credentials
-        student_data = DemoAuthService.verify_student_credentials(
+        student_data = await DemoAuthService.verify_student_credentials(
             request.student_id, 
             password=request.password
         )
@@ -60,12 +61,6 @@ async def demo_student_login(request: StudentLoginRequest):
         
         # Create session token
         session_token, token_data = DemoAuthService.create_session_token(request.student_id)
-        DEMO_SESSIONS[session_token] = {
-            "student_id": request.student_id,
-            "student_data": student_data,
-            "created": datetime.now(),
-            "expires": datetime.now() + timedelta(minutes=30)
-        }
         
         return AuthResponse(
             success=True,
@@ -81,11 +76,13 @@ async def demo_student_login(request: StudentLoginRequest):
         )
 
 @demo_router.post("/whatsapp/request-otp", response_model=AuthResponse)
-async def demo_request_otp(request: WhatsAppOTPRequest):
+async def demo_request_otp(request: WhatsAppOTPRequest, http_request: Request):
     """Demo OTP request for WhatsApp authentication"""
+    # Each OTP request may send a WhatsApp message - limit per student and per client IP
+    await admit("otp", {"student": request.student_id.upper(), "ip": client_ip(http_request)})
     try:
         # Verify student ID and phone match
-        student_data = DemoAuthService.verify_student_credentials(
+        student_data = await DemoAuthService.verify_student_credentials(
             request.student_id,
             phone=request.phone
         )
@@ -97,7 +94,7 @@ async def demo_request_otp(request: WhatsAppOTPRequest):
             )
         
         # Generate and "send" OTP
-        otp = DemoAuthService.generate_otp(request.student_id)
+        otp = await DemoAuthService.generate_otp(request.student_id)
         
         # In real system, send via WhatsApp Business API
         # await send_whatsapp_otp(request.phone, otp)
@@ -118,7 +115,7 @@ async def demo_verify_otp(request: OTPVerifyRequest):
     """Demo OTP verification for WhatsApp"""
     try:
         # Verify OTP
-        is_valid = DemoAuthService.verify_otp(request.student_id, request.otp)
+        is_valid = await DemoAuthService.verify_otp(request.student_id, request.otp)
         
         if not is_valid:
             return AuthResponse(
@@ -127,16 +124,10 @@ async def demo_verify_otp(request: OTPVerifyRequest):
             )
         
         # Get student data
-        student_data = DemoAuthService.get_student_data(request.student_id)
+        student_data = await DemoAuthService.get_student_data(request.student_id)
         
         # Create authenticated session
         session_token, token_data = DemoAuthService.create_session_token(request.student_id)
-        DEMO_SESSIONS[session_token] = {
-            "student_id": request.student_id,
-            "student_data": student_data,
-            "created": datetime.now(),
-            "expires": datetime.now() + timedelta(minutes=30)
-        }
         
         return AuthResponse(
             success=True,
@@ -156,23 +147,21 @@ async def demo_get_student_data(request: StudentDataRequest):
     """Demo endpoint for retrieving authenticated student data"""
     try:
         # Verify session token
-        session = DEMO_SESSIONS.get(request.session_token)
-        if not session:
+        # Signed token - validated locally, student data is looked up separately
+        claims = await authenticate(request.session_token)
+        if not claims:
             return StudentDataResponse(
                 success=False,
                 error="Session expired. Please login again."
             )
         
-        # Check if session expired
-        if datetime.now() > session["expires"]:
-            del DEMO_SESSIONS[request.session_token]
+        student_data = await DemoAuthService.get_student_data(claims["sid"])
+        if not student_data:
             return StudentDataResponse(
                 success=False,
-                error="Session expired. Please login again."
+                error="Student record not found."
             )
         
-        student_data = session["student_data"]
-        
         # Route to appropriate data formatter
         if request.data_type == "fees":
             formatted_data = DemoAuthService.format_fees_info(student_data)
@@ -197,6 +186,21 @@ async def demo_get_student_data(request: StudentDataRequest):
             error="Data service temporarily unavailable. Please try again."
         )
 
+@demo_router.post("/logout", response_model=AuthResponse)
+async def demo_logout(request: LogoutRequest):
+    """Demo logout - revokes the session token when revocation is enabled"""
+    claims = await authenticate(request.session_token)
+    if claims and not await revoke_token(claims):
+        # Without revocation the token cannot be ended early, so do not claim it has been
+        return AuthResponse(
+            success=False,
+            message="Sessions are not revoked on this server: discard the session token, it stays valid until it expires."
+        )
+    return AuthResponse(
+        success=True,
+        message="You have been logged out."
+    )
+
 @demo_router.get("/demo-info")
 async def demo_info():
     """Information about the demo system"""
@@ -0,0 +1,99 @@
+# Liveness and readiness probes for the RMSS chatbot backend
+# /healthz only says the worker process is serving. /readyz checks what a request needs - a Mongo
+# ping, the LLM circuit, the course catalog and how many requests are already queued - and caches
+# the result for HEALTH_CACHE_SECONDS, with concurrent probes sharing one check, so load balancer
+# polling costs next to nothing. A draining worker reports not-ready immediately.
+
+import os
+import time
+import asyncio
+import logging
+
+import catalog
+from circuit_breaker import llm_circuit, OPEN
+from lifecycle import worker_lifecycle
+
+logger = logging.getLogger(__name__)
+
+HEALTH_CACHE_SECONDS = float(os.environ.get("HEALTH_CACHE_SECONDS", "2"))
+MONGO_PING_TIMEOUT_SECONDS = float(os.environ.get("HEALTH_MONGO_TIMEOUT_SECONDS", "1"))
+READY_MAX_IN_FLIGHT = int(os.environ.get("READY_MAX_IN_FLIGHT", "200"))
+# An open LLM circuit affects every worker alike, so by default it degrades readiness rather than failing it
+READY_REQUIRES_LLM = os.environ.get("READY_REQUIRES_LLM", "false").lower() in ("1", "true", "yes")
+
+
+class HealthChecker:
+    """Readiness checks with a short-lived cached result"""
+
+    def __init__(self, get_db, cache_seconds: float = HEALTH_CACHE_SECONDS, lifecycle=worker_lifecycle):
+        self._get_db = get_db
+        self.cache_seconds = cache_seconds
+        self.lifecycle = lifecycle
+        self._started = time.monotonic()
+        self._cached = None
+        self._cached_at = 0.0
+        self._pending = None
+
+    def liveness(self):
+        return {"status": "ok", "uptime_seconds": round(time.monotonic() - self._started, 1)}
+
+    async def _check_mongo(self):
+        db = self._get_db()
+        if db is None:
+            return {"ok": False, "error": "not connected"}
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(db.command("ping"), MONGO_PING_TIMEOUT_SECONDS)
+        except Exception as e:
+            return {"ok": False, "error": f"{type(e).__name__}: {str(e)}"[:200]}
+        return {"ok": True, "latency_ms": round((time.perf_counter() - start) * 1000, 1)}
+
+    def _check_llm(self):
+        circuit = llm_circuit.snapshot()
+        return {"ok": circuit["state"] != OPEN or not READY_REQUIRES_LLM, "required": READY_REQUIRES_LLM, **circuit}
+
+    @staticmethod
+    def _check_catalog():
+        courses = sum(len(subjects) for subjects in catalog.COURSES.values())
+        return {"ok": courses > 0, "version": catalog.CATALOG_VERSION, "courses": courses}
+
+    def _check_queue(self):
+        in_flight = self.lifecycle.in_flight()
+        return {"ok": in_flight <= READY_MAX_IN_FLIGHT, "in_flight": in_flight, "max_in_flight": READY_MAX_IN_FLIGHT}
+
+    async def _run_checks(self):
+        checks = {
+            "mongo": await self._check_mongo(),
+            "llm": self._check_llm(),
+            "catalog": self._check_catalog(),
+            "queue": self._check_queue(),
+        }
+        ready = all(check["ok"] for check in checks.values())
+        degraded = checks["llm"]["state"] == OPEN
+        if not ready:
+            logger.warning("Readiness check failed", extra={
+                "failed_checks": [name for name, check in checks.items() if not check["ok"]]
+            })
+        return {"status": "ready" if ready else "not_ready", "degraded": degraded, "checks": checks}
+
+    def _store(self, future):
+        self._pending = None
+        if not future.cancelled() and future.exception() is None:
+            self._cached, self._cached_at = future.result(), time.monotonic()
+
+    async def readiness(self):
+        """(ready, report); the dependency checks are reused for cache_seconds"""
+        if self.lifecycle.draining:
+            return False, {"status": "draining"}
+        if not self.lifecycle.started:
+            return False, {"status": "starting"}
+
+        if self._cached is None or time.monotonic() - self._cached_at >= self.cache_seconds:
+            if self._pending is None:
+                # One check at a time; probes arriving meanwhile wait for the same result
+                self._pending = asyncio.ensure_future(self._run_checks())
+                self._pending.add_done_callback(self._store)
+            report = dict(await asyncio.shield(self._pending), checked_seconds_ago=0.0)
+        else:
+            report = dict(self._cached, checked_seconds_ago=round(time.monotonic() - self._cached_at, 2))
+        return report["status"] == "ready", report
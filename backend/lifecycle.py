@@ -0,0 +1,55 @@
+# Worker lifecycle for the RMSS chatbot backend
+# A stopping worker drains before it releases its resources: it is marked draining (so readiness
+# checks fail and load balancers stop routing to it), keeps serving for DRAIN_DELAY_SECONDS, and
+# waits up to DRAIN_TIMEOUT_SECONDS for in-flight requests before the Mongo client, stores and
+# flushers are closed. serve.py starts the drain on SIGTERM; the lifespan drains on shutdown.
+
+import os
+import time
+import asyncio
+import logging
+
+from metrics import HTTP_IN_FLIGHT
+
+logger = logging.getLogger(__name__)
+
+DRAIN_DELAY_SECONDS = float(os.environ.get("DRAIN_DELAY_SECONDS", "5"))
+DRAIN_TIMEOUT_SECONDS = float(os.environ.get("DRAIN_TIMEOUT_SECONDS", "30"))
+
+
+class WorkerLifecycle:
+    """Whether this worker has started, and whether it is draining ahead of shutdown"""
+
+    def __init__(self):
+        self.started = False
+        self.draining = False
+        self.drain_started = None
+
+    @staticmethod
+    def in_flight() -> int:
+        return int(HTTP_IN_FLIGHT.labels().value)
+
+    def mark_started(self):
+        self.started = True
+        self.draining = False
+        self.drain_started = None
+
+    def begin_drain(self, reason: str):
+        if self.draining:
+            return
+        self.draining = True
+        self.drain_started = time.monotonic()
+        logger.info("Worker draining", extra={"reason": reason, "in_flight": self.in_flight()})
+
+    async def wait_for_requests(self, timeout: float = DRAIN_TIMEOUT_SECONDS) -> int:
+        """Wait until no requests are in flight or the timeout passes; returns those still running"""
+        deadline = time.monotonic() + timeout
+        while self.in_flight() > 0 and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        remaining = self.in_flight()
+        if remaining:
+            logger.warning(f"Drain timed out with {remaining} requests still in flight")
+        return remaining
+
+
+worker_lifecycle = WorkerLifecycle()
@@ -0,0 +1,163 @@
+# LLM record/replay cassettes for the RMSS chatbot backend
+# LLM_CASSETTE_MODE=record passes LLM calls through and appends each (prompt hash -> response,
+# latency, token counts) to a JSON-lines cassette; LLM_CASSETTE_MODE=replay answers from the
+# cassette instead, optionally sleeping for the recorded latency, so prompt-assembly and routing
+# changes can be benchmarked offline against recorded traffic. With LLM_CASSETTE_MATCH=request,
+# replay matches on the user's turn rather than the exact prompt, so a changed prompt still gets
+# its recorded answer and the token counts before and after can be compared.
+
+import os
+import json
+import time
+import asyncio
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from datetime import datetime, timezone
+
+from token_accounting import count_tokens
+
+logger = logging.getLogger(__name__)
+
+CASSETTE_MODES = ("off", "record", "replay")
+
+
+class CassetteMiss(LookupError):
+    """Replay found no recorded response for a prompt"""
+
+
+def prompt_key(model: str, system_message: str, prompt: str) -> str:
+    return hashlib.sha256(json.dumps([model, system_message, prompt]).encode()).hexdigest()
+
+
+def request_key(model: str, message: str, history_turns: int, follow_up=None) -> str:
+    """Identifies a user turn independently of how its prompt is assembled"""
+    follow_up = [follow_up.get("course"), follow_up.get("location")] if follow_up else None
+    return hashlib.sha256(json.dumps([model, message, history_turns, follow_up]).encode()).hexdigest()
+
+
+class LlmCassette:
+    """Recorded LLM responses keyed by prompt hash, with an optional per-turn secondary index"""
+
+    def __init__(self, path, mode: str = "off", match: str = "prompt", replay_latency: bool = False,
+                 on_miss: str = "error"):
+        if mode not in CASSETTE_MODES:
+            raise ValueError(f"LLM cassette mode must be one of {', '.join(CASSETTE_MODES)}")
+        self.path = Path(path)
+        self.mode = mode
+        self.match = match
+        self.replay_latency = replay_latency
+        self.on_miss = on_miss  # 'error' or 'live' (call the LLM on a replay miss)
+        self.entries = {}  # prompt key -> entry
+        self._by_request = {}  # request key -> prompt key of its latest recording
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "request_hits": 0, "misses": 0, "recorded": 0,
+                      "recorded_prompt_tokens": 0, "replayed_prompt_tokens": 0}
+        if mode != "off":
+            self.load()
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "off"
+
+    def load(self):
+        """Read the cassette; later lines win, so re-recorded prompts replace older answers"""
+        if not self.path.exists():
+            return
+        with self.path.open(encoding="utf-8") as cassette:
+            for line in cassette:
+                if line.strip():
+                    self._index(json.loads(line))
+        logger.info(f"Loaded {len(self.entries)} LLM responses from cassette {self.path}")
+
+    def _index(self, entry: dict):
+        self.entries[entry["key"]] = entry
+        if entry.get("request_key"):
+            self._by_request[entry["request_key"]] = entry["key"]
+
+    def lookup(self, key: str, turn_key: str = None):
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.stats["hits"] += 1
+            return entry
+        if self.match == "request" and turn_key is not None and turn_key in self._by_request:
+            self.stats["request_hits"] += 1
+            return self.entries[self._by_request[turn_key]]
+        self.stats["misses"] += 1
+        return None
+
+    def record(self, key: str, model: str, system_message: str, prompt: str, response: str,
+               latency_ms: float, turn_key: str = None) -> dict:
+        """Add a response to the cassette and append it to the file"""
+        entry = {
+            "key": key,
+            "request_key": turn_key,
+            "model": model,
+            "response": response,
+            "latency_ms": round(latency_ms, 1),
+            "prompt_tokens": count_tokens(system_message, model) + count_tokens(prompt, model),
+            "completion_tokens": count_tokens(response, model),
+            "prompt_tail": prompt[-200:],
+            "recorded_at": datetime.now(timezone.utc).isoformat(),
+        }
+        with self._lock:
+            self._index(entry)
+            self.stats["recorded"] += 1
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.path.open("a", encoding="utf-8") as cassette:
+                cassette.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        return entry
+
+    def compact(self):
+        """Rewrite the cassette with one line per prompt, sorted by key, for stable diffs"""
+        with self._lock:
+            lines = [json.dumps(self.entries[key], ensure_ascii=False) + "\n" for key in sorted(self.entries)]
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            temporary = self.path.with_suffix(self.path.suffix + ".tmp")
+            temporary.write_text("".join(lines), encoding="utf-8")
+            temporary.replace(self.path)
+
+    async def complete(self, call, model: str, system_message: str, prompt: str, turn_key: str = None) -> str:
+        """Answer a prompt from the cassette, or through `call` (a coroutine factory) and record it"""
+        if self.mode == "off":
+            return await call()
+
+        key = prompt_key(model, system_message, prompt)
+        if self.mode == "replay":
+            entry = self.lookup(key, turn_key)
+            if entry is not None:
+                self.stats["recorded_prompt_tokens"] += entry["prompt_tokens"]
+                self.stats["replayed_prompt_tokens"] += count_tokens(system_message, model) + count_tokens(prompt, model)
+                if self.replay_latency:
+                    await asyncio.sleep(entry["latency_ms"] / 1000)
+                return entry["response"]
+            if self.on_miss != "live":
+                raise CassetteMiss(f"No recorded LLM response for prompt {key[:12]} in {self.path}")
+
+        start = time.perf_counter()
+        response = await call()
+        latency_ms = (time.perf_counter() - start) * 1000
+        if self.mode == "record":
+            await asyncio.to_thread(self.record, key, model, system_message, prompt, response, latency_ms, turn_key)
+        return response
+
+    def summary(self):
+        recorded, replayed = self.stats["recorded_prompt_tokens"], self.stats["replayed_prompt_tokens"]
+        return {
+            "mode": self.mode,
+            "match": self.match,
+            "path": str(self.path),
+            "entries": len(self.entries),
+            **self.stats,
+            "prompt_token_change": round(replayed / recorded - 1, 4) if recorded else None,
+        }
+
+
+llm_cassette = LlmCassette(
+    os.environ.get("LLM_CASSETTE_PATH", "llm_cassette.jsonl"),
+    mode=os.environ.get("LLM_CASSETTE_MODE", "off").lower(),
+    match=os.environ.get("LLM_CASSETTE_MATCH", "prompt").lower(),
+    replay_latency=os.environ.get("LLM_CASSETTE_REPLAY_LATENCY", "false").lower() in ("1", "true", "yes"),
+    on_miss=os.environ.get("LLM_CASSETTE_ON_MISS", "error").lower(),
+)
@@ -0,0 +1,161 @@
+# Event-loop stall detection for the RMSS chatbot backend
+# A heartbeat task on the loop measures how late it wakes up (loop lag); a watchdog thread
+# notices when the heartbeat stops beating for longer than LOOP_STALL_THRESHOLD_MS, captures the
+# loop thread's stack at that moment, and reports it with the endpoint and request id of the
+# request whose task is running - i.e. the one doing blocking work.
+
+import os
+import sys
+import time
+import asyncio
+import logging
+import threading
+from collections import deque
+from datetime import datetime, timezone
+
+from metrics import REGISTRY
+from structured_logging import request_id_var
+
+logger = logging.getLogger(__name__)
+
+LOOP_LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+LOOP_LAG = REGISTRY.histogram(
+    "rmss_event_loop_lag_seconds", "How late the event loop heartbeat woke up", buckets=LOOP_LAG_BUCKETS)
+LOOP_STALLS = REGISTRY.counter(
+    "rmss_event_loop_stalls_total", "Event loop stalls over the threshold by route", ("route",))
+
+
+def _format_stack(frame, limit: int = 30) -> list:
+    stack = []
+    while frame is not None and len(stack) < limit:
+        code = frame.f_code
+        stack.append(f"{code.co_filename}:{frame.f_lineno} in {code.co_name}")
+        frame = frame.f_back
+    stack.reverse()
+    return stack
+
+
+class LoopWatchdog:
+    """Heartbeat on the event loop plus a thread that captures the stack when the loop stalls"""
+
+    def __init__(self, threshold_ms: float = 100.0, interval_ms: float = 20.0, max_reports: int = 100):
+        self.threshold = threshold_ms / 1000
+        self.interval = interval_ms / 1000
+        self.stalls = deque(maxlen=max_reports)
+        self._active_requests = {}  # task -> (ASGI scope, request id) of the request it serves
+        self._loop = None
+        self._loop_thread_id = None
+        self._last_beat = None
+        self._current_stall = None
+        self._heartbeat_task = None
+        self._thread = None
+        self._stop = threading.Event()
+
+    def start(self):
+        """Start the heartbeat on the running loop and the watchdog thread"""
+        if self._heartbeat_task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.perf_counter()
+        self._stop.clear()
+        self._heartbeat_task = asyncio.create_task(self._heartbeat())
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._thread.start()
+
+    async def stop(self):
+        self._stop.set()
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+            self._heartbeat_task = None
+
+    async def _heartbeat(self):
+        while True:
+            expected = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.perf_counter()
+            lag = max(0.0, now - expected)
+            LOOP_LAG.observe(lag)
+            self._last_beat = now
+            stall = self._current_stall
+            if stall is not None:
+                # The watchdog saw the start of this stall; record how long it lasted in total
+                stall["blocked_ms"] = round(lag * 1000, 1)
+                self._current_stall = None
+
+    def _watch(self):
+        while not self._stop.wait(self.interval / 2):
+            blocked = time.perf_counter() - self._last_beat - self.interval
+            if blocked < self.threshold or self._current_stall is not None:
+                continue
+            self._report(blocked)
+
+    def _report(self, blocked: float):
+        frame = sys._current_frames().get(self._loop_thread_id)
+        stack = _format_stack(frame)
+        del frame
+
+        task = asyncio.current_task(self._loop)  # the task the loop thread is stuck inside, if any
+        scope, request_id = self._active_requests.get(task, (None, None)) if task is not None else (None, None)
+        route = "none"
+        if scope is not None:
+            # FastAPI puts the matched route on the scope; fall back to the raw path before routing
+            route = scope["route"].path if "route" in scope else scope["path"]
+
+        stall = {
+            "detected_at": datetime.now(timezone.utc).isoformat(),
+            "blocked_ms": round(blocked * 1000, 1),
+            "route": route,
+            "request_id": request_id,
+            "task": task.get_name() if task is not None else None,
+            "stack": stack,
+        }
+        self._current_stall = stall
+        self.stalls.append(stall)
+        LOOP_STALLS.labels(route).inc()
+        logger.warning("Event loop blocked", extra={
+            "blocked_ms": stall["blocked_ms"],
+            "route": route,
+            "stall_request_id": request_id,
+            "stack": " <- ".join(reversed(stack[-8:])),
+        })
+
+    def track(self, scope, request_id: str):
+        """Associate the current task with a request until it finishes"""
+        task = asyncio.current_task()
+        if task is not None:
+            self._active_requests[task] = (scope, request_id)
+        return task
+
+    def untrack(self, task):
+        if task is not None:
+            self._active_requests.pop(task, None)
+
+    def recent_stalls(self, limit: int = 50):
+        return list(self.stalls)[::-1][:limit]
+
+
+loop_watchdog = LoopWatchdog(
+    threshold_ms=float(os.environ.get("LOOP_STALL_THRESHOLD_MS", "100")),
+    interval_ms=float(os.environ.get("LOOP_HEARTBEAT_MS", "20")),
+)
+
+
+class LoopWatchdogMiddleware:
+    """ASGI middleware recording which request each task serves, for stall attribution"""
+
+    def __init__(self, app, watchdog: LoopWatchdog = loop_watchdog):
+        self.app = app
+        self.watchdog = watchdog
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        task = self.watchdog.track(scope, request_id_var.get())
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.watchdog.untrack(task)
@@ -0,0 +1,39 @@
+# Offline stand-ins for the LLM and MongoDB
+# Used by the load-test harness and local runs without network access: StubLlmChat mirrors the
+# LlmChat interface with a configurable delay and one generic reply, and in_memory_database gives
+# a mongomock-motor database in place of the Motor client's.
+
+import asyncio
+
+
+class StubUserMessage:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class StubLlmChat:
+    """Drop-in for emergentintegrations' LlmChat that answers locally after `latency_seconds`"""
+
+    latency_seconds = 0.2
+    calls = 0
+
+    def __init__(self, api_key=None, session_id=None, system_message=None):
+        self.session_id = session_id
+        self.system_message = system_message or ""
+
+    def with_model(self, provider: str, model: str):
+        self.model = model
+        return self
+
+    async def send_message(self, message) -> str:
+        StubLlmChat.calls += 1
+        await asyncio.sleep(self.latency_seconds)
+        # Deliberately generic: tests assert on the prompt in-process, never on this wording
+        return "Thanks for your question! RMSS offers small-group classes from P1 to J2. How else can I help?"
+
+
+def in_memory_database(name: str):
+    """A Motor-compatible database held in memory (mongomock-motor)"""
+    from mongomock_motor import AsyncMongoMockClient
+
+    return AsyncMongoMockClient()[name]
@@ -0,0 +1,174 @@
+# Expiring OTP storage for WhatsApp verification
+# Expiry uses the monotonic clock and a min-heap, so abandoned OTPs are swept in O(log n)
+# each instead of staying in memory until someone looks them up again. Set OTP_STORE_URL (or
+# SESSION_STORE_URL) to a Redis URL to share OTPs between workers.
+
+import os
+import time
+import hmac
+import heapq
+import asyncio
+import logging
+import threading
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class OTPStore:
+    """Interface for OTP storage with expiry, an attempt limit and single use"""
+
+    async def issue(self, student_id: str, otp: str):
+        raise NotImplementedError
+
+    async def verify(self, student_id: str, submitted_otp: str) -> bool:
+        raise NotImplementedError
+
+    async def sweep(self) -> int:
+        return 0
+
+    async def run_sweeper(self, interval_seconds: float = 30):
+        return
+
+    def live_count(self) -> Optional[int]:
+        """OTPs held in this worker's memory, or None when they live elsewhere"""
+        return None
+
+    async def close(self):
+        pass
+
+
+class InMemoryOTPStore(OTPStore):
+    """Thread-safe OTP store with heap-ordered expiry and per-student attempt counters"""
+
+    def __init__(self, ttl_seconds: float = 300, max_attempts: int = 3, clock=time.monotonic):
+        self.ttl_seconds = ttl_seconds
+        self.max_attempts = max_attempts
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries = {}  # student_id -> [otp, expires_at, attempts]
+        self._expiry_heap = []  # (expires_at, student_id), stale after re-issue or verification
+
+    def _sweep_locked(self, now: float) -> int:
+        removed = 0
+        while self._expiry_heap and self._expiry_heap[0][0] <= now:
+            expires_at, student_id = heapq.heappop(self._expiry_heap)
+            entry = self._entries.get(student_id)
+            if entry is not None and entry[1] == expires_at:
+                del self._entries[student_id]
+                removed += 1
+        return removed
+
+    async def issue(self, student_id: str, otp: str):
+        """Store a new OTP for the student, replacing any earlier one"""
+        with self._lock:
+            now = self._clock()
+            self._sweep_locked(now)
+            expires_at = now + self.ttl_seconds
+            self._entries[student_id] = [otp, expires_at, 0]
+            heapq.heappush(self._expiry_heap, (expires_at, student_id))
+
+    async def verify(self, student_id: str, submitted_otp: str) -> bool:
+        """Check an OTP; the attempt count is incremented atomically with the check"""
+        with self._lock:
+            entry = self._entries.get(student_id)
+            if entry is None:
+                return False
+
+            if self._clock() >= entry[1]:
+                del self._entries[student_id]
+                return False
+
+            entry[2] += 1
+            if entry[2] > self.max_attempts:
+                del self._entries[student_id]
+                return False
+
+            if hmac.compare_digest(entry[0], submitted_otp):
+                del self._entries[student_id]  # OTPs are single use
+                return True
+
+            return False
+
+    async def sweep(self) -> int:
+        """Remove all expired OTPs; returns how many were removed"""
+        with self._lock:
+            removed = self._sweep_locked(self._clock())
+            # Verified and re-issued OTPs leave stale heap entries behind; rebuild when they dominate
+            if len(self._expiry_heap) > 2 * len(self._entries) + 1024:
+                self._expiry_heap = [(entry[1], student_id) for student_id, entry in self._entries.items()]
+                heapq.heapify(self._expiry_heap)
+            return removed
+
+    async def run_sweeper(self, interval_seconds: float = 30):
+        """Background task that sweeps expired OTPs while no requests arrive"""
+        while True:
+            await asyncio.sleep(interval_seconds)
+            removed = await self.sweep()
+            if removed:
+                logger.debug(f"Swept {removed} expired OTPs")
+
+    def live_count(self) -> int:
+        return len(self)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+
+_REDIS_VERIFY = """
+local otp = redis.call('HGET', KEYS[1], 'otp')
+if not otp then
+    return 0
+end
+local attempts = redis.call('HINCRBY', KEYS[1], 'attempts', 1)
+if attempts > tonumber(ARGV[2]) then
+    redis.call('DEL', KEYS[1])
+    return 0
+end
+if otp == ARGV[1] then
+    redis.call('DEL', KEYS[1])
+    return 1
+end
+return 0
+"""
+
+
+class RedisOTPStore(OTPStore):
+    """OTPs shared by every worker; Redis expires them, and a script checks and counts attempts atomically"""
+
+    def __init__(self, url: str, ttl_seconds: float = 300, max_attempts: int = 3,
+                 prefix: str = "rmss:otp:", client=None):
+        if client is None:
+            import redis.asyncio as redis
+            client = redis.from_url(url, decode_responses=True)
+        self.ttl_seconds = ttl_seconds
+        self.max_attempts = max_attempts
+        self._client = client
+        self._prefix = prefix
+        self._verify = client.register_script(_REDIS_VERIFY)
+
+    async def issue(self, student_id: str, otp: str):
+        key = self._prefix + student_id
+        async with self._client.pipeline(transaction=True) as pipe:
+            pipe.delete(key)
+            pipe.hset(key, mapping={"otp": otp, "attempts": 0})
+            pipe.pexpire(key, int(self.ttl_seconds * 1000))
+            await pipe.execute()
+
+    async def verify(self, student_id: str, submitted_otp: str) -> bool:
+        return bool(await self._verify(keys=[self._prefix + student_id], args=[submitted_otp, self.max_attempts]))
+
+    # Expiry is handled by Redis, so the default no-op sweep and sweeper apply
+
+    async def close(self):
+        await self._client.aclose()
+
+
+def create_otp_store(ttl_seconds: float, max_attempts: int, url: str = None) -> OTPStore:
+    """Pick the OTP store from OTP_STORE_URL, falling back to SESSION_STORE_URL (in-memory when unset)"""
+    url = url if url is not None else os.environ.get("OTP_STORE_URL", os.environ.get("SESSION_STORE_URL", ""))
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        logger.info("Using Redis OTP store")
+        return RedisOTPStore(url, ttl_seconds=ttl_seconds, max_attempts=max_attempts)
+    return InMemoryOTPStore(ttl_seconds=ttl_seconds, max_attempts=max_attempts)
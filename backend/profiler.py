@@ -0,0 +1,110 @@
+# On-demand sampling profiler for a live worker
+# A short-lived thread snapshots every thread's stack with sys._current_frames() at a fixed
+# interval and aggregates them into collapsed stacks ("frame;frame;frame count"), the input format
+# of flamegraph.pl, speedscope and similar tools. Nothing runs while no profile is in progress.
+
+import os
+import sys
+import time
+import threading
+from collections import Counter
+
+MAX_PROFILE_SECONDS = float(os.environ.get("PROFILER_MAX_SECONDS", "30"))
+MIN_INTERVAL_MS = 1.0
+
+# Innermost frames that mean a thread is parked, not using CPU
+IDLE_FUNCTIONS = {"select", "poll", "wait", "_wait_for_tstate_lock"}
+
+
+class ProfilerBusy(Exception):
+    """Raised when the maximum number of concurrent profiles is already running"""
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    filename = os.path.basename(code.co_filename)
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})".replace(";", ":")
+
+
+def _collapse(frame) -> list:
+    stack = []
+    while frame is not None:
+        stack.append(_frame_label(frame))
+        frame = frame.f_back
+    stack.reverse()
+    return stack
+
+
+class SamplingProfiler:
+    """Time-bounded stack sampling of the whole process, with a cap on concurrent runs"""
+
+    def __init__(self, max_concurrent: int = 1):
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+
+    def profile(self, seconds: float, interval_ms: float = 5.0, include_idle: bool = False,
+                thread_filter=None) -> dict:
+        """Sample for `seconds` (blocking the calling thread) and return the aggregated stacks"""
+        if not self._slots.acquire(blocking=False):
+            raise ProfilerBusy("A profile is already running")
+        try:
+            return self._sample(min(seconds, MAX_PROFILE_SECONDS), max(interval_ms, MIN_INTERVAL_MS) / 1000,
+                                include_idle, thread_filter)
+        finally:
+            self._slots.release()
+
+    @staticmethod
+    def _sample(seconds: float, interval: float, include_idle: bool, thread_filter):
+        me = threading.get_ident()
+        stacks = Counter()
+        samples = 0
+        started = time.perf_counter()
+        deadline = started + seconds
+        next_sample = started
+
+        while True:
+            now = time.perf_counter()
+            if now >= deadline:
+                break
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            frames = sys._current_frames()
+            for ident, frame in frames.items():
+                if ident == me:
+                    continue
+                name = names.get(ident, f"thread-{ident}")
+                if thread_filter and not thread_filter(name):
+                    continue
+                if not include_idle and frame.f_code.co_name in IDLE_FUNCTIONS:
+                    continue
+                stacks[";".join([name] + _collapse(frame))] += 1
+            samples += 1
+            frames = frame = None  # don't keep other threads' frames alive between samples
+
+            next_sample += interval
+            time.sleep(max(0.0, next_sample - time.perf_counter()))
+
+        return {
+            "duration_seconds": round(time.perf_counter() - started, 3),
+            "interval_ms": interval * 1000,
+            "samples": samples,
+            "stacks": stacks,
+        }
+
+
+def to_collapsed(result: dict) -> str:
+    """flamegraph.pl / speedscope collapsed-stack text, heaviest stacks first"""
+    return "".join(f"{stack} {count}\n" for stack, count in result["stacks"].most_common())
+
+
+def top_functions(result: dict, limit: int = 25):
+    """Self-time summary: innermost frames by sample count"""
+    leaves = Counter()
+    for stack, count in result["stacks"].items():
+        leaves[stack.rsplit(";", 1)[-1]] += count
+    total = sum(leaves.values()) or 1
+    return [
+        {"function": function, "samples": count, "percent": round(100 * count / total, 2)}
+        for function, count in leaves.most_common(limit)
+    ]
+
+
+sampling_profiler = SamplingProfiler(max_concurrent=int(os.environ.get("PROFILER_MAX_CONCURRENT", "1")))
@@ -0,0 +1,189 @@
+# Cost-aware admission control for /api/chat and the OTP endpoints
+# Token buckets are keyed by session, client IP and student_id. A request is charged by what it
+# costs us - an LLM answer much more than a deterministic one - and rejected fast with Retry-After
+# when any of its buckets is empty. Buckets live in memory, or in a Redis-protocol server
+# (RATE_LIMIT_STORE_URL) so that all workers share them.
+
+import os
+import math
+import time
+import logging
+from typing import Optional
+
+from cachetools import LRUCache
+from fastapi import HTTPException
+
+from metrics import RATE_LIMITED
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_ENABLED = os.environ.get("RATE_LIMIT_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Proxies in front of the app that append to X-Forwarded-For. 0 trusts only the connection's peer
+# address, which uvicorn already rewrites for the proxies listed in FORWARDED_ALLOW_IPS.
+TRUSTED_PROXY_HOPS = int(os.environ.get("TRUSTED_PROXY_HOPS", "0"))
+
+# Bucket capacity and refill rate (units per second) per route and identity kind
+ROUTE_POLICIES = {
+    "chat": {
+        "session": (30, 0.5),
+        "student": (60, 1.0),
+        "ip": (200, 5.0),
+    },
+    "otp": {
+        "student": (3, 3 / 600),
+        "ip": (10, 10 / 600),
+    },
+}
+
+# Units charged per request: deterministic answers are cheap, LLM calls are charged extra on top
+ROUTE_COSTS = {
+    "chat": 1,
+    "chat_llm": 4,
+    "otp": 1,
+}
+
+# "chat_llm" is an extra charge against the chat buckets
+BUCKET_ROUTES = {"chat_llm": "chat"}
+
+
+class RateLimiter:
+    """Atomically takes `cost` units from every bucket, or from none"""
+
+    async def acquire(self, buckets, cost: float):
+        """buckets: list of (key, capacity, refill_per_second); returns (allowed, retry_after_seconds)"""
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+
+class InMemoryRateLimiter(RateLimiter):
+    def __init__(self, max_buckets: int = 100000, clock=time.monotonic):
+        self._clock = clock
+        self._buckets = LRUCache(maxsize=max_buckets)  # key -> [tokens, updated_at]; idle buckets fall out
+
+    async def acquire(self, buckets, cost: float):
+        now = self._clock()
+        states = []
+        retry_after = 0.0
+        for key, capacity, rate in buckets:
+            tokens, updated_at = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated_at) * rate)
+            states.append((key, tokens))
+            if tokens < cost:
+                retry_after = max(retry_after, (cost - tokens) / rate)
+
+        if retry_after > 0:
+            return False, retry_after
+
+        for key, tokens in states:
+            self._buckets[key] = [tokens - cost, now]
+        return True, 0.0
+
+
+# KEYS: bucket keys; ARGV: now, cost, then capacity and rate for each key
+_REDIS_TOKEN_BUCKET = """
+local now = tonumber(ARGV[1])
+local cost = tonumber(ARGV[2])
+local tokens = {}
+local retry_after = 0
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[1 + i * 2])
+    local rate = tonumber(ARGV[2 + i * 2])
+    local state = redis.call('HMGET', key, 'tokens', 'ts')
+    local current = tonumber(state[1]) or capacity
+    local updated = tonumber(state[2]) or now
+    current = math.min(capacity, current + math.max(0, now - updated) * rate)
+    tokens[i] = current
+    if current < cost then
+        retry_after = math.max(retry_after, (cost - current) / rate)
+    end
+end
+if retry_after > 0 then
+    return {0, tostring(retry_after)}
+end
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[1 + i * 2])
+    local rate = tonumber(ARGV[2 + i * 2])
+    redis.call('HSET', key, 'tokens', tokens[i] - cost, 'ts', now)
+    redis.call('PEXPIRE', key, math.ceil(capacity / rate * 1000))
+end
+return {1, '0'}
+"""
+
+
+class RedisRateLimiter(RateLimiter):
+    def __init__(self, url: str, prefix: str = "rmss:ratelimit:", client=None):
+        if client is None:
+            import redis.asyncio as redis
+            client = redis.from_url(url, decode_responses=True)
+        self._client = client
+        self._prefix = prefix
+        self._script = client.register_script(_REDIS_TOKEN_BUCKET)
+
+    async def acquire(self, buckets, cost: float):
+        keys = [self._prefix + key for key, _, _ in buckets]
+        args = [time.time(), cost]
+        for _, capacity, rate in buckets:
+            args.extend([capacity, rate])
+        allowed, retry_after = await self._script(keys=keys, args=args)
+        return bool(int(allowed)), float(retry_after)
+
+    async def close(self):
+        await self._client.aclose()
+
+
+def create_rate_limiter(url: Optional[str] = None) -> RateLimiter:
+    """Pick the bucket store from RATE_LIMIT_STORE_URL, falling back to SESSION_STORE_URL"""
+    url = url if url is not None else os.environ.get("RATE_LIMIT_STORE_URL", os.environ.get("SESSION_STORE_URL", ""))
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisRateLimiter(url)
+    return InMemoryRateLimiter()
+
+
+rate_limiter = create_rate_limiter()
+
+
+def client_ip(http_request) -> str:
+    """Client address for rate limiting.
+
+    The leftmost X-Forwarded-For entries are whatever the client sent, so only the hop added by
+    the outermost of TRUSTED_PROXY_HOPS proxies is used, counted from the right.
+    """
+    if TRUSTED_PROXY_HOPS:
+        forwarded = [hop.strip() for hop in http_request.headers.get("x-forwarded-for", "").split(",") if hop.strip()]
+        if forwarded:
+            return forwarded[max(0, len(forwarded) - TRUSTED_PROXY_HOPS)]
+    return http_request.client.host if http_request.client else "unknown"
+
+
+async def admit(route: str, identities: dict, cost: Optional[float] = None):
+    """Charge a request against its buckets; raises HTTP 429 with Retry-After when over the limit.
+
+    identities maps identity kind ("session", "student", "ip") to its value; kinds without a
+    policy for the route, or without a value, are skipped.
+    """
+    if not RATE_LIMIT_ENABLED:
+        return
+
+    bucket_route = BUCKET_ROUTES.get(route, route)
+    policy = ROUTE_POLICIES[bucket_route]
+    buckets = [
+        (f"{bucket_route}:{kind}:{value}", *policy[kind])
+        for kind, value in identities.items()
+        if value and kind in policy
+    ]
+    if not buckets:
+        return
+
+    allowed, retry_after = await rate_limiter.acquire(buckets, ROUTE_COSTS[route] if cost is None else cost)
+    if not allowed:
+        retry_seconds = max(1, math.ceil(retry_after))
+        RATE_LIMITED.labels(route).inc()
+        logger.info(f"Rate limited {route} request for {identities}, retry after {retry_seconds}s")
+        raise HTTPException(
+            status_code=429,
+            detail="Too many requests. Please wait a moment and try again.",
+            headers={"Retry-After": str(retry_seconds)}
+        )
@@ -0,0 +1,88 @@
+# Response templates for student data and catalog answers
+# Each template is an f-string, which Python compiles once with the module; every call renders from
+# the record it is given, so fee and enrolment changes show up immediately. A memo keyed on the
+# record would cost more to look up than the render itself (see benchmarks/formatters_bench.py).
+
+from datetime import datetime, timedelta
+
+SCHEDULE_HEADER = "📅 **Your Class Schedule:**\n\n"
+
+SCHEDULE_FOOTER = """📞 **Schedule Changes:**
+Need to modify your schedule? Call 6222 8222
+
+🎓 **Free Trial:** Interested in additional subjects? Ask about our free trial lessons!"""
+
+
+def render_fees(student_data: dict) -> str:
+    fees = student_data["fees"]
+    if fees["outstanding"] > 0:
+        return f"""💰 **Your Fees Information:**
+
+📊 **Current Status:**
+• Total Monthly Fees: ${fees['total_fees']:.2f}
+• Amount Paid: ${fees['paid_amount']:.2f}
+• Outstanding Balance: ${fees['outstanding']:.2f}
+• Due Date: {fees['due_date']}
+
+⚠️ **Payment Required:** Please settle your outstanding balance by {fees['due_date']}
+
+💳 **Payment Methods:**
+• Bank Transfer: DBS 123-456789-0 (RMSS Pte Ltd)
+• Cash: Any RMSS location during office hours
+• PayNow: 6222-8222
+
+📞 **Need Help?** Call 6222 8222 for payment assistance"""
+
+    return f"""💰 **Your Fees Information:**
+
+✅ **Account Status: PAID IN FULL**
+
+📊 **Details:**
+• Total Monthly Fees: ${fees['total_fees']:.2f}  
+• Last Payment: {fees['last_payment']}
+• Next Payment Due: {(datetime.now() + timedelta(days=30)).strftime('%Y-%m-%d')}
+
+😊 Thank you for keeping your payments up to date!"""
+
+
+def render_schedule(student_data: dict) -> str:
+    # += reuses the string buffer in place; a list and join costs more for a handful of enrolments
+    schedule_text = SCHEDULE_HEADER
+    for enrollment in student_data["enrollments"]:
+        schedule_text += f"""📚 **{enrollment['course']}**
+📍 Location: {enrollment['location']}
+👨‍🏫 Tutor: {enrollment['tutor']}
+⏰ Schedule: {enrollment['schedule']}
+📆 Started: {enrollment['start_date']}
+
+"""
+    return schedule_text + SCHEDULE_FOOTER
+
+
+def render_profile(student_data: dict) -> str:
+    return f"""👨‍🎓 **Your Profile Information:**
+
+📝 **Student Details:**
+• Name: {student_data['full_name']}
+• Student ID: {student_data['student_id']}
+• Email: {student_data['email']}
+• Phone: {student_data['phone']}
+
+📚 **Current Enrollments:** {len(student_data['enrollments'])} subjects
+💰 **Outstanding Fees:** ${student_data['fees']['outstanding']:.2f}
+
+📞 **Update Profile:** Call 6222 8222 to update contact details"""
+
+
+def render_catalog_course(level: str, subject: str, course: dict, location: str = None) -> str:
+    if location:
+        title = f"{level} {subject} at {location}"
+        closing = "Would you like the class timings and tutors there?"
+    else:
+        title = f"{level} {subject}"
+        closing = "Would you like details on a specific location?"
+    return f"""📊 {title}:
+💰 Fee: ${course['fee']:.2f}/month (inclusive of GST)
+📅 Schedule: {course['lessons']}
+
+{closing}"""
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Production launcher for the RMSS chatbot backend
+Runs the app under uvicorn with one or more worker processes sharing the listening socket, so
+/api/chat scales across cores. Each worker owns its own Mongo client, LLM client and background
+flushers (see the lifespan in server.py).
+
+    python serve.py --workers 4 --port 8001
+
+More than one worker requires every piece of cross-request state to live outside the process:
+
+    SESSION_TOKEN_SECRET   same value on every worker, so any worker can validate a session token
+    SESSION_STORE_URL      redis://host:6379/0 - token revocations (logout)
+    OTP_STORE_URL          OTPs issued by one worker and verified by another (defaults to SESSION_STORE_URL)
+    RATE_LIMIT_STORE_URL   shared admission-control buckets (defaults to SESSION_STORE_URL)
+
+Behind a reverse proxy, set FORWARDED_ALLOW_IPS to the proxy addresses so uvicorn takes the
+client address from X-Forwarded-For; rate limits are keyed on it. Leave it unset and set
+TRUSTED_PROXY_HOPS (see rate_limit.py) to have the app pick the hop itself.
+
+Conversation state and chat history are already in MongoDB, and the response and student caches
+are per-worker caches, so they need nothing shared. Metrics, traces, profiles and loop stalls under
+/metrics and /api/admin describe the worker that happened to answer.
+
+Graceful drain: on SIGTERM a worker is marked draining, so /readyz fails and load balancers stop
+routing to it, but it keeps serving for DRAIN_DELAY_SECONDS (default 5). It then stops accepting
+connections, waits up to DRAIN_TIMEOUT_SECONDS (default 30) for in-flight requests, and releases its
+resources. SIGTERM to this launcher drains all workers in parallel; a second signal skips the delay.
+
+A worker that dies is restarted, after 1, 2, 4... seconds (up to 30) while it keeps dying within
+WORKER_MIN_UPTIME_SECONDS (default 10) of starting. After WORKER_MAX_EARLY_EXITS (default 5) such
+exits in a row the launcher stops every worker and exits with status 1.
+"""
+
+import os
+import sys
+import time
+import signal
+import asyncio
+import argparse
+import threading
+import multiprocessing
+from pathlib import Path
+
+import uvicorn
+
+from lifecycle import worker_lifecycle, DRAIN_DELAY_SECONDS, DRAIN_TIMEOUT_SECONDS
+
+BACKEND_DIR = Path(__file__).resolve().parent
+
+SHARED_STATE_SETTINGS = {
+    "SESSION_TOKEN_SECRET": "session tokens would only validate on the worker that issued them",
+    "SESSION_STORE_URL": "logouts would only be seen by the worker that handled them",
+    "OTP_STORE_URL": "an OTP could only be verified on the worker that issued it",
+    "RATE_LIMIT_STORE_URL": "each worker would apply the rate limits separately",
+}
+# OTP and rate limit stores fall back to the session store URL
+_FALLBACKS = {"OTP_STORE_URL": "SESSION_STORE_URL", "RATE_LIMIT_STORE_URL": "SESSION_STORE_URL"}
+
+
+def missing_shared_state():
+    """Settings that must be set for several workers to behave like one, with the consequence"""
+    missing = {}
+    for name, consequence in SHARED_STATE_SETTINGS.items():
+        value = os.environ.get(name) or os.environ.get(_FALLBACKS.get(name, ""), "")
+        if not value:
+            missing[name] = consequence
+    return missing
+
+
+class DrainingServer(uvicorn.Server):
+    """uvicorn server that reports not-ready for DRAIN_DELAY_SECONDS before shutting down"""
+
+    def handle_exit(self, sig, frame):
+        if worker_lifecycle.draining or self.should_exit:
+            # Second signal: start the graceful shutdown now (a third forces exit, as in uvicorn)
+            super().handle_exit(sig, frame)
+            return
+        worker_lifecycle.begin_drain(signal.Signals(sig).name)
+        exit_later = super().handle_exit
+        asyncio.get_running_loop().call_later(DRAIN_DELAY_SECONDS, exit_later, sig, frame)
+
+
+def run_worker(config: uvicorn.Config, sockets):
+    """Worker process entry point: serve on the socket bound by the launcher"""
+    config.configure_logging()
+    DrainingServer(config).run(sockets=sockets)
+
+
+class RestartBackoff:
+    """Restart delays for one worker slot: exponential while the worker keeps dying young.
+
+    A worker that exits within MIN_UPTIME_SECONDS of starting counts as an early exit; after
+    MAX_EARLY_EXITS in a row the slot gives up. A worker that ran longer resets the count.
+    """
+
+    MIN_UPTIME_SECONDS = float(os.environ.get("WORKER_MIN_UPTIME_SECONDS", "10"))
+    MAX_EARLY_EXITS = int(os.environ.get("WORKER_MAX_EARLY_EXITS", "5"))
+    MAX_DELAY_SECONDS = 30.0
+
+    def __init__(self):
+        self.early_exits = 0
+
+    def next_delay(self, uptime: float):
+        """Seconds to wait before restarting, or None to give up"""
+        if uptime >= self.MIN_UPTIME_SECONDS:
+            self.early_exits = 0
+            return 0.0
+        self.early_exits += 1
+        if self.early_exits >= self.MAX_EARLY_EXITS:
+            return None
+        return min(self.MAX_DELAY_SECONDS, 2.0 ** (self.early_exits - 1))
+
+
+def supervise(config: uvicorn.Config, workers: int) -> int:
+    """Start the workers on one shared socket, restart any that die, and drain them all on exit.
+
+    Returns 1 when a worker keeps failing right after start (bad config, unusable port), else 0.
+    """
+    # Fresh interpreters, as uvicorn uses: forking would copy the launcher's threads and signal handlers
+    context = multiprocessing.get_context("spawn")
+    sock = config.bind_socket()
+    stop = threading.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda signum, frame: stop.set())
+
+    def spawn():
+        process = context.Process(target=run_worker, kwargs={"config": config, "sockets": [sock]})
+        process.start()
+        return process, time.monotonic()
+
+    slots = [spawn() for _ in range(workers)]
+    backoffs = [RestartBackoff() for _ in range(workers)]
+    restart_at = [None] * workers
+    exit_code = 0
+    while not stop.wait(0.5):
+        now = time.monotonic()
+        for index, (process, started_at) in enumerate(slots):
+            if restart_at[index] is not None:
+                if now >= restart_at[index]:
+                    slots[index], restart_at[index] = spawn(), None
+                continue
+            if process.is_alive():
+                continue
+            delay = backoffs[index].next_delay(now - started_at)
+            if delay is None:
+                print(f"Worker {process.pid} exited with code {process.exitcode} right after starting "
+                      f"{RestartBackoff.MAX_EARLY_EXITS} times in a row; giving up", file=sys.stderr)
+                exit_code = 1
+                stop.set()
+                break
+            print(f"Worker {process.pid} exited with code {process.exitcode}; restarting in {delay:.0f}s",
+                  file=sys.stderr)
+            restart_at[index] = now + delay
+
+    # Signal every worker first so they drain in parallel, then wait for all of them
+    running = [process for (process, _), pending in zip(slots, restart_at) if pending is None]
+    for process in running:
+        process.terminate()
+    for process in running:
+        process.join()
+    sock.close()
+    return exit_code
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=os.environ.get("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", "8001")))
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("WEB_CONCURRENCY", os.cpu_count() or 1)))
+    parser.add_argument("--log-level", default="warning", help="uvicorn's own log level")
+    parser.add_argument("--allow-local-state", action="store_true",
+                        help="start several workers even though some state is still process-local")
+    args = parser.parse_args()
+
+    missing = missing_shared_state()
+    if args.workers > 1 and missing and not args.allow_local_state:
+        for name, consequence in missing.items():
+            print(f"{name} is not set: {consequence}", file=sys.stderr)
+        print("Set these for multi-worker serving, or pass --allow-local-state", file=sys.stderr)
+        return 2
+
+    config = uvicorn.Config(
+        "server:app",
+        app_dir=str(BACKEND_DIR),
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        lifespan="on",
+        proxy_headers=True,
+        forwarded_allow_ips=os.environ.get("FORWARDED_ALLOW_IPS", "127.0.0.1"),
+        log_level=args.log_level,
+        timeout_graceful_shutdown=int(DRAIN_TIMEOUT_SECONDS),
+    )
+    if args.workers == 1:
+        DrainingServer(config).run()
+    else:
+        return supervise(config, args.workers)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,33 +1,155 @@
-from fastapi import FastAPI, APIRouter, HTTPException
+# Imported first so the startup profile can time the imports below (STARTUP_PROFILE_IMPORTS)
+from startup_profile import startup_profile, FirstRequestMiddleware
+from fastapi import FastAPI, APIRouter, HTTPException, Request, Response
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
 import os
+import asyncio
 import logging
 from pathlib import Path
+from contextlib import asynccontextmanager
 from pydantic import BaseModel, Field, ConfigDict
 from typing import List, Optional
 import uuid
 from datetime import datetime, timezone
-from emergentintegrations.llm.chat import LlmChat, UserMessage
 from demo_endpoints import demo_router
+from admin_endpoints import admin_router
+from session_store import session_store
+from demo_auth import DEMO_OTP_STORE, set_student_repository
+from student_repository import CachedStudentRepository, MongoStudentRepository
+from credentials import credential_verifier
+from rate_limit import admit, client_ip, rate_limiter
+from session_tokens import verify_token
+from command_monitor import command_monitor, latency_metric_samples
+from loop_watchdog import loop_watchdog, LoopWatchdogMiddleware
+from lifecycle import worker_lifecycle
+from circuit_breaker import llm_circuit, STATE_VALUES
+from health import HealthChecker
+from tracing import TracingMiddleware, CommandTracer, trace_buffer
+from structured_logging import configure_logging, stop_logging, RequestIdMiddleware
+from metrics import REGISTRY, CONTENT_TYPE, STAGE_DURATION, MetricsMiddleware
+from llm_cassette import llm_cassette, request_key
+from token_accounting import (
+    token_ledger, conversation_pattern, usage_rollups, warm_up_tokenizer, ROLLUP_COLLECTION, SESSION_COLLECTION
+)
+import demo_auth
+from db_pool import pool_monitor, create_mongo_client, warm_up_pool
+from catalog import CATALOG_VERSION
+from chat_pipeline import (
+    ChatContext, run_pipeline, persist_turn, remember_answer,
+    resolve_personal_data, resolve_catalog_answer, resolve_cached_answer
+)
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+# MongoDB connection, created in each worker by the lifespan (pool settings come from MONGO_*
+# environment variables, see db_pool.py). Tests and offline tools assign `db` directly.
+client = None
+db = None
+mongo_student_repository = None
+
+def connect_mongo():
+    """Create this worker's Mongo client and the student repository that reads from it"""
+    global client, db, mongo_student_repository
+    client = create_mongo_client(os.environ['MONGO_URL'], pool_monitor, listeners=[CommandTracer(), command_monitor])
+    # Slow query shapes are explained through the synchronous client behind Motor (MONGO_EXPLAIN_SLOW)
+    command_monitor.explain_client = client.delegate
+    db = client[os.environ['DB_NAME']]
+
+    # Student records: demo fixture by default, RMSS student collection when STUDENT_DATA_SOURCE=mongo
+    if os.environ.get('STUDENT_DATA_SOURCE', 'demo') == 'mongo':
+        mongo_student_repository = MongoStudentRepository(db.students)
+        set_student_repository(CachedStudentRepository(
+            mongo_student_repository,
+            ttl_seconds=int(os.environ.get('STUDENT_CACHE_TTL_SECONDS', '60'))
+        ))
+
+# Gauges read at scrape time from the components that already keep these statistics
+REGISTRY.callback(
+    "rmss_mongo_pool", "MongoDB connection pool usage", labelnames=("stat",),
+    callback=lambda: [((stat,), value) for stat, value in pool_monitor.snapshot().items()]
+)
+REGISTRY.callback(
+    "rmss_mongo_command_latency_ms", "MongoDB command latency percentiles over the recent window",
+    labelnames=("collection", "command", "quantile"), callback=latency_metric_samples
+)
+REGISTRY.callback(
+    "rmss_llm_circuit_state", "LLM provider circuit breaker state (0 closed, 1 half-open, 2 open)",
+    callback=lambda: [((), STATE_VALUES[llm_circuit.state])]
+)
+REGISTRY.callback(
+    "rmss_otp_live", "Unexpired one-time passwords held in this worker's memory (absent with the Redis store)",
+    callback=lambda: [((), count) for count in (DEMO_OTP_STORE.live_count(),) if count is not None]
+)
+REGISTRY.callback(
+    "rmss_student_cache_requests", "Student repository cache lookups", kind="counter", labelnames=("result",),
+    callback=lambda: [
+        (("hit",), getattr(demo_auth.student_repository, "hits", 0)),
+        (("miss",), getattr(demo_auth.student_repository, "misses", 0)),
+    ]
+)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Owns this worker's resources: the Mongo client, LLM client, caches and background flushers"""
+    connect_mongo()
+    await warm_up_db_client()
+    loop_watchdog.start()
+    background_tasks = [
+        asyncio.create_task(DEMO_OTP_STORE.run_sweeper()),
+        asyncio.create_task(token_ledger.run_flusher(db)),
+        asyncio.create_task(warm_up_llm_client()),
+        asyncio.create_task(credential_verifier.warm_up()),
+        asyncio.create_task(warm_up_tokenizer([RMSS_SYSTEM_MESSAGE], LLM_MODEL)),
+    ]
+    worker_lifecycle.mark_started()
+    startup_profile.mark("startup_complete")
+    try:
+        yield
+    finally:
+        # Report not-ready and let in-flight requests finish before releasing anything they use
+        worker_lifecycle.begin_drain("shutdown")
+        await worker_lifecycle.wait_for_requests()
+        for task in background_tasks:
+            task.cancel()
+        await loop_watchdog.stop()
+        try:
+            await token_ledger.flush(db)
+        except Exception as e:
+            logger.warning(f"Final token usage flush failed: {str(e)}")
+        client.close()
+        await session_store.close()
+        await DEMO_OTP_STORE.close()
+        await rate_limiter.close()
+        credential_verifier.shutdown()
+        trace_buffer.close()
+        command_monitor.close()
+        stop_logging()
 
 # Create the main app without a prefix
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
 
 # AI Chat Configuration
 EMERGENT_LLM_KEY = os.environ.get('EMERGENT_LLM_KEY')
+LLM_MODEL = "gpt-4o-mini"
+
+# The LLM integration pulls in every provider SDK, so it is imported on first use or by the
+# background warm-up at startup rather than when the worker starts
+LlmChat = None
+UserMessage = None
+
+def load_llm_client():
+    """Import the LLM integration's classes once"""
+    global LlmChat, UserMessage
+    if LlmChat is None:
+        from emergentintegrations.llm.chat import LlmChat
+    if UserMessage is None:
+        from emergentintegrations.llm.chat import UserMessage
+    return LlmChat, UserMessage
 
 # Define Models
 class StatusCheck(BaseModel):
@@ -496,208 +618,194 @@ AI: "What subject are you interested in?" (forgot context!)
 - Forgetting what subject was being discussed
 """
 
+def build_llm_prompt(ctx: ChatContext, recent_messages):
+    """Assemble the system message and the user prompt with conversation context.
+
+    Also returns the prompt split into named sections, for token accounting.
+    """
+    request = ctx.request
+    
+    # Build complete conversation context manually for better control
+    history_context = ""
+    
+    # Add conversation history with clear context markers
+    if recent_messages:
+        history_context += "**CONVERSATION HISTORY:**\n"
+        for msg in recent_messages:
+            role = "User" if msg["sender"] == "user" else "Assistant"
+            history_context += f"{role}: {msg['message']}\n"
+        history_context += "\n"
+    
+    # Intelligent context analysis - determine what the user is really asking
+    enhanced_prompt = request.message
+    follow_up_context = ""
+    
+    # Check if this message answers the question the assistant asked last turn
+    if ctx.follow_up:
+        course = ctx.follow_up["course"]
+        location = ctx.follow_up["location"]
+        correct_price = ctx.follow_up["price"]
+        enhanced_prompt = f"The user asked about {course} and specified {location} location. Provide ONLY {course} information for {location}. The correct price is {correct_price}. Include schedule, tutors, and other details for {course} at {location}."
+        follow_up_context += f"**PRICING CRITICAL**: {course} costs exactly {correct_price} - use this exact price, not any other level's pricing.\n"
+        follow_up_context += f"**CONTEXT**: User wants {course} details for {location} location specifically.\n\n"
+    
+    # Create the complete prompt with context
+    request_text = "USER'S CURRENT REQUEST: " + enhanced_prompt + "\n\nProvide helpful RMSS information based on the conversation context above."
+    full_prompt = history_context + follow_up_context + request_text
+    
+    # Enhanced system message with student context if authenticated
+    student_context = ""
+    if ctx.student_data:
+        student_data = ctx.student_data
+        student_context = f"\n\n**AUTHENTICATED STUDENT**: {student_data['full_name']} (ID: {student_data['student_id']})\n"
+    enhanced_system_message = RMSS_SYSTEM_MESSAGE + student_context
+    
+    sections = {
+        "system": RMSS_SYSTEM_MESSAGE,
+        "student_context": student_context,
+        "history": history_context,
+        "follow_up": follow_up_context,
+        "request": request_text,
+    }
+    return enhanced_system_message, full_prompt, sections
+
+def clean_llm_response(ai_response: str) -> str:
+    """Light cleaning - only remove excessive whitespace, keep intentional line breaks"""
+    cleaned_response = ai_response.strip()
+    # Remove only literal \n strings that shouldn't be there, not actual line breaks
+    return cleaned_response.replace('\\n', '\n').replace('\\r', '')
+
+async def resolve_llm_answer(ctx: ChatContext) -> str:
+    """Full LLM answer with conversation history - the most expensive stage, runs last"""
+    # LLM answers are charged extra against the same buckets - reject before doing any work
+    await admit("chat_llm", ctx.identities)
+    await ctx.load_state()
+    
+    # Retrieve conversation history for context
+    with ctx.timed("history_read"):
+        recent_messages = await db.chat_messages.find(
+            {"session_id": ctx.session_id}
+        ).sort("timestamp", 1).limit(20).to_list(length=20)  # Get chronological order
+    
+    with ctx.timed("prompt_assembly"):
+        enhanced_system_message, full_prompt, prompt_sections = build_llm_prompt(ctx, recent_messages)
+    
+    async def call_llm():
+        # Fail fast while the provider is failing rather than making every request wait on it
+        if not llm_circuit.allow():
+            raise HTTPException(status_code=503, detail="The AI assistant is temporarily unavailable, please try again shortly")
+        try:
+            LlmChat, UserMessage = load_llm_client()
+            # Use LlmChat with a single comprehensive prompt
+            chat = LlmChat(
+                api_key=EMERGENT_LLM_KEY,
+                session_id=ctx.session_id + "_context",  # Use unique session to avoid confusion
+                system_message=enhanced_system_message
+            ).with_model("openai", LLM_MODEL)
+            # Send the complete context as the user message
+            response = await chat.send_message(UserMessage(text=full_prompt))
+        except Exception as e:
+            llm_circuit.record_failure(e)
+            raise
+        except BaseException:
+            # Cancelled (client gone, shutdown): says nothing about the provider, but frees a half-open trial
+            llm_circuit.release_trial()
+            raise
+        llm_circuit.record_success()
+        return response
+    
+    # With a cassette configured the answer may be recorded or replayed instead of fetched live
+    with ctx.timed("llm_call"):
+        ai_response = await llm_cassette.complete(
+            call_llm, LLM_MODEL, enhanced_system_message, full_prompt,
+            turn_key=request_key(LLM_MODEL, ctx.request.message, len(recent_messages), ctx.follow_up),
+        )
+    
+    # The integration does not report usage, so tokens are counted locally
+    token_ledger.record(
+        ctx.session_id, prompt_sections, ai_response,
+        route="chat",
+        user_type=ctx.request.user_type,
+        catalog_version=CATALOG_VERSION,
+        pattern=conversation_pattern(ctx, len(recent_messages)),
+        model=LLM_MODEL,
+    )
+    
+    cleaned_response = clean_llm_response(ai_response)
+    
+    # Payload logs are sampled per request and truncated by the log formatter
+    logger.debug("LLM response", extra={"session_id": ctx.session_id, "raw_response": ai_response})
+    return cleaned_response
+
+# Cheapest resolvers first; the first stage that answers ends the pipeline
+CHAT_PIPELINE = [
+    ("personal_data", resolve_personal_data),
+    ("catalog", resolve_catalog_answer),
+    ("cache", resolve_cached_answer),
+    ("llm", resolve_llm_answer),
+]
+
 # Chat API endpoints
 @api_router.post("/chat", response_model=ChatResponse)
-async def chat_with_ai(request: ChatRequest):
+async def chat_with_ai(request: ChatRequest, http_request: Request):
     try:
         # Generate session ID if not provided
         session_id = request.session_id or str(uuid.uuid4())
         
-        # Retrieve conversation history for context
-        recent_messages = await db.chat_messages.find(
-            {"session_id": session_id}
-        ).sort("timestamp", 1).limit(20).to_list(length=20)  # Get chronological order
-        
-        # Build complete conversation context manually for better control
-        conversation_context = ""
-        
-        # Add conversation history with clear context markers
-        if recent_messages:
-            conversation_context += "**CONVERSATION HISTORY:**\n"
-            for msg in recent_messages:
-                role = "User" if msg["sender"] == "user" else "Assistant"
-                conversation_context += f"{role}: {msg['message']}\n"
-            conversation_context += "\n"
-        
-        # Intelligent context analysis - determine what the user is really asking
-        enhanced_prompt = request.message
-        
-        # Check if this is a location answer to a subject question
-        if recent_messages:
-            last_message = recent_messages[-1] if recent_messages else None
-            if last_message and last_message["sender"] == "assistant":
-                last_ai_response = last_message["message"].lower()
-                
-                # Location patterns
-                locations = ["marine parade", "punggol", "bishan", "jurong", "kovan"]
-                user_location = None
-                
-                for loc in locations:
-                    if loc in request.message.lower():
-                        user_location = loc.title()
-                        break
-                
-                # If AI asked about location and user provided location
-                if user_location and "location" in last_ai_response:
-                    # Find what subject was being discussed
-                    math_patterns = [
-                        "j1 math", "j2 math", "p2 math", "p3 math", "p4 math", "p5 math", "p6 math",
-                        "s1 math", "s2 math", "s3 math", "s4 math", "s3 emath", "s3 amath", "s4 emath", "s4 amath"
-                    ]
-                    
-                    subject_found = ""
-                    for pattern in math_patterns:
-                        if pattern in last_ai_response:
-                            if pattern == "j1 math": subject_found = "J1 Math"
-                            elif pattern == "j2 math": subject_found = "J2 Math"
-                            elif pattern == "p2 math": subject_found = "P2 Math"
-                            elif pattern == "p3 math": subject_found = "P3 Math"
-                            elif pattern == "p4 math": subject_found = "P4 Math"
-                            elif pattern == "p5 math": subject_found = "P5 Math"
-                            elif pattern == "p6 math": subject_found = "P6 Math"
-                            elif pattern == "s1 math": subject_found = "S1 Math"
-                            elif pattern == "s2 math": subject_found = "S2 Math"
-                            elif pattern == "s3 math": subject_found = "S3 Math"
-                            elif pattern == "s4 math": subject_found = "S4 Math"
-                            elif pattern == "s3 emath": subject_found = "S3 EMath"
-                            elif pattern == "s3 amath": subject_found = "S3 AMath"
-                            elif pattern == "s4 emath": subject_found = "S4 EMath"
-                            elif pattern == "s4 amath": subject_found = "S4 AMath"
-                            break
-                    
-                    if subject_found:
-                        # Create very explicit instructions for pricing accuracy
-                        pricing_map = {
-                            "J1 Math": "$401.12", "J2 Math": "$444.72",
-                            "P2 Math": "$261.60", "P3 Math": "$277.95", "P4 Math": "$332.45", 
-                            "P5 Math": "$346.62", "P6 Math": "$357.52",
-                            "S1 Math": "$370.60", "S2 Math": "$381.50", 
-                            "S3 EMath": "$343.35", "S3 AMath": "$397.85",
-                            "S4 EMath": "$408.75", "S4 AMath": "$408.75"
-                        }
-                        
-                        correct_price = pricing_map.get(subject_found, "Contact for pricing")
-                        
-                        enhanced_prompt = f"The user asked about {subject_found} and specified {user_location} location. Provide ONLY {subject_found} information for {user_location}. The correct price is {correct_price}. Include schedule, tutors, and other details for {subject_found} at {user_location}."
-                        conversation_context += f"**PRICING CRITICAL**: {subject_found} costs exactly {correct_price} - use this exact price, not any other level's pricing.\n"
-                        conversation_context += f"**CONTEXT**: User wants {subject_found} details for {user_location} location specifically.\n\n"
-        
-        # Create the complete prompt with context
-        full_prompt = conversation_context + "USER'S CURRENT REQUEST: " + enhanced_prompt + "\n\nProvide helpful RMSS information based on the conversation context above."
-        
-        # Check for authenticated student data requests
-        student_context = ""
-        if request.auth_token:
-            # Import demo auth for checking authenticated requests
-            from demo_endpoints import DEMO_SESSIONS
-            
-            session = DEMO_SESSIONS.get(request.auth_token)
-            if session and datetime.now() <= session["expires"]:
-                student_data = session["student_data"]
-                student_context = f"\n\n**AUTHENTICATED STUDENT**: {student_data['full_name']} (ID: {student_data['student_id']})\n"
-                
-                # Check if message is asking for personal information
-                message_lower = request.message.lower()
-                personal_queries = [
-                    "my fees", "outstanding", "balance", "payment", "my schedule", 
-                    "my classes", "my subjects", "my profile", "my information"
-                ]
-                
-                if any(query in message_lower for query in personal_queries):
-                    from demo_auth import DemoAuthService
-                    
-                    if "fees" in message_lower or "outstanding" in message_lower or "balance" in message_lower or "payment" in message_lower:
-                        return {
-                            "response": DemoAuthService.format_fees_info(student_data),
-                            "session_id": session_id,
-                            "message_id": str(uuid.uuid4())
-                        }
-                    elif "schedule" in message_lower or "classes" in message_lower:
-                        return {
-                            "response": DemoAuthService.format_schedule_info(student_data),
-                            "session_id": session_id, 
-                            "message_id": str(uuid.uuid4())
-                        }
-                    elif "profile" in message_lower or "information" in message_lower:
-                        return {
-                            "response": DemoAuthService.format_profile_info(student_data),
-                            "session_id": session_id,
-                            "message_id": str(uuid.uuid4())
-                        }
-        
-        # Enhanced system message with student context if authenticated
-        enhanced_system_message = RMSS_SYSTEM_MESSAGE + student_context
-        
-        # Use LlmChat with a single comprehensive prompt
-        chat = LlmChat(
-            api_key=EMERGENT_LLM_KEY,
-            session_id=session_id + "_context",  # Use unique session to avoid confusion
-            system_message=enhanced_system_message
-        ).with_model("openai", "gpt-4o-mini")
-        
-        # Send the complete context as the user message
-        ai_response = await chat.send_message(UserMessage(text=full_prompt))
-        
-        # Store user message in database
-        user_msg_dict = {
-            "id": str(uuid.uuid4()),
-            "session_id": session_id,
-            "message": request.message,
-            "sender": "user",
-            "timestamp": datetime.now(timezone.utc).isoformat(),
-            "user_type": request.user_type
+        # Admission control by session, client IP and (signed token) student ID
+        claims = verify_token(request.auth_token) if request.auth_token else None
+        identities = {
+            "session": session_id,
+            "ip": client_ip(http_request),
+            "student": claims["sid"] if claims else None
         }
-        await db.chat_messages.insert_one(user_msg_dict)
+        await admit("chat", identities)
         
-        # Store AI response in database - preserve line breaks for proper formatting
-        logging.info(f"Raw AI response: {repr(ai_response)}")
+        ctx = ChatContext(request, session_id, db)
+        ctx.identities = identities
+        response = await run_pipeline(ctx, CHAT_PIPELINE)
         
-        # Light cleaning - only remove excessive whitespace, keep intentional line breaks
-        cleaned_response = ai_response.strip()
-        # Remove only literal \n strings that shouldn't be there, not actual line breaks
-        cleaned_response = cleaned_response.replace('\\n', '\n').replace('\\r', '')
+        # Store both messages and the updated session state - preserve line breaks for proper formatting
+        message_id = str(uuid.uuid4())
+        if ctx.persist:
+            message_id = await persist_turn(ctx, response)
+            remember_answer(ctx, response)
         
-        logging.info(f"Cleaned response: {repr(cleaned_response)}")
-        ai_msg_id = str(uuid.uuid4())
-        ai_msg_dict = {
-            "id": ai_msg_id,
+        logger.info("Chat answered", extra={
             "session_id": session_id,
-            "message": cleaned_response,
-            "sender": "assistant",
-            "timestamp": datetime.now(timezone.utc).isoformat()
-        }
-        await db.chat_messages.insert_one(ai_msg_dict)
-        
-        chat_response = ChatResponse(
-            response=cleaned_response,
-            session_id=session_id,
-            message_id=ai_msg_id
-        )
-        logging.info(f"ChatResponse object: {repr(chat_response.response)}")
+            "stage": ctx.answered_by,
+            "response_chars": len(response),
+            "timings": ctx.timings,
+        })
+        logger.debug("Chat payload", extra={"user_message": request.message, "response": response})
         
         # Return the response with proper formatting preserved
         return {
-            "response": cleaned_response,
+            "response": response,
             "session_id": session_id,
-            "message_id": ai_msg_id
+            "message_id": message_id
         }
+    except HTTPException:
+        raise
     except Exception as e:
-        logging.error(f"Chat error: {str(e)}")
+        logger.exception(f"Chat error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Chat service error: {str(e)}")
 
 @api_router.get("/chat/history/{session_id}", response_model=List[ChatMessage])
 async def get_chat_history(session_id: str):
     """Get chat history for a session"""
     try:
-        messages = await db.chat_messages.find(
-            {"session_id": session_id}, 
-            {"_id": 0}
-        ).sort("timestamp", 1).to_list(100)
+        with STAGE_DURATION.labels("chat_history", "query").time():
+            messages = await db.chat_messages.find(
+                {"session_id": session_id}, 
+                {"_id": 0}
+            ).sort("timestamp", 1).to_list(100)
         
         # Convert ISO string timestamps back to datetime objects
-        for msg in messages:
-            if isinstance(msg['timestamp'], str):
-                msg['timestamp'] = datetime.fromisoformat(msg['timestamp'])
+        with STAGE_DURATION.labels("chat_history", "parse").time():
+            for msg in messages:
+                if isinstance(msg['timestamp'], str):
+                    msg['timestamp'] = datetime.fromisoformat(msg['timestamp'])
         
         return messages
     except Exception as e:
@@ -733,9 +841,50 @@ async def get_status_checks():
     
     return status_checks
 
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """Prometheus text exposition of request, stage, cache and pool metrics"""
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+# Liveness and cached readiness for load balancers and orchestrators (see health.py)
+health_checker = HealthChecker(get_db=lambda: db)
+
+@app.get("/healthz", include_in_schema=False)
+async def healthz():
+    """Liveness: the worker is up and its event loop is serving"""
+    return health_checker.liveness()
+
+@app.get("/readyz", include_in_schema=False)
+async def readyz(response: Response):
+    """Readiness: 503 while starting, draining, or when Mongo, the catalog or the request queue is unhealthy"""
+    ready, report = await health_checker.readiness()
+    if not ready:
+        response.status_code = 503
+    return report
+
+# Usage reads are admin-only and served from the last flush (token_ledger flushes every 30 seconds)
+@admin_router.get("/usage/rollups")
+async def get_usage_rollups(hours: int = 24, group_by: str = "pattern"):
+    """LLM token and cost totals grouped by route, user_type, catalog_version, pattern, model or hour"""
+    try:
+        return await usage_rollups(db, hours=hours, group_by=group_by)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@admin_router.get("/usage/sessions/{session_id}")
+async def get_session_usage(session_id: str):
+    """LLM token and cost totals for one chat session"""
+    usage = await db[SESSION_COLLECTION].find_one({"session_id": session_id}, {"_id": 0})
+    if not usage:
+        raise HTTPException(status_code=404, detail="No LLM usage recorded for this session")
+    return usage
+
 # Include demo endpoints
 app.include_router(demo_router)
 
+# Include admin (diagnostics) endpoints
+app.include_router(admin_router)
+
 # Include the router in the main app
 app.include_router(api_router)
 
@@ -746,14 +895,34 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(TracingMiddleware)
+app.add_middleware(LoopWatchdogMiddleware)
+app.add_middleware(RequestIdMiddleware)
+app.add_middleware(FirstRequestMiddleware)
+
+# Configure logging: JSON lines written off the event loop (LOG_LEVEL, LOG_FORMAT, see structured_logging.py)
+configure_logging()
 logger = logging.getLogger(__name__)
+startup_profile.mark("app_imported")
+
+async def warm_up_db_client():
+    """Open pooled connections and create indexes before the first request"""
+    try:
+        await warm_up_pool(client)
+        await db.chat_sessions.create_index("session_id", unique=True)
+        await db[SESSION_COLLECTION].create_index("session_id", unique=True)
+        await db[ROLLUP_COLLECTION].create_index("hour")
+        if mongo_student_repository:
+            await mongo_student_repository.ensure_indexes()
+    except Exception as e:
+        # Fall back to lazy connections rather than refusing to serve
+        logger.warning(f"MongoDB pool warm-up failed: {str(e)}")
 
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    client.close()
\ No newline at end of file
+async def warm_up_llm_client():
+    """Import the LLM integration off the event loop so the first chat does not pay for it"""
+    try:
+        await asyncio.to_thread(load_llm_client)
+        startup_profile.mark("llm_client_loaded")
+    except Exception as e:
+        logger.warning(f"LLM client warm-up failed: {str(e)}")
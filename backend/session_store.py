@@ -0,0 +1,113 @@
+# Session storage for authenticated demo/student sessions
+# The in-memory store evicts expired sessions in expiry order and is capped at SESSION_STORE_MAX_ENTRIES;
+# the Redis store keeps sessions visible to every uvicorn worker. Set SESSION_STORE_URL=redis://host:6379/0
+# to use Redis.
+
+import os
+import json
+import time
+import heapq
+import logging
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class SessionStore:
+    """Interface for session storage with per-entry expiry"""
+
+    async def get(self, key: str) -> Optional[dict]:
+        raise NotImplementedError
+
+    async def set(self, key: str, value: dict, ttl_seconds: int):
+        raise NotImplementedError
+
+    async def delete(self, key: str):
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+
+class InMemorySessionStore(SessionStore):
+    """Process-local store; expired entries are evicted from a min-heap ordered by expiry.
+
+    When full, setting a new key evicts the entry closest to expiry.
+    """
+
+    def __init__(self, max_entries: int = 100_000, clock=time.monotonic):
+        self.max_entries = max_entries
+        self._clock = clock
+        self._entries = {}  # key -> (expires_at, value)
+        self._expiry_heap = []  # (expires_at, key), may hold stale entries for overwritten keys
+
+    def _pop_soonest(self, until: float = None):
+        """Drop live entries in expiry order (all that expire by `until`, or just the first one)"""
+        while self._expiry_heap and (until is None or self._expiry_heap[0][0] <= until):
+            expires_at, key = heapq.heappop(self._expiry_heap)
+            entry = self._entries.get(key)
+            # Only drop the entry if it wasn't re-set with a later expiry
+            if entry is not None and entry[0] == expires_at:
+                del self._entries[key]
+                if until is None:
+                    return
+
+    def _evict_expired(self):
+        self._pop_soonest(until=self._clock())
+
+    async def get(self, key: str) -> Optional[dict]:
+        self._evict_expired()
+        entry = self._entries.get(key)
+        return entry[1] if entry else None
+
+    async def set(self, key: str, value: dict, ttl_seconds: int):
+        self._evict_expired()
+        if key not in self._entries and len(self._entries) >= self.max_entries:
+            self._pop_soonest()
+        expires_at = self._clock() + ttl_seconds
+        self._entries[key] = (expires_at, value)
+        heapq.heappush(self._expiry_heap, (expires_at, key))
+
+    async def delete(self, key: str):
+        self._entries.pop(key, None)
+
+    def __len__(self):
+        self._evict_expired()
+        return len(self._entries)
+
+
+class RedisSessionStore(SessionStore):
+    """Store backed by any Redis-protocol server; expiry is handled server-side with EX"""
+
+    def __init__(self, url: str, prefix: str = "rmss:session:", client=None):
+        if client is None:
+            import redis.asyncio as redis
+            client = redis.from_url(url, decode_responses=True)
+        self._client = client
+        self._prefix = prefix
+
+    async def get(self, key: str) -> Optional[dict]:
+        raw = await self._client.get(self._prefix + key)
+        return json.loads(raw) if raw else None
+
+    async def set(self, key: str, value: dict, ttl_seconds: int):
+        await self._client.set(self._prefix + key, json.dumps(value, default=str), ex=ttl_seconds)
+
+    async def delete(self, key: str):
+        await self._client.delete(self._prefix + key)
+
+    async def close(self):
+        await self._client.aclose()
+
+
+def create_session_store(url: Optional[str] = None) -> SessionStore:
+    """Pick the session store from SESSION_STORE_URL (in-memory when unset)"""
+    url = url if url is not None else os.environ.get("SESSION_STORE_URL", "")
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        logger.info("Using Redis session store")
+        return RedisSessionStore(url)
+    return InMemorySessionStore(max_entries=int(os.environ.get("SESSION_STORE_MAX_ENTRIES", "100000")))
+
+
+# Shared by the demo endpoints and the chat handler
+session_store = create_session_store()
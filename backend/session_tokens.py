@@ -0,0 +1,104 @@
+# Stateless signed session tokens
+# Tokens carry the student id, expiry and scope and are signed with HMAC-SHA256, so any worker can
+# validate them locally without a shared session lookup. Set SESSION_TOKEN_SECRET to the same value
+# on every worker. Revocation (logout) is optional and uses the shared session store.
+
+import os
+import json
+import time
+import hmac
+import uuid
+import base64
+import hashlib
+import logging
+from typing import Optional
+
+from session_store import session_store
+
+logger = logging.getLogger(__name__)
+
+TOKEN_VERSION = "rmss1"
+SESSION_TTL_SECONDS = 30 * 60
+
+_secret = os.environ.get("SESSION_TOKEN_SECRET")
+if not _secret:
+    logger.warning("SESSION_TOKEN_SECRET is not set - using a per-process secret, tokens will not survive restarts or work across workers")
+    _secret = uuid.uuid4().hex + uuid.uuid4().hex
+SESSION_TOKEN_SECRET = _secret.encode()
+
+REVOCATION_ENABLED = os.environ.get("SESSION_REVOCATION_ENABLED", "false").lower() in ("1", "true", "yes")
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def _sign(signing_input: str) -> str:
+    return _b64encode(hmac.new(SESSION_TOKEN_SECRET, signing_input.encode(), hashlib.sha256).digest())
+
+
+def issue_token(student_id: str, scope: str = "student", ttl_seconds: int = SESSION_TTL_SECONDS):
+    """Create a signed token; returns (token, claims)"""
+    now = int(time.time())
+    claims = {
+        "sid": student_id,
+        "scope": scope,
+        "iat": now,
+        "exp": now + ttl_seconds,
+        "jti": uuid.uuid4().hex[:16],
+    }
+    payload = _b64encode(json.dumps(claims, separators=(",", ":")).encode())
+    signing_input = f"{TOKEN_VERSION}.{payload}"
+    return f"{signing_input}.{_sign(signing_input)}", claims
+
+
+def verify_token(token: str, scope: str = "student") -> Optional[dict]:
+    """Check signature, expiry and scope locally; returns the claims or None"""
+    try:
+        version, payload, signature = token.split(".")
+    except (AttributeError, ValueError):
+        return None
+    if version != TOKEN_VERSION:
+        return None
+    if not hmac.compare_digest(signature, _sign(f"{version}.{payload}")):
+        return None
+
+    try:
+        claims = json.loads(_b64decode(payload))
+    except ValueError:
+        return None
+
+    if claims.get("exp", 0) <= time.time():
+        return None
+    if scope and claims.get("scope") != scope:
+        return None
+    return claims
+
+
+async def revoke_token(claims: dict) -> bool:
+    """Add the token to the revocation list until it would have expired anyway.
+
+    Returns False when revocation is disabled: nothing would read the entry, so the token stays valid.
+    """
+    if not REVOCATION_ENABLED:
+        return False
+    remaining = int(claims["exp"] - time.time())
+    if remaining > 0:
+        await session_store.set(f"revoked:{claims['jti']}", {"sid": claims["sid"]}, remaining)
+    return True
+
+
+async def authenticate(token: Optional[str], scope: str = "student") -> Optional[dict]:
+    """Validate a session token, consulting the revocation list when it is enabled"""
+    if not token:
+        return None
+    claims = verify_token(token, scope)
+    if claims is None:
+        return None
+    if REVOCATION_ENABLED and await session_store.get(f"revoked:{claims['jti']}"):
+        return None
+    return claims
@@ -0,0 +1,168 @@
+# Worker startup profile for the RMSS chatbot backend
+# Imported first by server.py. Records when the process started, named startup milestones, when the
+# first request was served and peak RSS; with STARTUP_PROFILE_IMPORTS=true it also times every
+# module import (self and cumulative, like `python -X importtime`). The report is logged once after
+# the first request and served at /api/admin/startup.
+
+import os
+import sys
+import time
+import logging
+import resource
+import threading
+import importlib.abc
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+PROFILE_IMPORTS = os.environ.get("STARTUP_PROFILE_IMPORTS", "false").lower() in ("1", "true", "yes")
+
+
+def _process_start() -> float:
+    """Wall-clock time the process started, from /proc where available"""
+    try:
+        with open("/proc/self/stat") as stat:
+            fields = stat.read().rsplit(")", 1)[1].split()
+        with open("/proc/uptime") as uptime:
+            uptime_seconds = float(uptime.read().split()[0])
+        # starttime (field 22) is in clock ticks since boot
+        return time.time() - uptime_seconds + int(fields[19]) / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return time.time()
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class _TimedLoader:
+    """Delegates to the real loader, timing exec_module; the real loader is restored afterwards"""
+
+    def __init__(self, loader, profile):
+        self._loader = loader
+        self._profile = profile
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        name = module.__name__
+        self._profile._enter_import()
+        start = time.perf_counter()
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._profile._exit_import(name, time.perf_counter() - start)
+            module.__loader__ = self._loader
+            if getattr(module, "__spec__", None) is not None:
+                module.__spec__.loader = self._loader
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+
+class _ImportTimer(importlib.abc.MetaPathFinder):
+    def __init__(self, profile):
+        self._profile = profile
+
+    def find_spec(self, fullname, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                    spec.loader = _TimedLoader(spec.loader, self._profile)
+                return spec
+        return None
+
+
+class StartupProfile:
+    """Startup milestones, per-module import times and the first request, relative to process start"""
+
+    def __init__(self, profile_imports: bool = PROFILE_IMPORTS):
+        self.process_start = _process_start()
+        self.marks = {}  # milestone -> ms since process start
+        self.first_request = None
+        self.imports = {}  # module -> (self ms, cumulative ms)
+        self._stacks = threading.local()  # child import time of each import in progress, per thread
+        self._lock = threading.Lock()
+        self._timer = None
+        self.mark("profile_loaded")
+        if profile_imports:
+            self._timer = _ImportTimer(self)
+            sys.meta_path.insert(0, self._timer)
+
+    def since_start_ms(self) -> float:
+        return round((time.time() - self.process_start) * 1000, 1)
+
+    def mark(self, name: str):
+        self.marks[name] = self.since_start_ms()
+
+    def _enter_import(self):
+        stack = getattr(self._stacks, "stack", None)
+        if stack is None:
+            stack = self._stacks.stack = []
+        stack.append(0.0)
+
+    def _exit_import(self, name: str, elapsed: float):
+        stack = self._stacks.stack
+        children = stack.pop()
+        if stack:
+            stack[-1] += elapsed
+        with self._lock:
+            self.imports[name] = (round((elapsed - children) * 1000, 2), round(elapsed * 1000, 2))
+
+    def first_request_served(self, path: str, duration: float):
+        if self.first_request is not None:
+            return
+        self.first_request = {"path": path, "duration_ms": round(duration * 1000, 1)}
+        self.mark("first_request")
+        report = self.report(top=10)
+        logger.info("Startup profile", extra={
+            "milestones_ms": report["milestones_ms"],
+            "first_request": report["first_request"],
+            "peak_rss_mb": report["peak_rss_mb"],
+            "slowest_imports": report["slowest_imports"],
+        })
+
+    def report(self, top: int = 25):
+        with self._lock:
+            imports = dict(self.imports)
+        slowest = sorted(imports.items(), key=lambda item: item[1][0], reverse=True)[:top]
+        return {
+            "process_start": datetime.fromtimestamp(self.process_start, timezone.utc).isoformat(),
+            "milestones_ms": dict(self.marks),
+            "time_to_first_request_ms": self.marks.get("first_request"),
+            "first_request": self.first_request,
+            "peak_rss_mb": round(peak_rss_mb(), 1),
+            "modules_loaded": len(sys.modules),
+            "imports_profiled": self._timer is not None,
+            "slowest_imports": [
+                {"module": name, "self_ms": self_ms, "cumulative_ms": cumulative_ms}
+                for name, (self_ms, cumulative_ms) in slowest
+            ],
+        }
+
+
+startup_profile = StartupProfile()
+
+
+class FirstRequestMiddleware:
+    """ASGI middleware recording when the worker finished serving its first request"""
+
+    def __init__(self, app, profile: StartupProfile = startup_profile):
+        self.app = app
+        self.profile = profile
+
+    async def __call__(self, scope, receive, send):
+        if self.profile.first_request is not None or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.profile.first_request_served(scope["path"], time.perf_counter() - start)
@@ -0,0 +1,195 @@
+# Structured, non-blocking logging for the RMSS chatbot backend
+# Handlers on the event loop only enqueue records; a QueueListener thread does the JSON formatting
+# and the stream writes. Every record carries the request id of the HTTP request that produced it,
+# long fields are truncated, and debug payload logs are sampled per request.
+
+import os
+import sys
+import json
+import uuid
+import queue
+import zlib
+import logging
+import logging.handlers
+from contextvars import ContextVar
+from datetime import datetime, timezone
+
+request_id_var: ContextVar[str] = ContextVar("request_id", default="-")
+
+REQUEST_ID_HEADER = "x-request-id"
+
+# LogRecord attributes that are not user-supplied extra fields
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "request_id"}
+
+
+def truncate(value, limit: int):
+    """Shorten long strings, keeping the head and noting how much was cut"""
+    if not isinstance(value, str):
+        return value
+    if len(value) <= limit:
+        return value
+    return f"{value[:limit]}...[{len(value) - limit} more chars]"
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; extra={...} fields are included and truncated"""
+
+    def __init__(self, max_field_length: int = 512):
+        super().__init__()
+        self.max_field_length = max_field_length
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", "-"),
+            "msg": truncate(record.getMessage(), self.max_field_length),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                if not isinstance(value, (int, float, bool, type(None), dict, list)):
+                    value = truncate(str(value), self.max_field_length)
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = truncate(self.formatException(record.exc_info), self.max_field_length * 8)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Human-readable format for local development, with the request id and truncation"""
+
+    def __init__(self, max_field_length: int = 512):
+        super().__init__("%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s")
+        self.max_field_length = max_field_length
+
+    def formatMessage(self, record):
+        record.message = truncate(record.message, self.max_field_length)
+        return super().formatMessage(record)
+
+
+class DebugSampler(logging.Filter):
+    """Keeps all records at INFO and above, and DEBUG records for a sample of requests.
+
+    The decision is made per request id, so a sampled request keeps all of its debug logs.
+    """
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.threshold = int(max(0.0, min(1.0, rate)) * 0xFFFFFFFF)
+
+    def filter(self, record):
+        if record.levelno > logging.DEBUG:
+            return True
+        return zlib.crc32(getattr(record, "request_id", "-").encode()) <= self.threshold
+
+
+class RequestQueueHandler(logging.handlers.QueueHandler):
+    """Stamps the request id and enqueues the record as-is; formatting happens on the listener thread"""
+
+    def __init__(self, log_queue, sample_rate: float = 1.0):
+        super().__init__(log_queue)
+        self.sampler = DebugSampler(sample_rate)
+        self.dropped = 0
+
+    def handle(self, record):
+        # The context variable is only visible here, on the thread or task that logged
+        record.request_id = request_id_var.get()
+        if not self.sampler.filter(record):
+            return False
+        return super().handle(record)
+
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            # Never block the event loop on a slow log sink
+            self.dropped += 1
+
+
+_listener = None
+_queue_handler = None
+_previous_root = None  # (handlers, level) of the root logger before configure_logging
+
+
+def configure_logging():
+    """Route all logging through a bounded queue to a background writer, configured from LOG_* env vars"""
+    global _listener, _queue_handler, _previous_root
+    if _listener is not None:
+        return _listener
+
+    level = os.environ.get("LOG_LEVEL", "INFO").upper()
+    max_field_length = int(os.environ.get("LOG_MAX_FIELD_LENGTH", "512"))
+    if os.environ.get("LOG_FORMAT", "json").lower() == "text":
+        formatter = TextFormatter(max_field_length)
+    else:
+        formatter = JsonFormatter(max_field_length)
+
+    stream_handler = logging.StreamHandler(sys.stderr)
+    stream_handler.setFormatter(formatter)
+
+    log_queue = queue.Queue(maxsize=int(os.environ.get("LOG_QUEUE_SIZE", "10000")))
+    queue_handler = RequestQueueHandler(log_queue, float(os.environ.get("LOG_DEBUG_SAMPLE_RATE", "0.01")))
+
+    root = logging.getLogger()
+    _previous_root = (list(root.handlers), root.level)
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+    _queue_handler = queue_handler
+
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def stop_logging():
+    """Flush queued records, stop the writer thread and give the root logger its handlers back.
+
+    Records logged afterwards would otherwise go into a queue that nothing drains.
+    """
+    global _listener, _queue_handler, _previous_root
+    if _listener is None:
+        return
+    root = logging.getLogger()
+    root.removeHandler(_queue_handler)
+    handlers, level = _previous_root
+    for handler in handlers:
+        root.addHandler(handler)
+    root.setLevel(level)
+    _listener.stop()
+    _listener = _queue_handler = _previous_root = None
+
+
+class RequestIdMiddleware:
+    """ASGI middleware binding an X-Request-ID (incoming or generated) to the request's logs and response"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope.get("headers", []):
+            if name == REQUEST_ID_HEADER.encode():
+                request_id = value.decode("latin-1")[:64]
+                break
+        request_id = request_id or uuid.uuid4().hex
+        token = request_id_var.set(request_id)
+
+        async def send_with_request_id(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [(REQUEST_ID_HEADER.encode(), request_id.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            request_id_var.reset(token)
@@ -0,0 +1,75 @@
+# Student data access for the RMSS authentication flows
+# StudentRepository is the async interface used by DemoAuthService. The Mongo implementation is the
+# production path (indexed on student_id); the fixture implementation serves DEMO_STUDENTS.
+# CachedStudentRepository wraps either one with an in-process read-through TTL cache. There is no
+# lookup by phone: siblings may share a parent's number, so callers look up by id and compare it.
+
+import time
+import logging
+from typing import Optional
+
+from cachetools import TTLCache
+
+logger = logging.getLogger(__name__)
+
+
+class StudentRepository:
+    """Async lookups of student records by id"""
+
+    async def get_by_id(self, student_id: str) -> Optional[dict]:
+        raise NotImplementedError
+
+    async def invalidate(self, student_id: str):
+        """Drop any cached copy of the student after their record changes"""
+        pass
+
+
+class FixtureStudentRepository(StudentRepository):
+    """In-memory records, e.g. the DEMO_STUDENTS demo data"""
+
+    def __init__(self, students: dict):
+        self._by_id = {student_id.upper(): student for student_id, student in students.items()}
+
+    async def get_by_id(self, student_id: str) -> Optional[dict]:
+        return self._by_id.get(student_id.upper())
+
+
+class MongoStudentRepository(StudentRepository):
+    """RMSS student records stored in a MongoDB collection"""
+
+    def __init__(self, collection):
+        self._collection = collection
+
+    async def ensure_indexes(self):
+        await self._collection.create_index("student_id", unique=True)
+
+    async def get_by_id(self, student_id: str) -> Optional[dict]:
+        return await self._collection.find_one({"student_id": student_id.upper()}, {"_id": 0})
+
+
+class CachedStudentRepository(StudentRepository):
+    """Read-through TTL cache in front of another repository"""
+
+    def __init__(self, backend: StudentRepository, ttl_seconds: float = 60, max_entries: int = 10000,
+                 clock=time.monotonic):
+        self.backend = backend
+        self._by_id = TTLCache(max_entries, ttl_seconds, timer=clock)
+        self.hits = 0
+        self.misses = 0
+
+    async def get_by_id(self, student_id: str) -> Optional[dict]:
+        student_id = student_id.upper()
+        student = self._by_id.get(student_id)
+        if student is not None:
+            self.hits += 1
+            return student
+
+        self.misses += 1
+        student = await self.backend.get_by_id(student_id)
+        if student is not None:
+            self._by_id[student_id] = student
+        return student
+
+    async def invalidate(self, student_id: str):
+        self._by_id.pop(student_id.upper(), None)
+        await self.backend.invalidate(student_id)
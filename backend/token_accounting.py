@@ -0,0 +1,230 @@
+# LLM token and cost accounting
+# Every LLM call is counted (provider-reported usage when available, otherwise a local tokenizer
+# estimate), attributed to session, user type, route, catalog version and conversation pattern, and
+# broken down by prompt section. Counts are aggregated in memory and flushed as $inc rollups, so
+# accounting adds no database round trip to the request. The tokenizer is loaded and the fixed
+# system prompt counted once, off the event loop, at startup.
+
+import os
+import math
+import asyncio
+import logging
+import threading
+from functools import lru_cache
+from datetime import datetime, timedelta, timezone
+
+from pymongo import UpdateOne
+
+from metrics import LLM_TOKENS
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_COLLECTION = "llm_usage_rollups"
+SESSION_COLLECTION = "llm_usage_sessions"
+
+ROLLUP_DIMENSIONS = ("route", "user_type", "catalog_version", "pattern", "model")
+
+# Prompt sections whose text is the same on every call; their counts are memoized
+STATIC_SECTIONS = {"system"}
+
+# USD per million tokens (gpt-4o-mini list prices by default)
+PROMPT_PRICE_PER_MTOK = float(os.environ.get("LLM_PROMPT_PRICE_PER_MTOK", "0.15"))
+COMPLETION_PRICE_PER_MTOK = float(os.environ.get("LLM_COMPLETION_PRICE_PER_MTOK", "0.60"))
+
+
+@lru_cache(maxsize=None)
+def _encoding(model: str):
+    try:
+        import tiktoken
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
+    except Exception as e:
+        # tiktoken missing, or its encoding files cannot be fetched - fall back to the estimate
+        logger.warning(f"Local tokenizer unavailable ({str(e)}), estimating tokens from text length")
+        return None
+
+
+def count_tokens(text: str, model: str = "gpt-4o-mini") -> int:
+    """Token count from the model's tokenizer, or ~4 characters per token without one"""
+    if not text:
+        return 0
+    encoding = _encoding(model)
+    if encoding is None:
+        return math.ceil(len(text) / 4)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+@lru_cache(maxsize=16)
+def count_static_tokens(text: str, model: str = "gpt-4o-mini") -> int:
+    """count_tokens for text that repeats across calls, such as the system prompt"""
+    return count_tokens(text, model)
+
+
+async def warm_up_tokenizer(static_texts=(), model: str = "gpt-4o-mini"):
+    """Load the tokenizer and count the static prompt sections on a worker thread"""
+    def load():
+        for text in static_texts:
+            count_static_tokens(text, model)
+        _encoding(model)
+
+    await asyncio.to_thread(load)
+
+
+def token_cost(prompt_tokens: int, completion_tokens: int) -> float:
+    return (prompt_tokens * PROMPT_PRICE_PER_MTOK + completion_tokens * COMPLETION_PRICE_PER_MTOK) / 1e6
+
+
+def conversation_pattern(ctx, history_turns: int) -> str:
+    """Coarse label for how a chat turn reached the LLM, used to find expensive conversation shapes"""
+    if ctx.follow_up:
+        return "location_follow_up"
+    if ctx.student_data:
+        return "authenticated"
+    if history_turns == 0:
+        return "first_turn"
+    return "long_history" if history_turns >= 10 else "short_history"
+
+
+class TokenLedger:
+    """In-memory usage aggregates, flushed to MongoDB as hourly rollups and per-session totals"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rollups = {}   # (hour, *dimensions) -> counters
+        self._sessions = {}  # (session_id, user_type) -> counters
+
+    @staticmethod
+    def _add(target: dict, counters: dict):
+        for key, value in counters.items():
+            if isinstance(value, dict):
+                TokenLedger._add(target.setdefault(key, {}), value)
+            else:
+                target[key] = target.get(key, 0) + value
+
+    def record(self, session_id: str, prompt_sections: dict, completion: str, *, route: str = "chat",
+               user_type: str = "visitor", catalog_version: str = "", pattern: str = "",
+               model: str = "gpt-4o-mini", prompt_tokens: int = None, completion_tokens: int = None):
+        """Account one LLM call; reported token counts take precedence over local estimates"""
+        section_tokens = {
+            name: (count_static_tokens if name in STATIC_SECTIONS else count_tokens)(text, model)
+            for name, text in prompt_sections.items() if text
+        }
+        if prompt_tokens is None:
+            prompt_tokens = sum(section_tokens.values())
+        if completion_tokens is None:
+            completion_tokens = count_tokens(completion, model)
+        cost = token_cost(prompt_tokens, completion_tokens)
+
+        LLM_TOKENS.labels("prompt").inc(prompt_tokens)
+        LLM_TOKENS.labels("completion").inc(completion_tokens)
+
+        counters = {
+            "calls": 1,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "cost_usd": cost,
+            "sections": section_tokens,
+        }
+        hour = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+        key = (hour, route, user_type or "visitor", catalog_version, pattern, model)
+        with self._lock:
+            self._add(self._rollups.setdefault(key, {}), counters)
+            self._add(self._sessions.setdefault((session_id, user_type or "visitor"), {}), {
+                "calls": 1,
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "cost_usd": cost,
+            })
+        return counters
+
+    @staticmethod
+    def _inc_fields(counters: dict, prefix: str = ""):
+        fields = {}
+        for key, value in counters.items():
+            if isinstance(value, dict):
+                fields.update(TokenLedger._inc_fields(value, f"{prefix}{key}."))
+            else:
+                fields[prefix + key] = value
+        return fields
+
+    async def flush(self, db) -> int:
+        """Write pending aggregates with $inc upserts; returns the number of documents touched"""
+        with self._lock:
+            rollups, self._rollups = self._rollups, {}
+            sessions, self._sessions = self._sessions, {}
+        if not rollups and not sessions:
+            return 0
+
+        now = datetime.now(timezone.utc)
+        rollup_ops = [
+            UpdateOne(
+                {"hour": key[0], **dict(zip(ROLLUP_DIMENSIONS, key[1:]))},
+                {"$inc": self._inc_fields(counters), "$set": {"updated_at": now}},
+                upsert=True
+            )
+            for key, counters in rollups.items()
+        ]
+        session_ops = [
+            UpdateOne(
+                {"session_id": session_id},
+                {"$inc": self._inc_fields(counters), "$set": {"user_type": user_type, "updated_at": now}},
+                upsert=True
+            )
+            for (session_id, user_type), counters in sessions.items()
+        ]
+        try:
+            if rollup_ops:
+                await db[ROLLUP_COLLECTION].bulk_write(rollup_ops, ordered=False)
+            if session_ops:
+                await db[SESSION_COLLECTION].bulk_write(session_ops, ordered=False)
+        except Exception:
+            # Keep the counts for the next flush rather than losing them
+            with self._lock:
+                for key, counters in rollups.items():
+                    self._add(self._rollups.setdefault(key, {}), counters)
+                for key, counters in sessions.items():
+                    self._add(self._sessions.setdefault(key, {}), counters)
+            raise
+        return len(rollup_ops) + len(session_ops)
+
+    async def run_flusher(self, db, interval_seconds: float = 30):
+        """Background task that persists aggregates periodically"""
+        while True:
+            await asyncio.sleep(interval_seconds)
+            try:
+                await self.flush(db)
+            except Exception as e:
+                logger.warning(f"Token usage flush failed: {str(e)}")
+
+
+async def usage_rollups(db, hours: int = 24, group_by: str = "pattern"):
+    """Token and cost totals for the last `hours`, grouped by one rollup dimension, most expensive first"""
+    if group_by not in ROLLUP_DIMENSIONS + ("hour",):
+        raise ValueError(f"group_by must be one of {', '.join(ROLLUP_DIMENSIONS + ('hour',))}")
+    since = datetime.now(timezone.utc) - timedelta(hours=hours)
+    docs = await db[ROLLUP_COLLECTION].find(
+        {"hour": {"$gte": since.replace(minute=0, second=0, microsecond=0)}},
+        {"_id": 0}
+    ).to_list(length=None)
+
+    groups = {}
+    for doc in docs:
+        group = str(doc.get(group_by, ""))
+        TokenLedger._add(groups.setdefault(group, {}), {
+            "calls": doc.get("calls", 0),
+            "prompt_tokens": doc.get("prompt_tokens", 0),
+            "completion_tokens": doc.get("completion_tokens", 0),
+            "cost_usd": doc.get("cost_usd", 0.0),
+            "sections": doc.get("sections", {}),
+        })
+
+    return sorted(
+        ({group_by: group, **totals, "cost_usd": round(totals["cost_usd"], 6)} for group, totals in groups.items()),
+        key=lambda row: row["cost_usd"],
+        reverse=True
+    )
+
+
+token_ledger = TokenLedger()
@@ -0,0 +1,237 @@
+# Lightweight request tracing for the RMSS chatbot backend
+# Each HTTP request gets a trace keyed by its request id; code marks interesting work with
+# `with span(...)`, and MongoDB commands are captured by a pymongo CommandListener (Motor runs
+# commands with the caller's context, so they land in the right trace). Finished traces go to an
+# in-memory ring buffer for the admin endpoints and, optionally, to a JSON-lines file.
+
+import os
+import json
+import time
+import queue
+import logging
+import logging.handlers
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Optional
+
+from pymongo import monitoring
+
+from structured_logging import request_id_var
+
+TRACING_ENABLED = os.environ.get("TRACING_ENABLED", "true").lower() in ("1", "true", "yes")
+
+
+class Trace:
+    """Spans recorded for one request; span times are milliseconds from the start of the trace"""
+
+    __slots__ = ("trace_id", "method", "path", "started_at", "_start", "spans", "status",
+                 "duration_ms", "_next_id", "_pending_commands")
+
+    def __init__(self, trace_id: str, method: str, path: str):
+        self.trace_id = trace_id
+        self.method = method
+        self.path = path
+        self.started_at = datetime.now(timezone.utc)
+        self._start = time.perf_counter()
+        self.spans = []
+        self.status = None
+        self.duration_ms = None
+        self._next_id = 0
+        self._pending_commands = {}
+
+    def now_ms(self) -> float:
+        return (time.perf_counter() - self._start) * 1000
+
+    def new_span_id(self) -> int:
+        self._next_id += 1
+        return self._next_id
+
+    def add_span(self, name: str, span_id: int, parent_id: Optional[int], start_ms: float, duration_ms: float,
+                 attributes: dict):
+        self.spans.append({
+            "id": span_id,
+            "parent_id": parent_id,
+            "name": name,
+            "start_ms": round(start_ms, 3),
+            "duration_ms": round(duration_ms, 3),
+            **({"attributes": attributes} if attributes else {}),
+        })
+
+    def to_dict(self, include_spans: bool = True) -> dict:
+        trace = {
+            "trace_id": self.trace_id,
+            "method": self.method,
+            "path": self.path,
+            "started_at": self.started_at.isoformat(),
+            "status": self.status,
+            "duration_ms": round(self.duration_ms, 3) if self.duration_ms is not None else None,
+            "span_count": len(self.spans),
+        }
+        if include_spans:
+            trace["spans"] = sorted(self.spans, key=lambda s: s["start_ms"])
+        return trace
+
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("current_trace", default=None)
+_current_span: ContextVar[Optional[int]] = ContextVar("current_span", default=None)
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """Record a span in the current request's trace; does nothing outside a traced request"""
+    trace = _current_trace.get()
+    if trace is None:
+        yield None
+        return
+
+    span_id = trace.new_span_id()
+    parent_id = _current_span.get()
+    token = _current_span.set(span_id)
+    start_ms = trace.now_ms()
+    try:
+        yield attributes
+    except BaseException as e:
+        attributes["error"] = type(e).__name__
+        raise
+    finally:
+        _current_span.reset(token)
+        trace.add_span(name, span_id, parent_id, start_ms, trace.now_ms() - start_ms, attributes)
+
+
+class TraceBuffer:
+    """Ring buffer of the most recent finished traces, with an optional JSON-lines file export"""
+
+    def __init__(self, max_traces: int = 500, export_path: Optional[str] = None):
+        self._traces = deque(maxlen=max_traces)
+        self._listener = None
+        self._export_logger = None
+        if export_path:
+            self._start_file_export(export_path)
+
+    def _start_file_export(self, path: str):
+        # Same pattern as application logs: the request path only enqueues, a thread writes
+        file_handler = logging.FileHandler(path)
+        file_handler.setFormatter(logging.Formatter("%(message)s"))
+        export_queue = queue.Queue(maxsize=10000)
+        self._listener = logging.handlers.QueueListener(export_queue, file_handler)
+        self._listener.start()
+        self._export_logger = logging.getLogger("rmss.trace_export")
+        self._export_logger.propagate = False
+        self._export_logger.setLevel(logging.INFO)
+        self._export_logger.addHandler(logging.handlers.QueueHandler(export_queue))
+
+    def add(self, trace: Trace):
+        self._traces.append(trace)
+        if self._export_logger is not None:
+            self._export_logger.info("%s", _LazyJson(trace))
+
+    def recent(self, limit: int = 50, min_duration_ms: float = 0.0, path: Optional[str] = None):
+        """Most recent traces first, optionally only slow ones or those for one path"""
+        matches = []
+        for trace in reversed(self._traces):
+            if trace.duration_ms is None or trace.duration_ms < min_duration_ms:
+                continue
+            if path and trace.path != path:
+                continue
+            matches.append(trace)
+            if len(matches) >= limit:
+                break
+        return matches
+
+    def get(self, trace_id: str) -> Optional[Trace]:
+        for trace in reversed(self._traces):
+            if trace.trace_id == trace_id:
+                return trace
+        return None
+
+    def close(self):
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+
+
+class _LazyJson:
+    """Defers JSON serialisation of a trace to the export thread"""
+
+    def __init__(self, trace: Trace):
+        self.trace = trace
+
+    def __str__(self):
+        return json.dumps(self.trace.to_dict(), default=str)
+
+
+trace_buffer = TraceBuffer(
+    max_traces=int(os.environ.get("TRACE_BUFFER_SIZE", "500")),
+    export_path=os.environ.get("TRACE_EXPORT_PATH") or None
+)
+
+
+class TracingMiddleware:
+    """ASGI middleware that opens a trace per HTTP request, keyed by its request id"""
+
+    def __init__(self, app, buffer: TraceBuffer = trace_buffer, ignore_prefixes=("/metrics", "/healthz", "/readyz", "/api/admin")):
+        self.app = app
+        self.buffer = buffer
+        self.ignore_prefixes = tuple(ignore_prefixes)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not TRACING_ENABLED or scope["path"].startswith(self.ignore_prefixes):
+            await self.app(scope, receive, send)
+            return
+
+        trace = Trace(request_id_var.get(), scope["method"], scope["path"])
+        token = _current_trace.set(trace)
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                trace.status = message["status"]
+            await send(message)
+
+        try:
+            with span("http", method=scope["method"], path=scope["path"]):
+                await self.app(scope, receive, send_with_status)
+        finally:
+            trace.duration_ms = trace.now_ms()
+            _current_trace.reset(token)
+            self.buffer.add(trace)
+
+
+class CommandTracer(monitoring.CommandListener):
+    """Records each MongoDB command as a span of the trace that issued it"""
+
+    def started(self, event):
+        trace = _current_trace.get()
+        if trace is None:
+            return
+        collection = event.command.get(event.command_name)
+        trace._pending_commands[event.request_id] = (
+            trace.new_span_id(), _current_span.get(), trace.now_ms(), {
+                "command": event.command_name,
+                "database": event.database_name,
+                **({"collection": collection} if isinstance(collection, str) else {}),
+            }
+        )
+
+    def _finish(self, event, **extra):
+        trace = _current_trace.get()
+        if trace is None:
+            return
+        pending = trace._pending_commands.pop(event.request_id, None)
+        if pending is None:
+            return
+        span_id, parent_id, start_ms, attributes = pending
+        attributes.update(extra)
+        trace.add_span(f"mongo.{event.command_name}", span_id, parent_id, start_ms, event.duration_micros / 1000,
+                       attributes)
+
+    def succeeded(self, event):
+        self._finish(event)
+
+    def failed(self, event):
+        self._finish(event, error=str(event.failure.get("errmsg", "command failed")))
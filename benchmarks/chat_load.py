@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Offline chat load test
+Replays multi-turn chat scripts (e.g. "How much is J2 math?" -> "Bishan") against the FastAPI app
+at a fixed concurrency and reports latency percentiles, throughput and error rates as JSON.
+The LLM is replaced by a stub with a configurable delay and MongoDB by an in-memory stand-in, so
+no network is needed. Requests go through the ASGI transport in-process by default; --serve runs
+the app under uvicorn on localhost and drives it over HTTP instead, and --base-url targets an
+already running server.
+
+    python benchmarks/chat_load.py --conversations 500 --concurrency 50 --llm-latency-ms 300
+    python benchmarks/chat_load.py --serve --port 8765 --concurrency 100
+
+To replay recorded LLM answers (see backend/llm_cassette.py) instead of the stub's canned ones:
+
+    LLM_CASSETTE_MODE=replay LLM_CASSETTE_PATH=llm_cassette.jsonl LLM_CASSETTE_REPLAY_LATENCY=true \
+        python benchmarks/chat_load.py --conversations 500
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import asyncio
+import argparse
+import statistics
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from metrics import percentile
+
+DEFAULT_SCRIPTS = [
+    {"name": "j2_math_bishan", "weight": 3, "turns": ["How much is J2 math?", "Bishan"]},
+    {"name": "p6_science_fees", "weight": 2, "turns": ["What are the fees for P6 science?", "Punggol please"]},
+    {"name": "general_questions", "weight": 2, "turns": [
+        "Hi, what does RMSS offer?", "Who are your tutors?", "Do you have trial lessons?"
+    ]},
+    {"name": "student_fees", "weight": 1, "login": {"student_id": "ST001", "password": "demo123"},
+     "turns": ["What are my fees?", "Show my schedule"]},
+]
+
+
+def latency_summary(samples):
+    if not samples:
+        return {}
+    samples = sorted(samples)
+    return {
+        "p50": round(percentile(samples, 0.50), 2),
+        "p95": round(percentile(samples, 0.95), 2),
+        "p99": round(percentile(samples, 0.99), 2),
+        "max": round(max(samples), 2),
+        "mean": round(statistics.mean(samples), 2),
+    }
+
+
+def prepare_app(llm_latency_ms: float, rate_limit: bool):
+    """Import the app with the offline LLM and Mongo stand-ins swapped in"""
+    os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+    os.environ.setdefault("DB_NAME", "rmss_loadtest")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    os.environ["RATE_LIMIT_ENABLED"] = "true" if rate_limit else "false"
+
+    import server
+    from offline_backends import in_memory_database, StubLlmChat, StubUserMessage
+
+    StubLlmChat.latency_seconds = llm_latency_ms / 1000
+    server.db = in_memory_database(os.environ["DB_NAME"])
+    server.LlmChat = StubLlmChat
+    server.UserMessage = StubUserMessage
+    return server.app, StubLlmChat
+
+
+class LoadRun:
+    def __init__(self, client, think_seconds: float):
+        self.client = client
+        self.think_seconds = think_seconds
+        self.latencies = []
+        self.by_script = {}
+        self.by_turn = {}
+        self.statuses = Counter()
+        self.errors = Counter()
+
+    async def _post(self, path: str, payload: dict):
+        start = time.perf_counter()
+        try:
+            response = await self.client.post(path, json=payload)
+            status = response.status_code
+        except Exception as e:
+            response, status = None, type(e).__name__
+        return response, status, (time.perf_counter() - start) * 1000
+
+    async def run_conversation(self, script: dict):
+        session_id = str(uuid.uuid4())
+        auth_token = None
+        if script.get("login"):
+            response, status, _ = await self._post("/api/demo/login", script["login"])
+            if status != 200:
+                self.errors[f"login:{status}"] += 1
+                return
+            auth_token = response.json().get("session_token")
+
+        for index, message in enumerate(script["turns"]):
+            payload = {"message": message, "session_id": session_id}
+            if auth_token:
+                payload["auth_token"] = auth_token
+            response, status, elapsed_ms = await self._post("/api/chat", payload)
+
+            self.statuses[str(status)] += 1
+            if status != 200:
+                self.errors[f"chat:{status}"] += 1
+                continue
+            self.latencies.append(elapsed_ms)
+            self.by_script.setdefault(script["name"], []).append(elapsed_ms)
+            self.by_turn.setdefault(f"{script['name']}#{index + 1}", []).append(elapsed_ms)
+            if self.think_seconds:
+                await asyncio.sleep(self.think_seconds)
+
+    async def run(self, conversations, concurrency: int):
+        queue = asyncio.Queue()
+        for script in conversations:
+            queue.put_nowait(script)
+
+        async def worker():
+            while not queue.empty():
+                await self.run_conversation(queue.get_nowait())
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return time.perf_counter() - start
+
+
+def build_conversations(scripts, count: int):
+    weighted = [script for script in scripts for _ in range(script.get("weight", 1))]
+    return [weighted[i % len(weighted)] for i in range(count)]
+
+
+async def serve_locally(app, port: int):
+    import uvicorn
+    config = uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", lifespan="off")
+    uvicorn_server = uvicorn.Server(config)
+    task = asyncio.create_task(uvicorn_server.serve())
+    while not uvicorn_server.started:
+        await asyncio.sleep(0.05)
+    return uvicorn_server, task
+
+
+async def main_async(args):
+    import httpx
+
+    scripts = json.loads(Path(args.scripts).read_text()) if args.scripts else DEFAULT_SCRIPTS
+    conversations = build_conversations(scripts, args.conversations)
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+
+    llm = uvicorn_server = serve_task = None
+    if args.base_url:
+        transport, base_url, mode = None, args.base_url, "http"
+    else:
+        app, llm = prepare_app(args.llm_latency_ms, args.rate_limit)
+        if args.serve:
+            uvicorn_server, serve_task = await serve_locally(app, args.port)
+            transport, base_url, mode = None, f"http://127.0.0.1:{args.port}", "http"
+        else:
+            transport, base_url, mode = httpx.ASGITransport(app=app), "http://loadtest", "asgi"
+
+    async with httpx.AsyncClient(transport=transport, base_url=base_url, limits=limits, timeout=60) as client:
+        load = LoadRun(client, args.think_ms / 1000)
+        elapsed = await load.run(conversations, args.concurrency)
+
+    if uvicorn_server is not None:
+        uvicorn_server.should_exit = True
+        await serve_task
+
+    requests = sum(load.statuses.values())
+    failed = sum(count for status, count in load.statuses.items() if status != "200")
+    return {
+        "config": {
+            "mode": mode,
+            "conversations": args.conversations,
+            "concurrency": args.concurrency,
+            "llm_latency_ms": args.llm_latency_ms if not args.base_url else None,
+            "scripts": [script["name"] for script in scripts],
+        },
+        "requests": requests,
+        "duration_seconds": round(elapsed, 3),
+        "throughput_rps": round(requests / elapsed, 2) if elapsed else 0.0,
+        "error_rate": round(failed / requests, 4) if requests else 0.0,
+        "errors": dict(load.errors),
+        "status_codes": dict(load.statuses),
+        "llm_calls": llm.calls if llm else None,
+        "latency_ms": latency_summary(load.latencies),
+        "latency_ms_by_script": {name: latency_summary(samples) for name, samples in load.by_script.items()},
+        "latency_ms_by_turn": {name: latency_summary(samples) for name, samples in load.by_turn.items()},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--conversations", type=int, default=200, help="scripted conversations to run")
+    parser.add_argument("--concurrency", type=int, default=20, help="conversations in flight at once")
+    parser.add_argument("--llm-latency-ms", type=float, default=200.0, help="stub LLM response time")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="pause between turns of a conversation")
+    parser.add_argument("--scripts", help="JSON file with [{name, weight, turns, login?}, ...]")
+    parser.add_argument("--serve", action="store_true", help="run the app under uvicorn and drive it over HTTP")
+    parser.add_argument("--port", type=int, default=8765, help="port for --serve")
+    parser.add_argument("--base-url", help="drive an already running server instead (no stubs applied)")
+    parser.add_argument("--rate-limit", action="store_true", help="keep admission control enabled")
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    args = parser.parse_args()
+
+    report = asyncio.run(main_async(args))
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        Path(args.output).write_text(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Response formatter micro-benchmark
+Measures the per-call cost of the student data and catalog formatters: the compiled templates in
+response_templates against the f-string formatters they replaced, in microseconds per call.
+Templates should be no slower than the f-strings.
+
+    python benchmarks/formatters_bench.py
+"""
+
+import sys
+import json
+import timeit
+import argparse
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+import response_templates
+from catalog import get_course
+from demo_auth import DEMO_STUDENTS
+
+
+# The DemoAuthService formatters as they were before response_templates, kept for comparison
+def legacy_fees(student_data):
+    fees = student_data["fees"]
+
+    if fees["outstanding"] > 0:
+        return f"""💰 **Your Fees Information:**
+
+📊 **Current Status:**
+• Total Monthly Fees: ${fees['total_fees']:.2f}
+• Amount Paid: ${fees['paid_amount']:.2f}
+• Outstanding Balance: ${fees['outstanding']:.2f}
+• Due Date: {fees['due_date']}
+
+⚠️ **Payment Required:** Please settle your outstanding balance by {fees['due_date']}
+
+💳 **Payment Methods:**
+• Bank Transfer: DBS 123-456789-0 (RMSS Pte Ltd)
+• Cash: Any RMSS location during office hours
+• PayNow: 6222-8222
+
+📞 **Need Help?** Call 6222 8222 for payment assistance"""
+
+    else:
+        return f"""💰 **Your Fees Information:**
+
+✅ **Account Status: PAID IN FULL**
+
+📊 **Details:**
+• Total Monthly Fees: ${fees['total_fees']:.2f}  
+• Last Payment: {fees['last_payment']}
+• Next Payment Due: {(datetime.now() + timedelta(days=30)).strftime('%Y-%m-%d')}
+
+😊 Thank you for keeping your payments up to date!"""
+
+
+def legacy_schedule(student_data):
+    enrollments = student_data["enrollments"]
+
+    schedule_text = "📅 **Your Class Schedule:**\n\n"
+
+    for enrollment in enrollments:
+        schedule_text += f"""📚 **{enrollment['course']}**
+📍 Location: {enrollment['location']}
+👨‍🏫 Tutor: {enrollment['tutor']}
+⏰ Schedule: {enrollment['schedule']}
+📆 Started: {enrollment['start_date']}
+
+"""
+
+    schedule_text += """📞 **Schedule Changes:**
+Need to modify your schedule? Call 6222 8222
+
+🎓 **Free Trial:** Interested in additional subjects? Ask about our free trial lessons!"""
+
+    return schedule_text
+
+
+def legacy_profile(student_data):
+    return f"""👨‍🎓 **Your Profile Information:**
+
+📝 **Student Details:**
+• Name: {student_data['full_name']}
+• Student ID: {student_data['student_id']}
+• Email: {student_data['email']}
+• Phone: {student_data['phone']}
+
+📚 **Current Enrollments:** {len(student_data['enrollments'])} subjects
+💰 **Outstanding Fees:** ${student_data['fees']['outstanding']:.2f}
+
+📞 **Update Profile:** Call 6222 8222 to update contact details"""
+
+
+def per_call_us(func, number: int) -> float:
+    # Best of 5 repeats to keep scheduler noise out of the numbers
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1e6
+
+
+def run(number: int):
+    outstanding = DEMO_STUDENTS["ST001"]
+    paid = DEMO_STUDENTS["ST002"]
+    course = get_course("J2", "Math")
+
+    cases = {
+        "fees_outstanding": (response_templates.render_fees, legacy_fees, outstanding),
+        "fees_paid": (response_templates.render_fees, legacy_fees, paid),
+        "schedule": (response_templates.render_schedule, legacy_schedule, outstanding),
+        "profile": (response_templates.render_profile, legacy_profile, outstanding),
+    }
+
+    results = {}
+    for name, (render, legacy, student) in cases.items():
+        assert render(student) == legacy(student), f"{name}: template output differs from the f-string"
+        template_us = per_call_us(lambda: render(student), number)
+        fstring_us = per_call_us(lambda: legacy(student), number)
+        results[name] = {
+            "template_us": round(template_us, 3),
+            "fstring_us": round(fstring_us, 3),
+            "ratio": round(template_us / fstring_us, 2),
+        }
+    results["catalog_course"] = {
+        "template_us": round(per_call_us(
+            lambda: response_templates.render_catalog_course("J2", "Math", course, "Bishan"), number), 3),
+    }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=20000, help="calls per timing repeat")
+    args = parser.parse_args()
+    print(json.dumps(run(args.number), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Chat hot-path micro-benchmarks with a regression gate
+Times the per-request CPU work of /api/chat in isolation: prompt assembly over a 20-message
+history, entity and pattern detection, LLM response cleaning, ChatMessage/StatusCheck construction
+and serialization, and the DemoAuthService formatters. Results are microseconds per call (best of
+5 repeats).
+
+    python benchmarks/hot_paths_bench.py run --output benchmarks/baselines/hot_paths.json
+    python benchmarks/hot_paths_bench.py compare --threshold 0.25
+
+`compare` re-runs the suite and exits with status 1 when any benchmark is slower than the baseline
+by more than the threshold (a fraction: 0.25 = 25% slower). Baselines are machine-specific, so
+record a new one when the hardware or Python version changes.
+"""
+
+import os
+import sys
+import json
+import timeit
+import argparse
+import platform
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "baselines" / "hot_paths.json"
+
+USER_MESSAGES = [
+    "How much is J2 math?",
+    "What are the fees for P6 science?",
+    "Do you have sec 3 chemistry classes in Punggol?",
+    "Hi, what does RMSS offer?",
+    "Bishan",
+]
+
+LLM_REPLY = (
+    "  **J2 Math at Bishan**\\n\\nFee: $440/month\\n\\nSchedule: Tuesdays 7-9pm with Mr Lim.\\r\\n"
+    "Would you like to know about other locations?\n  "
+)
+
+
+def per_call_us(func, number: int) -> float:
+    # Best of 5 repeats to keep scheduler noise out of the numbers
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1e6
+
+
+def history(turns: int = 20):
+    start = datetime.now(timezone.utc)
+    messages = []
+    for index in range(turns):
+        sender = "user" if index % 2 == 0 else "assistant"
+        text = USER_MESSAGES[index // 2 % len(USER_MESSAGES)] if sender == "user" else LLM_REPLY.strip()
+        messages.append({"session_id": "bench", "message": text, "sender": sender,
+                         "timestamp": start + timedelta(seconds=index)})
+    return messages
+
+
+def build_cases():
+    """name -> zero-argument callable doing one unit of hot-path work"""
+    os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+    os.environ.setdefault("DB_NAME", "rmss_bench")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+    import server
+    from catalog import get_course_price
+    from chat_pipeline import ChatContext, PERSONAL_QUERIES, _FEE_PATTERN
+    from conversation_state import extract_entities, detect_pending_question
+    from demo_auth import DemoAuthService, DEMO_STUDENTS
+    from token_accounting import conversation_pattern
+
+    recent_messages = history(20)
+    request = server.ChatRequest(message="Bishan", session_id="bench", user_type="parent")
+    follow_up_ctx = ChatContext(request, "bench", db=None)
+    follow_up_ctx.follow_up = {"course": "J2 Math", "location": "Bishan", "price": get_course_price("J2", "Math")}
+    student_ctx = ChatContext(server.ChatRequest(message="What else do you offer?", session_id="bench"), "bench", None)
+    student_ctx.student_data = DEMO_STUDENTS["ST001"]
+
+    def detect_entities():
+        for message in USER_MESSAGES:
+            extract_entities(message)
+
+    def detect_patterns():
+        for message in USER_MESSAGES:
+            lowered = message.lower()
+            # The same checks, in the same order, as the personal-data and catalog stages
+            _FEE_PATTERN.search(lowered)
+            any(query in lowered for query in PERSONAL_QUERIES)
+        detect_pending_question(LLM_REPLY)
+        conversation_pattern(follow_up_ctx, len(recent_messages))
+
+    message_doc = recent_messages[1]
+    status_doc = server.StatusCheck(client_name="bench").model_dump()
+    student = DEMO_STUDENTS["ST001"]
+
+    return {
+        "prompt_assembly_20_messages": lambda: server.build_llm_prompt(follow_up_ctx, recent_messages),
+        "prompt_assembly_20_messages_student": lambda: server.build_llm_prompt(student_ctx, recent_messages),
+        "chat_context_init": lambda: ChatContext(request, "bench", None),
+        "entity_extraction_5_messages": detect_entities,
+        "pattern_detection": detect_patterns,
+        "response_cleaning": lambda: server.clean_llm_response(LLM_REPLY),
+        "chat_message_construct": lambda: server.ChatMessage(session_id="bench", message=LLM_REPLY, sender="assistant"),
+        "chat_message_validate_doc": lambda: server.ChatMessage(**message_doc),
+        "chat_message_model_dump": lambda: server.ChatMessage(**message_doc).model_dump(),
+        "chat_message_model_dump_json": lambda: server.ChatMessage(**message_doc).model_dump_json(),
+        "status_check_construct": lambda: server.StatusCheck(client_name="bench"),
+        "status_check_round_trip": lambda: server.StatusCheck(**status_doc).model_dump(),
+        "format_fees_info": lambda: DemoAuthService.format_fees_info(student),
+        "format_schedule_info": lambda: DemoAuthService.format_schedule_info(student),
+        "format_profile_info": lambda: DemoAuthService.format_profile_info(student),
+    }
+
+
+def run(number: int, only=None):
+    cases = build_cases()
+    results = {}
+    for name, func in cases.items():
+        if only and not any(pattern in name for pattern in only):
+            continue
+        func()  # warm caches and lazy imports before timing
+        results[name] = round(per_call_us(func, number), 3)
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "number": number,
+        "unit": "us_per_call",
+        "results": results,
+    }
+
+
+def compare(baseline: dict, current: dict, threshold: float):
+    """Rows of (name, baseline_us, current_us, change, status); status is ok, regressed, new or missing"""
+    rows = []
+    before, after = baseline["results"], current["results"]
+    for name in sorted(set(before) | set(after)):
+        if name not in after:
+            rows.append((name, before[name], None, None, "missing"))
+            continue
+        if name not in before:
+            rows.append((name, None, after[name], None, "new"))
+            continue
+        change = after[name] / before[name] - 1 if before[name] else 0.0
+        rows.append((name, before[name], after[name], change, "regressed" if change > threshold else "ok"))
+    return rows
+
+
+def save(results: dict, path):
+    if path:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        Path(path).write_text(json.dumps(results, indent=2) + "\n")
+
+
+def print_rows(rows):
+    print(f"{'benchmark':40} {'baseline us':>12} {'current us':>12} {'change':>8}  status")
+    for name, before, after, change, status in rows:
+        before_text = f"{before:.3f}" if before is not None else "-"
+        after_text = f"{after:.3f}" if after is not None else "-"
+        change_text = f"{change:+.1%}" if change is not None else "-"
+        print(f"{name:40} {before_text:>12} {after_text:>12} {change_text:>8}  {status}")
+
+
+def main():
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--number", type=int, default=5000, help="calls per timing repeat")
+    common.add_argument("--only", action="append", help="run only benchmarks whose name contains this")
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", parents=[common], help="run the suite and print (or save) the results")
+    run_parser.add_argument("--output", help="write the results as a baseline file")
+
+    compare_parser = commands.add_parser("compare", parents=[common],
+                                         help="run the suite and compare it to a baseline")
+    compare_parser.add_argument("--baseline", default=str(DEFAULT_BASELINE), help="baseline JSON file")
+    compare_parser.add_argument("--threshold", type=float, default=0.25,
+                                help="allowed slowdown as a fraction of the baseline time")
+    compare_parser.add_argument("--retries", type=int, default=2,
+                                help="times to re-run benchmarks that look regressed before failing")
+    compare_parser.add_argument("--output", help="also write the current results to this file")
+    args = parser.parse_args()
+
+    current = run(args.number, args.only)
+    if args.command == "run":
+        save(current, args.output)
+        print(json.dumps(current, indent=2))
+        return
+
+    baseline = json.loads(Path(args.baseline).read_text())
+    if args.only:
+        baseline["results"] = {name: value for name, value in baseline["results"].items()
+                               if any(pattern in name for pattern in args.only)}
+    rows = compare(baseline, current, args.threshold)
+    for _ in range(args.retries):
+        regressed = [row[0] for row in rows if row[4] == "regressed"]
+        if not regressed:
+            break
+        # Re-time only the suspects and keep their best result, so one noisy repeat cannot fail the gate
+        retry = run(args.number, regressed)["results"]
+        for name, value in retry.items():
+            current["results"][name] = min(current["results"][name], value)
+        rows = compare(baseline, current, args.threshold)
+    save(current, args.output)
+    print_rows(rows)
+    regressed = [row[0] for row in rows if row[4] == "regressed"]
+    if regressed:
+        print(f"\n{len(regressed)} benchmark(s) regressed by more than {args.threshold:.0%}: {', '.join(regressed)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Login burst load test
+Sends a steady stream of /api/chat requests through the FastAPI app in-process (stub LLM answering
+after --llm-latency-ms, in-memory MongoDB) while a burst of concurrent password logins is verified,
+and reports chat latency percentiles for:
+  - baseline: no logins
+  - inline:   bcrypt.checkpw called directly on the event loop, against the demo students' hashes
+  - pool:     POST /api/demo/login, which verifies on the CredentialVerifier worker pool
+Chat latency under "pool" should match the baseline; "inline" shows the stall being avoided.
+The cost factor is that of the stored demo hashes (12 rounds).
+
+    python benchmarks/login_burst_load.py --logins 40
+"""
+
+import sys
+import json
+import time
+import uuid
+import asyncio
+import argparse
+import statistics
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from metrics import percentile
+from chat_load import prepare_app
+
+LOGIN_STUDENT = "ST001"
+
+
+async def chat_probe(client, stop: asyncio.Event, interval_ms: float, latencies: list, errors: list):
+    """Opening chat questions from new sessions; each is distinct so the response cache cannot answer it"""
+    async def one_request():
+        session_id = str(uuid.uuid4())
+        start = time.perf_counter()
+        response = await client.post("/api/chat", json={
+            "message": f"Hi, what does RMSS offer? ({session_id[:8]})", "session_id": session_id
+        })
+        if response.status_code == 200:
+            latencies.append((time.perf_counter() - start) * 1000)
+        else:
+            errors.append(response.status_code)
+
+    tasks = []
+    while not stop.is_set():
+        tasks.append(asyncio.create_task(one_request()))
+        await asyncio.sleep(interval_ms / 1000)
+    await asyncio.gather(*tasks)
+
+
+async def run_scenario(client, mode: str, logins: int, llm_latency_ms: float, interval_ms: float,
+                       duration_s: float):
+    import bcrypt
+    from demo_auth import DEMO_STUDENTS
+
+    stored_hash = DEMO_STUDENTS[LOGIN_STUDENT]["password_hash"].encode()
+    latencies, errors = [], []
+    stop = asyncio.Event()
+    probe = asyncio.create_task(chat_probe(client, stop, interval_ms, latencies, errors))
+    await asyncio.sleep(0.2)
+
+    # Distinct wrong passwords so the verifier's success cache does not hide the bcrypt cost
+    start = time.perf_counter()
+    if mode == "inline":
+        for i in range(logins):
+            bcrypt.checkpw(f"wrong-{i}".encode(), stored_hash)
+            await asyncio.sleep(0)
+    elif mode == "pool":
+        await asyncio.gather(*(
+            client.post("/api/demo/login", json={"student_id": LOGIN_STUDENT, "password": f"wrong-{i}"})
+            for i in range(logins)
+        ))
+    login_seconds = time.perf_counter() - start
+
+    await asyncio.sleep(max(0.0, duration_s - login_seconds))
+    stop.set()
+    await probe
+
+    latencies.sort()
+    extra = [latency - llm_latency_ms for latency in latencies]
+    return {
+        "mode": mode,
+        "logins": logins if mode != "baseline" else 0,
+        "login_seconds": round(login_seconds, 3),
+        "chat_requests": len(latencies),
+        "chat_errors": len(errors),
+        "chat_p50_ms": round(percentile(latencies, 0.50), 2),
+        "chat_p99_ms": round(percentile(latencies, 0.99), 2),
+        "chat_max_ms": round(latencies[-1], 2),
+        "overhead_mean_ms": round(statistics.mean(extra), 2),
+    }
+
+
+async def main_async(args):
+    app, _ = prepare_app(args.llm_latency_ms, rate_limit=False)
+    results = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://rmss-bench", timeout=60) as client:
+        for mode in ("baseline", "inline", "pool"):
+            results.append(await run_scenario(client, mode, args.logins, args.llm_latency_ms,
+                                              args.interval_ms, args.duration))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=40, help="concurrent login attempts in the burst")
+    parser.add_argument("--llm-latency-ms", type=float, default=20.0, help="stub LLM reply time per chat request")
+    parser.add_argument("--interval-ms", type=float, default=5.0, help="gap between chat requests")
+    parser.add_argument("--duration", type=float, default=2.0, help="minimum seconds per scenario")
+    args = parser.parse_args()
+
+    results = asyncio.run(main_async(args))
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
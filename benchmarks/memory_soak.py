@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Worker memory soak test
+Drives a long mix of synthetic chat conversations, password logins and WhatsApp OTP flows through
+the FastAPI app in-process (stub LLM, in-memory MongoDB) and tracks RSS and tracemalloc over time.
+After a warm-up that fills the bounded caches (response cache, trace buffer, OTP window), traced
+memory should stay flat; the run fails when it grows by more than --max-bytes-per-request, and
+reports the allocation sites that grew the most.
+
+    python benchmarks/memory_soak.py --requests 300000 --concurrency 50
+    python benchmarks/memory_soak.py --requests 20000 --max-bytes-per-request 16
+
+The in-memory database is emptied at every checkpoint (after flushing token usage), since stored
+chat history is the database's memory, not the worker's. Logout is not part of the mix: revoked
+tokens are kept for their remaining lifetime by design.
+"""
+
+import gc
+import os
+import re
+import sys
+import json
+import time
+import random
+import asyncio
+import resource
+import argparse
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from chat_load import DEFAULT_SCRIPTS, prepare_app
+
+LOGIN = {"student_id": "ST001", "password": "demo123"}
+OTP_PHONES = {"ST001": "+6591234567", "ST002": "+6598765432", "ST003": "+6591111111"}
+
+# The stand-in database scans every document on each query, so it is emptied this often to keep
+# request cost flat over a long run
+DB_RESET_REQUESTS = 1000
+
+_OTP_PATTERN = re.compile(r"Demo OTP: (\d{6})")
+
+
+def rss_mb() -> float:
+    """Current resident set size; peak RSS on platforms without /proc"""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class SoakRun:
+    def __init__(self, client, database, seed: int = 42):
+        self.client = client
+        self.database = database
+        self.rng = random.Random(seed)
+        self.requests = 0
+        self.failures = 0
+        # A new OTP replaces the student's previous one, so one OTP flow per student at a time
+        self.otp_locks = {student_id: asyncio.Lock() for student_id in OTP_PHONES}
+
+    async def _post(self, path: str, payload: dict):
+        self.requests += 1
+        if self.requests % DB_RESET_REQUESTS == 0:
+            await self.database.client.drop_database(self.database.name)
+        response = await self.client.post(path, json=payload)
+        body = response.json()
+        if response.status_code != 200 or body.get("success") is False:
+            self.failures += 1
+        return body
+
+    async def chat(self):
+        script = self.rng.choice([script for script in DEFAULT_SCRIPTS if not script.get("login")])
+        session_id = f"soak-{self.rng.getrandbits(64):016x}"  # a new session every conversation
+        for message in script["turns"]:
+            await self._post("/api/chat", {"message": message, "session_id": session_id})
+
+    async def login(self):
+        body = await self._post("/api/demo/login", LOGIN)
+        if body.get("session_token"):
+            await self._post("/api/chat", {"message": "What are my fees?", "auth_token": body["session_token"],
+                                           "session_id": f"soak-{self.rng.getrandbits(64):016x}"})
+
+    async def otp(self):
+        student_id = self.rng.choice(list(OTP_PHONES))
+        async with self.otp_locks[student_id]:
+            body = await self._post("/api/demo/whatsapp/request-otp",
+                                    {"student_id": student_id, "phone": OTP_PHONES[student_id]})
+            match = _OTP_PATTERN.search(body.get("message", ""))
+            if match:
+                await self._post("/api/demo/whatsapp/verify-otp", {"student_id": student_id, "otp": match.group(1)})
+
+    async def run_batch(self, requests: int, concurrency: int, weights):
+        target = self.requests + requests
+        flows = [self.chat, self.login, self.otp]
+
+        async def worker():
+            while self.requests < target:
+                await self.rng.choices(flows, weights)[0]()
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+
+async def checkpoint(server, done: int, started: float):
+    """Flush and empty the stand-in database, then measure the worker's own memory"""
+    from demo_auth import DEMO_OTP_STORE
+    from token_accounting import token_ledger
+
+    await token_ledger.flush(server.db)
+    await server.db.client.drop_database(server.db.name)
+    await DEMO_OTP_STORE.sweep()
+    gc.collect()
+    traced, _ = tracemalloc.get_traced_memory()
+    return {
+        "requests": done,
+        "elapsed_seconds": round(time.perf_counter() - started, 1),
+        "traced_mb": round(traced / 1024 / 1024, 3),
+        "rss_mb": round(rss_mb(), 1),
+    }
+
+
+def top_growth(before, after, limit: int):
+    ignore = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+    stats = after.filter_traces(ignore).compare_to(before.filter_traces(ignore), "lineno")
+    return [
+        {
+            "location": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+            "size_diff_kb": round(stat.size_diff / 1024, 1),
+            "count_diff": stat.count_diff,
+        }
+        for stat in stats[:limit] if stat.size_diff > 0
+    ]
+
+
+async def main_async(args):
+    import httpx
+
+    prepare_app(llm_latency_ms=0, rate_limit=False)
+    import server
+    weights = (args.chat_weight, args.login_weight, args.otp_weight)
+    samples = []
+
+    tracemalloc.start(args.frames)
+    started = time.perf_counter()
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=server.app), base_url="http://soak",
+                                 timeout=60) as client:
+        soak = SoakRun(client, server.db)
+        await soak.run_batch(args.warmup, args.concurrency, weights)
+        samples.append(await checkpoint(server, soak.requests, started))
+        warm_requests, baseline = soak.requests, tracemalloc.take_snapshot()
+        print(json.dumps(samples[-1]), file=sys.stderr)
+
+        interval = max(1, args.requests // args.checkpoints)
+        while soak.requests - warm_requests < args.requests:
+            await soak.run_batch(interval, args.concurrency, weights)
+            samples.append(await checkpoint(server, soak.requests, started))
+            print(json.dumps(samples[-1]), file=sys.stderr)
+
+    final = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    measured = soak.requests - warm_requests
+    traced_growth = (samples[-1]["traced_mb"] - samples[0]["traced_mb"]) * 1024 * 1024
+    rss_growth = samples[-1]["rss_mb"] - samples[0]["rss_mb"]
+    return {
+        "requests": soak.requests,
+        "warmup_requests": warm_requests,
+        "failures": soak.failures,
+        "elapsed_seconds": round(time.perf_counter() - started, 1),
+        "traced_growth_bytes_per_request": round(traced_growth / measured, 2),
+        "rss_growth_mb": round(rss_growth, 1),
+        "rss_growth_bytes_per_request": round(rss_growth * 1024 * 1024 / measured, 2),
+        "top_growth": top_growth(baseline, final, args.top),
+        "samples": samples,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200_000, help="requests to measure after the warm-up")
+    parser.add_argument("--warmup", type=int, default=5_000, help="requests before the baseline is taken")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--checkpoints", type=int, default=20)
+    parser.add_argument("--chat-weight", type=float, default=0.8, help="share of chat conversations")
+    parser.add_argument("--login-weight", type=float, default=0.05,
+                        help="share of login + personal chat flows (bcrypt-bound, so kept small)")
+    parser.add_argument("--otp-weight", type=float, default=0.15, help="share of OTP request + verify flows")
+    parser.add_argument("--frames", type=int, default=1, help="tracemalloc frames kept per allocation")
+    parser.add_argument("--top", type=int, default=15, help="allocation sites to report")
+    parser.add_argument("--max-bytes-per-request", type=float, default=32.0,
+                        help="fail if traced memory grows more than this per request after warm-up")
+    parser.add_argument("--max-rss-growth-mb", type=float, help="also fail if RSS grows more than this")
+    parser.add_argument("--output", help="also write the full JSON report to this file")
+    args = parser.parse_args()
+
+    report = asyncio.run(main_async(args))
+    print(json.dumps({key: value for key, value in report.items() if key != "samples"}, indent=2))
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2) + "\n")
+
+    failed = False
+    if report["traced_growth_bytes_per_request"] > args.max_bytes_per_request:
+        print(f"❌ Traced memory grew {report['traced_growth_bytes_per_request']} bytes per request "
+              f"(budget {args.max_bytes_per_request})", file=sys.stderr)
+        failed = True
+    if args.max_rss_growth_mb is not None and report["rss_growth_mb"] > args.max_rss_growth_mb:
+        print(f"❌ RSS grew {report['rss_growth_mb']}MB (budget {args.max_rss_growth_mb}MB)", file=sys.stderr)
+        failed = True
+    if report["failures"]:
+        print(f"❌ {report['failures']} requests failed", file=sys.stderr)
+        failed = True
+    if failed:
+        return 1
+    print("✅ Memory within budget", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
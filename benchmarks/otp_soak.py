@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+OTP store soak benchmark
+Issues millions of OTP requests against InMemoryOTPStore on a simulated clock and reports live entries,
+traced memory and RSS at regular checkpoints. Memory should stay flat once the expiry window fills.
+
+    python benchmarks/otp_soak.py --requests 2000000
+"""
+
+import sys
+import json
+import time
+import random
+import asyncio
+import resource
+import argparse
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from otp_store import InMemoryOTPStore
+
+
+def rss_mb():
+    # ru_maxrss is KB on Linux; peak RSS is enough to catch unbounded growth
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def run_soak(requests: int, students: int, rate_per_second: float, ttl_seconds: float,
+                   verify_ratio: float, checkpoints: int):
+    now = [0.0]
+    store = InMemoryOTPStore(ttl_seconds=ttl_seconds, clock=lambda: now[0])
+    rng = random.Random(42)
+    step = 1.0 / rate_per_second
+    interval = max(1, requests // checkpoints)
+    samples = []
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    for i in range(1, requests + 1):
+        now[0] += step
+        student_id = f"ST{rng.randrange(students):07d}"
+        otp = f"{rng.randint(100000, 999999):06d}"
+        await store.issue(student_id, otp)
+        if rng.random() < verify_ratio:
+            await store.verify(student_id, otp)
+
+        if i % interval == 0:
+            await store.sweep()
+            current, _ = tracemalloc.get_traced_memory()
+            samples.append({
+                "requests": i,
+                "live_otps": len(store),
+                "heap_entries": len(store._expiry_heap),
+                "traced_mb": round(current / 1024 / 1024, 2),
+                "peak_rss_mb": round(rss_mb(), 1),
+            })
+            print(json.dumps(samples[-1]), file=sys.stderr)
+
+    elapsed = time.perf_counter() - start
+    tracemalloc.stop()
+
+    # Compare the second half of the run against its first checkpoint; the first half fills the window
+    steady = samples[len(samples) // 2:]
+    growth_mb = steady[-1]["traced_mb"] - steady[0]["traced_mb"] if len(steady) > 1 else 0.0
+    return {
+        "requests": requests,
+        "elapsed_seconds": round(elapsed, 2),
+        "ops_per_second": round(requests / elapsed),
+        "max_live_otps": round(min(students, rate_per_second * ttl_seconds)),
+        "steady_state_growth_mb": round(growth_mb, 2),
+        "samples": samples,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2_000_000)
+    parser.add_argument("--students", type=int, default=1_000_000, help="distinct student ids requesting OTPs")
+    parser.add_argument("--rate", type=float, default=200.0, help="simulated OTP requests per second")
+    parser.add_argument("--ttl", type=float, default=300.0, help="OTP lifetime in seconds")
+    parser.add_argument("--verify-ratio", type=float, default=0.3, help="share of OTPs that get verified")
+    parser.add_argument("--checkpoints", type=int, default=20)
+    parser.add_argument("--max-growth-mb", type=float, default=1.0,
+                        help="fail if traced memory grows more than this over the second half")
+    args = parser.parse_args()
+
+    report = asyncio.run(run_soak(args.requests, args.students, args.rate, args.ttl, args.verify_ratio,
+                                  args.checkpoints))
+    print(json.dumps({k: v for k, v in report.items() if k != "samples"}, indent=2))
+
+    if report["steady_state_growth_mb"] > args.max_growth_mb:
+        print(f"❌ Memory grew {report['steady_state_growth_mb']}MB in steady state", file=sys.stderr)
+        return 1
+    print("✅ Memory flat in steady state", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
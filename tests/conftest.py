@@ -0,0 +1,260 @@
+# Shared fixtures for the backend test suite
+# By default the app runs in-process over httpx's ASGI transport with an in-memory MongoDB, and LLM
+# calls are answered from a cassette of recorded replies, or by the offline stub for prompts it
+# does not hold, so a full run takes seconds and needs no network. In-process tests assert on the
+# prompt the LLM receives; assertions on reply wording need a real model's reply (a recorded one,
+# --llm-mode=live or record, or --base-url against a deployed backend), and tests skip them with
+# the reason when the stub answered instead.
+
+import os
+import sys
+import time
+import uuid
+from pathlib import Path
+
+import httpx
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+# Set before any test module imports a backend module that reads them
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "rmss_test")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+os.environ["RATE_LIMIT_ENABLED"] = "false"
+
+DEFAULT_CASSETTE = Path(__file__).resolve().parent / "cassettes" / "llm.jsonl"
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("rmss")
+    group.addoption("--base-url", default=os.environ.get("RMSS_BASE_URL"),
+                    help="run against a deployed backend (e.g. https://host) instead of in-process")
+    group.addoption("--llm-mode", default=os.environ.get("RMSS_LLM_MODE", "replay"),
+                    choices=("replay", "record", "live"),
+                    help="replay recorded LLM replies, record new ones, or call the LLM without recording")
+    group.addoption("--cassette", default=os.environ.get("RMSS_LLM_CASSETTE", str(DEFAULT_CASSETTE)),
+                    help="LLM cassette file for replay/record")
+
+
+class LlmRecorder:
+    """Serves LLM calls from a cassette (replay), or through the real LLM (record/live)"""
+
+    def __init__(self, mode: str, cassette: Path):
+        from llm_cassette import LlmCassette
+
+        self.mode = mode
+        # The backend's cassette format, so recordings are shared with LLM_CASSETTE_MODE=replay runs
+        self.cassette = LlmCassette(cassette, mode="record" if mode == "record" else "replay")
+        self.cassette_path = Path(cassette)
+        self.calls = []  # (session_id, system_message, prompt, reply, from_model)
+        self.stub_replies = {}  # LLM session id -> reply to give instead of the stub's generic one
+
+    def chat_class(self):
+        recorder = self
+
+        class RecordingLlmChat:
+            def __init__(self, api_key=None, session_id=None, system_message=None):
+                self.api_key = api_key
+                self.session_id = session_id
+                self.system_message = system_message or ""
+                self.provider, self.model = "openai", "gpt-4o-mini"
+
+            def with_model(self, provider, model):
+                self.provider, self.model = provider, model
+                return self
+
+            async def send_message(self, message):
+                return await recorder.send(self, message.text)
+
+        return RecordingLlmChat
+
+    async def send(self, chat, prompt: str) -> str:
+        from llm_cassette import prompt_key
+
+        key = prompt_key(chat.model, chat.system_message, prompt)
+        from_model = True
+        if self.mode == "replay":
+            entry = self.cassette.lookup(key)
+            if entry is not None:
+                reply = entry["response"]
+            else:
+                # Not recorded: answer offline so the flow continues, but flag it. A test that needs
+                # the reply to steer the conversation (e.g. ask for the location) scripts it.
+                reply = self.stub_replies.pop(chat.session_id, None)
+                if reply is None:
+                    from offline_backends import StubLlmChat, StubUserMessage
+                    stub = StubLlmChat(system_message=chat.system_message)
+                    stub.latency_seconds = 0
+                    reply = await stub.send_message(StubUserMessage(prompt))
+                from_model = False
+        else:
+            from emergentintegrations.llm.chat import LlmChat, UserMessage
+            real = LlmChat(api_key=chat.api_key, session_id=chat.session_id,
+                           system_message=chat.system_message).with_model(chat.provider, chat.model)
+            start = time.perf_counter()
+            reply = await real.send_message(UserMessage(text=prompt))
+            if self.mode == "record":
+                self.cassette.record(key, chat.model, chat.system_message, prompt, reply,
+                                     (time.perf_counter() - start) * 1000)
+
+        self.calls.append((chat.session_id, chat.system_message, prompt, reply, from_model))
+        return reply
+
+    def calls_for(self, session_id: str):
+        return [call for call in self.calls if call[0] == f"{session_id}_context"]
+
+    def save(self):
+        if self.cassette.stats["recorded"]:
+            self.cassette.compact()
+
+
+class Turn:
+    """One chat exchange; `prompt` and `system_message` are what the LLM stage sent, in-process"""
+
+    def __init__(self, status_code: int, body: dict, prompt=None, from_model=None):
+        self.status_code = status_code
+        self.body = body
+        self.reply = body.get("response", "") if isinstance(body, dict) else ""
+        self.prompt = prompt
+        self.system_message = None
+        self.from_model = from_model  # None: deterministic stage, False: stub reply, True: real model
+        self.stub_reason = None
+        self.deployed = False
+
+    @property
+    def used_llm(self) -> bool:
+        return self.from_model is not None
+
+    @property
+    def model_reply(self) -> bool:
+        """Whether the reply wording came from a real model, so it can be asserted on"""
+        return self.from_model is True or self.deployed
+
+    def require_model_reply(self):
+        """Skip the rest of the test (its reply wording checks) unless a real model wrote the reply"""
+        if self.model_reply:
+            return
+        assert self.used_llm, "expected an LLM reply, but a deterministic stage answered"
+        pytest.skip(self.stub_reason)
+
+
+class ChatSession:
+    def __init__(self, client: httpx.AsyncClient, recorder, user_type: str = "parent"):
+        self.client = client
+        self.recorder = recorder
+        self.session_id = str(uuid.uuid4())
+        self.user_type = user_type
+
+    async def send(self, message: str, stub_reply: str = None) -> Turn:
+        """Send one message; `stub_reply` answers in place of the offline stub if no recording matches"""
+        before = len(self.recorder.calls_for(self.session_id)) if self.recorder else 0
+        if self.recorder and stub_reply is not None:
+            self.recorder.stub_replies[f"{self.session_id}_context"] = stub_reply
+        response = await self.client.post("/api/chat", json={
+            "message": message, "session_id": self.session_id, "user_type": self.user_type
+        })
+        turn = Turn(response.status_code, response.json())
+        if self.recorder:
+            self.recorder.stub_replies.pop(f"{self.session_id}_context", None)  # unused if no LLM call
+            calls = self.recorder.calls_for(self.session_id)
+            if len(calls) > before:
+                turn.system_message, turn.prompt, turn.from_model = calls[-1][1], calls[-1][2], calls[-1][4]
+                if turn.from_model is False:
+                    cassette = self.recorder.cassette_path
+                    state = "has no recording of this prompt" if cassette.exists() else "does not exist"
+                    turn.stub_reason = (f"reply wording not checked: the offline stub answered because {cassette} "
+                                        f"{state}; run with --llm-mode=record to record it")
+        else:
+            turn.deployed = True
+        return turn
+
+
+@pytest.fixture(scope="session")
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture(scope="session")
+def base_url(pytestconfig):
+    return pytestconfig.getoption("base_url")
+
+
+@pytest.fixture(scope="session")
+def llm_recorder(pytestconfig, base_url):
+    if base_url:
+        yield None
+        return
+    recorder = LlmRecorder(pytestconfig.getoption("llm_mode"), Path(pytestconfig.getoption("cassette")))
+    yield recorder
+    recorder.save()
+
+
+@pytest.fixture(scope="session")
+def app(base_url, llm_recorder):
+    if base_url:
+        return None
+
+    import server
+    from offline_backends import in_memory_database, StubUserMessage
+
+    server.db = in_memory_database(os.environ["DB_NAME"])
+    server.LlmChat = llm_recorder.chat_class()
+    server.UserMessage = StubUserMessage
+    return server.app
+
+
+@pytest.fixture
+async def client(app, base_url):
+    if base_url:
+        transport, url = None, base_url.rstrip("/")
+    else:
+        transport, url = httpx.ASGITransport(app=app), "http://rmss-test"
+    async with httpx.AsyncClient(transport=transport, base_url=url, timeout=60) as http_client:
+        yield http_client
+
+
+@pytest.fixture
+def admin_headers(monkeypatch, base_url):
+    """Headers for the admin API; in-process runs configure a throwaway token"""
+    if base_url:
+        token = os.environ.get("RMSS_ADMIN_TOKEN")
+        if not token:
+            pytest.skip("set RMSS_ADMIN_TOKEN to call the deployed backend's admin endpoints")
+    else:
+        token = uuid.uuid4().hex
+        monkeypatch.setenv("ADMIN_API_TOKEN", token)
+    return {"X-Admin-Token": token}
+
+
+@pytest.fixture
+async def redis_client():
+    """A Redis client for store tests, skipped when redis-py or a local server is not available"""
+    redis = pytest.importorskip("redis.asyncio")
+    redis_client = redis.from_url(os.environ.get("RMSS_TEST_REDIS_URL", "redis://localhost:6379/15"),
+                                  decode_responses=True)
+    try:
+        await redis_client.ping()
+    except Exception as e:
+        await redis_client.aclose()
+        pytest.skip(f"no Redis server reachable: {e}")
+    yield redis_client
+    await redis_client.aclose()
+
+
+@pytest.fixture
+async def redis_prefix(redis_client):
+    """A key prefix unique to the test; its keys are deleted afterwards"""
+    prefix = f"rmss-test:{uuid.uuid4().hex}:"
+    yield prefix
+    async for key in redis_client.scan_iter(match=prefix + "*"):
+        await redis_client.delete(key)
+
+
+@pytest.fixture
+def new_session(client, llm_recorder):
+    """Factory for independent chat sessions (each with its own session_id)"""
+    def factory(user_type: str = "parent") -> ChatSession:
+        return ChatSession(client, llm_recorder, user_type)
+    return factory
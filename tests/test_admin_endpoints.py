@@ -0,0 +1,31 @@
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def in_process(base_url, monkeypatch):
+    if base_url:
+        pytest.skip("changes the admin configuration in-process")
+    monkeypatch.delenv("ADMIN_API_TOKEN", raising=False)
+    monkeypatch.delenv("ADMIN_API_OPEN", raising=False)
+    return monkeypatch
+
+
+@pytest.mark.parametrize("path", ["/api/admin/traces", "/api/admin/db/pool", "/api/admin/startup"])
+async def test_admin_api_is_closed_without_a_token(client, in_process, path):
+    response = await client.get(path)
+    assert response.status_code == 403
+
+
+async def test_admin_api_can_be_opened_for_local_development(client, in_process):
+    in_process.setenv("ADMIN_API_OPEN", "1")
+    assert (await client.get("/api/admin/db/pool")).status_code == 200
+
+
+async def test_admin_api_requires_the_configured_token(client, in_process):
+    in_process.setenv("ADMIN_API_TOKEN", "s3cret")
+    in_process.setenv("ADMIN_API_OPEN", "1")  # has no effect once a token is configured
+    assert (await client.get("/api/admin/db/pool")).status_code == 403
+    assert (await client.get("/api/admin/db/pool", headers={"X-Admin-Token": "wrong"})).status_code == 403
+    assert (await client.get("/api/admin/db/pool", headers={"X-Admin-Token": "s3cret"})).status_code == 200
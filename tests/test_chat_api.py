@@ -0,0 +1,141 @@
+# Chat API scenarios ported from backend_test.py (RMSSChatbotTester)
+
+import anyio
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+COURSE_PRICES = [
+    ("What is the pricing for S1 Math?", "$370.60"),
+    ("What is P2 Math pricing?", "$261.60"),
+    ("How much is P3 Science?", "$277.95"),
+    ("What about S1 Science pricing?", "$327.00"),
+    ("J1 Chemistry fees?", "$401.12"),
+]
+
+# In-process, the LLM's reply to a bare course name, so the conversation waits on the location
+ASKS_FOR_LOCATION = "Which location would you like for this course? We have centres across Singapore."
+
+
+async def test_api_root(client):
+    response = await client.get("/api/")
+    assert response.status_code == 200
+    assert response.json()["message"]
+
+
+async def test_chat_returns_reply_and_ids(new_session):
+    session = new_session()
+    turn = await session.send("Hello, can you tell me about RMSS?")
+    assert turn.status_code == 200
+    assert set(turn.body) >= {"response", "session_id", "message_id"}
+    assert turn.body["session_id"] == session.session_id
+    assert turn.reply
+
+
+@pytest.mark.parametrize("message", [
+    "Tell me about P3 Math classes",
+    "Tell me about P6 Math at Bishan",
+])
+async def test_reply_has_no_escaped_newlines(new_session, message):
+    turn = await new_session().send(message)
+    assert turn.status_code == 200
+    assert "\\n" not in turn.reply
+    assert "\\r" not in turn.reply
+
+
+@pytest.mark.parametrize("message, price", COURSE_PRICES)
+async def test_course_pricing(new_session, message, price):
+    turn = await new_session().send(message)
+    assert turn.status_code == 200
+    assert price in turn.reply
+
+
+async def test_pricing_follow_up_keeps_course_context(new_session):
+    session = new_session()
+    await session.send("Tell me about P4 Math classes", stub_reply=ASKS_FOR_LOCATION)
+    turn = await session.send("What about the pricing?")
+    assert "$332.45" in turn.reply
+
+
+async def test_concurrent_mixed_flows_get_their_own_answers(new_session, client):
+    """Catalog, LLM and personal-data turns at once: every session gets the answer to its own question"""
+    login = await client.post("/api/demo/login", json={"student_id": "ST001", "password": "demo123"})
+    token = login.json()["session_token"]
+    results = {}
+
+    async def pricing(message, price):
+        results[message] = ((await new_session().send(message)).reply, price)
+
+    async def follow_up():
+        session = new_session()
+        await session.send("Tell me about P4 Math classes", stub_reply=ASKS_FOR_LOCATION)
+        results["follow-up"] = ((await session.send("What about the pricing?")).reply, "$332.45")
+
+    async def my_fees():
+        response = await client.post("/api/chat", json={"message": "What are my fees?", "auth_token": token})
+        results["my fees"] = (response.json()["response"], "$171.44")
+
+    async with anyio.create_task_group() as group:
+        for message, price in COURSE_PRICES:
+            group.start_soon(pricing, message, price)
+        group.start_soon(follow_up)
+        group.start_soon(my_fees)
+
+    assert len(results) == len(COURSE_PRICES) + 2
+    for name, (reply, price) in results.items():
+        assert price in reply, name
+
+
+@pytest.mark.parametrize("message", [
+    "When is the fee settlement week for March?",
+    "What does the holiday program cost?",
+])
+async def test_other_fee_questions_are_not_answered_from_the_remembered_course(new_session, base_url, message):
+    session = new_session()
+    await session.send("P6 math", stub_reply=ASKS_FOR_LOCATION)
+    await session.send("Marine Parade")
+    turn = await session.send(message)
+    assert turn.status_code == 200
+    assert "$357.52" not in turn.reply
+    if not base_url:
+        assert turn.used_llm
+
+
+async def test_course_card_only_names_locations_that_run_the_course(new_session):
+    offered = await new_session().send("How much is P2 Chinese at Bishan?")
+    assert "P2 Chinese at Bishan" in offered.reply and "$261.60" in offered.reply
+
+    not_offered = await new_session().send("How much is P2 Chinese at Marine Parade?")
+    assert not_offered.status_code == 200
+    assert "P2 Chinese at Marine Parade:" not in not_offered.reply
+
+
+async def test_chat_history_is_stored_in_order(new_session, client):
+    session = new_session()
+    await session.send("What is P2 Math pricing?")
+    response = await client.get(f"/api/chat/history/{session.session_id}")
+    assert response.status_code == 200
+    messages = response.json()
+    assert [message["sender"] for message in messages] == ["user", "assistant"]
+    assert messages[0]["message"] == "What is P2 Math pricing?"
+
+
+@pytest.mark.parametrize("message, expected_any", [
+    ("When is Chinese New Year in 2026?", ["february 18", "feb 18", "18 february"]),
+    ("When is Labour Day in 2026?", ["april 27", "apr 27", "27 april"]),
+    ("Who teaches S1 Math at Marine Parade?", ["sean yeo"]),
+    ("What classes are available at Bishan?", ["david lim", "winston loh", "sean yeo", "kai ning"]),
+    ("When are the fee settlement periods?", ["settlement", "january 26", "february 23", "4th week", "collection"]),
+])
+async def test_llm_answers_from_rmss_knowledge(new_session, message, expected_any):
+    turn = await new_session().send(message)
+    assert turn.status_code == 200
+
+    if not turn.deployed:
+        # The question goes to the LLM together with the RMSS facts that answer it
+        assert turn.used_llm
+        assert f"USER'S CURRENT REQUEST: {message}" in turn.prompt
+        assert any(phrase in turn.system_message.lower() for phrase in expected_any)
+    turn.require_model_reply()
+    reply = turn.reply.lower()
+    assert any(phrase in reply for phrase in expected_any), reply[:300]
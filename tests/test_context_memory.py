@@ -0,0 +1,116 @@
+# Multi-turn context memory scenarios ported from context_memory_test.py and backend_test.py
+
+import anyio
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+ASKS_FOR_SUBJECT = ("which subject", "what subject", "which level")
+
+# In-process, the LLM's reply to a bare course name, so the location can be given as a follow-up
+ASKS_FOR_LOCATION = "Which location would you like for this course? We have centres across Singapore."
+
+# (course message, location reply, course name, price)
+COURSE_THEN_LOCATION = [
+    ("J1 math", "Marine Parade", "J1 Math", "$401.12"),
+    ("J2 math?", "Bishan", "J2 Math", "$444.72"),
+    ("P6 math", "Punggol", "P6 Math", "$357.52"),
+    ("P5 math", "Jurong", "P5 Math", "$346.62"),
+    ("S4 EMath", "Kovan", "S4 EMath", "$408.75"),
+]
+
+# (location message, course reply, price, words expected in the reply)
+LOCATION_THEN_COURSE = [
+    ("Classes at Marine Parade", "J1 Math", "$401.12", ("j1 math", "marine parade")),
+    ("What's at Bishan", "P6 Science", "$313.92", ("science",)),
+]
+
+
+async def run_course_then_location(session, course_message, location, course, price):
+    first = await session.send(course_message, stub_reply=ASKS_FOR_LOCATION)
+    assert first.status_code == 200
+    second = await session.send(location)
+    assert second.status_code == 200
+
+    # The assistant asks for the location, and the answer reaches the LLM with the remembered
+    # course and its exact price
+    if first.model_reply:
+        assert "location" in first.reply.lower()
+    if not second.deployed:
+        assert f"{course} costs exactly {price}" in second.prompt
+        assert f"specified {location} location" in second.prompt
+    return first, second
+
+
+@pytest.mark.parametrize("course_message, location, course, price", COURSE_THEN_LOCATION)
+async def test_course_then_location(new_session, course_message, location, course, price):
+    first, second = await run_course_then_location(new_session(), course_message, location, course, price)
+
+    second.require_model_reply()
+    reply = second.reply.lower()
+    assert not any(phrase in reply for phrase in ASKS_FOR_SUBJECT)
+    assert price in second.reply
+    assert course.lower() in reply
+
+
+@pytest.mark.parametrize("location_message, course_message, price, words", LOCATION_THEN_COURSE)
+async def test_location_then_course(new_session, location_message, course_message, price, words):
+    session = new_session()
+    first = await session.send(location_message)
+    second = await session.send(course_message)
+    assert first.status_code == second.status_code == 200
+
+    if not second.deployed:
+        # The location given first is part of the conversation the LLM sees
+        assert f"User: {location_message}" in second.prompt
+        assert f"USER'S CURRENT REQUEST: {course_message}" in second.prompt
+    second.require_model_reply()
+    reply = second.reply.lower()
+    assert "which location" not in reply
+    assert price in second.reply
+    assert all(word in reply for word in words)
+
+
+async def test_ambiguous_secondary_math_offers_emath_or_amath(new_session):
+    session = new_session()
+    await session.send("S3 math", stub_reply=ASKS_FOR_LOCATION)
+    turn = await session.send("Marine Parade")
+
+    if not turn.deployed:
+        # There is no plain "S3 Math" fee to give, so the LLM is not handed a wrong one
+        assert "S3 Math" in turn.prompt
+        assert "$" not in turn.prompt
+    turn.require_model_reply()
+    reply = turn.reply.lower()
+    assert "emath" in reply or "amath" in reply
+    assert "$343.35" in turn.reply or "$397.85" in turn.reply
+
+
+async def test_follow_up_reply_is_formatted(new_session):
+    session = new_session()
+    await session.send("P6 math", stub_reply=ASKS_FOR_LOCATION)
+    turn = await session.send("Marine Parade")
+    assert "\\n" not in turn.reply
+    turn.require_model_reply()
+    assert "\n" in turn.reply
+    assert any(emoji in turn.reply for emoji in ["📊", "💰", "📅", "👨‍🏫", "🎓", "📚"])
+
+
+async def test_concurrent_sessions_keep_their_own_context(new_session):
+    """All course -> location flows at once: no session may see another's course or price"""
+    results = {}
+
+    async def run(flow):
+        course_message, location, course, price = flow
+        results[course] = await run_course_then_location(new_session(), *flow)
+
+    async with anyio.create_task_group() as group:
+        for flow in COURSE_THEN_LOCATION:
+            group.start_soon(run, flow)
+
+    for course_message, location, course, price in COURSE_THEN_LOCATION:
+        first, second = results[course]
+        if not second.deployed:
+            others = [other_price for _, _, other_course, other_price in COURSE_THEN_LOCATION
+                      if other_course != course and other_price != price]
+            assert not any(f"costs exactly {other}" in second.prompt for other in others)
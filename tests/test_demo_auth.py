@@ -0,0 +1,23 @@
+import bcrypt
+import pytest
+
+from demo_auth import DemoAuthService
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_unknown_student_id_costs_the_same_bcrypt_check(monkeypatch):
+    checked = []
+    checkpw = bcrypt.checkpw
+
+    def counting_checkpw(password, hashed):
+        checked.append(hashed)
+        return checkpw(password, hashed)
+
+    monkeypatch.setattr(bcrypt, "checkpw", counting_checkpw)
+    assert await DemoAuthService.verify_student_credentials("ST999", password="wrong-password") is None
+    assert await DemoAuthService.verify_student_credentials("ST001", password="wrong-password") is None
+
+    assert len(checked) == 2
+    # The dummy hash has the configured cost factor, like the stored hashes
+    assert checked[0].split(b"$")[2] == checked[1].split(b"$")[2]
@@ -0,0 +1,115 @@
+import asyncio
+
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def lifecycle(app, base_url):
+    if base_url:
+        pytest.skip("drives worker state in-process")
+    import server
+
+    server.worker_lifecycle.mark_started()
+    server.health_checker._cached = None
+    yield server.worker_lifecycle
+    server.worker_lifecycle.mark_started()
+
+
+@pytest.fixture
+def circuit(app, base_url):
+    if base_url:
+        pytest.skip("drives the circuit breaker in-process")
+    from circuit_breaker import llm_circuit
+
+    llm_circuit.record_success()
+    yield llm_circuit
+    llm_circuit.record_success()
+
+
+async def test_healthz_is_always_live(client):
+    response = await client.get("/healthz")
+    assert response.status_code == 200
+    assert response.json()["status"] == "ok"
+
+
+async def test_readyz_reports_dependency_checks(client, lifecycle):
+    response = await client.get("/readyz")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["status"] == "ready"
+    assert set(body["checks"]) == {"mongo", "llm", "catalog", "queue"}
+    assert body["checks"]["catalog"]["courses"] > 0
+
+
+async def test_readyz_caches_the_dependency_checks(client, lifecycle, monkeypatch):
+    import server
+
+    pings = []
+    original = server.db.command
+
+    async def counting_command(name, *args, **kwargs):
+        pings.append(name)
+        return await original(name, *args, **kwargs)
+
+    monkeypatch.setattr(server.db, "command", counting_command)
+    for _ in range(5):
+        assert (await client.get("/readyz")).status_code == 200
+    assert pings == ["ping"]
+
+
+async def test_draining_worker_is_not_ready(client, lifecycle):
+    assert (await client.get("/readyz")).status_code == 200
+    lifecycle.begin_drain("test")
+
+    response = await client.get("/readyz")
+    assert response.status_code == 503
+    assert response.json()["status"] == "draining"
+    assert (await client.get("/healthz")).status_code == 200
+
+
+async def test_open_llm_circuit_fails_fast(new_session, circuit):
+    for _ in range(circuit.failure_threshold):
+        circuit.record_failure(RuntimeError("provider down"))
+
+    turn = await new_session().send("Tell me about your tutors and teaching approach")
+    assert turn.status_code == 503
+    assert turn.used_llm is False
+
+
+async def test_cancelled_trial_call_frees_the_half_open_circuit(new_session, base_url, monkeypatch):
+    if base_url:
+        pytest.skip("drives the circuit breaker in-process")
+    import server
+    from circuit_breaker import CircuitBreaker, HALF_OPEN
+
+    now = [0.0]
+    breaker = CircuitBreaker("llm-test", failure_threshold=1, reset_seconds=30, clock=lambda: now[0])
+    breaker.record_failure(RuntimeError("provider down"))
+    now[0] += 30
+    monkeypatch.setattr(server, "llm_circuit", breaker)
+
+    entered = asyncio.Event()
+
+    class HangingChat:
+        def __init__(self, **kwargs):
+            pass
+
+        def with_model(self, provider, model):
+            return self
+
+        async def send_message(self, message):
+            entered.set()
+            await asyncio.sleep(3600)
+
+    monkeypatch.setattr(server, "LlmChat", HangingChat)
+    trial = asyncio.create_task(new_session().send("Tell me about your tutors and teaching approach"))
+    await asyncio.wait_for(entered.wait(), timeout=5)
+    trial.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await trial
+
+    # The trial ended without an outcome: the circuit stays half-open and lets the next call try
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow() is True
@@ -0,0 +1,56 @@
+import pytest
+
+from llm_cassette import LlmCassette, CassetteMiss, request_key
+
+pytestmark = pytest.mark.anyio
+
+MODEL = "gpt-4o-mini"
+SYSTEM = "You are an AI assistant for RMSS."
+
+
+def answer(text):
+    async def call():
+        return text
+    return call
+
+
+async def test_record_then_replay_round_trip(tmp_path):
+    path = tmp_path / "llm.jsonl"
+    recorder = LlmCassette(path, mode="record")
+    assert await recorder.complete(answer("J2 Math costs $440."), MODEL, SYSTEM, "How much is J2 math?") \
+        == "J2 Math costs $440."
+    assert recorder.stats["recorded"] == 1
+
+    replayer = LlmCassette(path, mode="replay")
+    entry = next(iter(replayer.entries.values()))
+    assert entry["prompt_tokens"] > 0 and entry["completion_tokens"] > 0 and entry["latency_ms"] >= 0
+
+    async def must_not_call():
+        raise AssertionError("replay called the LLM")
+
+    assert await replayer.complete(must_not_call, MODEL, SYSTEM, "How much is J2 math?") == "J2 Math costs $440."
+    assert replayer.stats["hits"] == 1
+
+
+async def test_replay_miss_raises_unless_live(tmp_path):
+    strict = LlmCassette(tmp_path / "empty.jsonl", mode="replay")
+    with pytest.raises(CassetteMiss):
+        await strict.complete(answer("live"), MODEL, SYSTEM, "Unrecorded prompt")
+
+    fallback = LlmCassette(tmp_path / "empty.jsonl", mode="replay", on_miss="live")
+    assert await fallback.complete(answer("live"), MODEL, SYSTEM, "Unrecorded prompt") == "live"
+
+
+async def test_request_match_replays_changed_prompts_and_compares_tokens(tmp_path):
+    path = tmp_path / "llm.jsonl"
+    turn = request_key(MODEL, "Bishan", 2, {"course": "J2 Math", "location": "Bishan"})
+    await LlmCassette(path, mode="record").complete(
+        answer("J2 Math at Bishan is $440."), MODEL, SYSTEM, "A long original prompt " * 20, turn_key=turn)
+
+    replayer = LlmCassette(path, mode="replay", match="request")
+    response = await replayer.complete(answer("live"), MODEL, SYSTEM, "A shorter prompt", turn_key=turn)
+
+    assert response == "J2 Math at Bishan is $440."
+    summary = replayer.summary()
+    assert summary["request_hits"] == 1
+    assert summary["prompt_token_change"] < 0
@@ -0,0 +1,87 @@
+import anyio
+import pytest
+
+from otp_store import InMemoryOTPStore, RedisOTPStore
+
+pytestmark = pytest.mark.anyio
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture(params=["memory", "redis"])
+def store(request):
+    if request.param == "memory":
+        return InMemoryOTPStore(ttl_seconds=300, max_attempts=3)
+    redis_client = request.getfixturevalue("redis_client")
+    return RedisOTPStore(None, ttl_seconds=300, max_attempts=3, prefix=request.getfixturevalue("redis_prefix"),
+                         client=redis_client)
+
+
+@pytest.fixture
+def otp_store(clock):
+    return InMemoryOTPStore(ttl_seconds=300, max_attempts=3, clock=clock)
+
+
+async def test_otp_is_single_use(store):
+    await store.issue("ST001", "123456")
+    assert await store.verify("ST001", "123456") is True
+    assert await store.verify("ST001", "123456") is False
+
+
+async def test_lockout_after_max_attempts(store):
+    await store.issue("ST001", "123456")
+    for _ in range(3):
+        assert await store.verify("ST001", "000000") is False
+    # The correct OTP no longer works once the attempts are used up
+    assert await store.verify("ST001", "123456") is False
+
+    await store.issue("ST001", "654321")
+    assert await store.verify("ST001", "654321") is True
+
+
+async def test_correct_otp_on_last_attempt_is_accepted(store):
+    await store.issue("ST001", "123456")
+    await store.verify("ST001", "000000")
+    await store.verify("ST001", "111111")
+    assert await store.verify("ST001", "123456") is True
+
+
+async def test_expired_otp_is_rejected(otp_store, clock):
+    await otp_store.issue("ST001", "123456")
+    clock.now += 300
+    assert await otp_store.verify("ST001", "123456") is False
+    assert otp_store.live_count() == 0
+
+
+async def test_redis_otp_expires(redis_client, redis_prefix):
+    store = RedisOTPStore(None, ttl_seconds=0.5, max_attempts=3, prefix=redis_prefix, client=redis_client)
+    await store.issue("ST001", "123456")
+    await anyio.sleep(0.6)
+    assert await store.verify("ST001", "123456") is False
+    # Nothing is held in this worker, so there is no local count to report
+    assert store.live_count() is None
+
+
+async def test_sweep_removes_only_expired_otps(otp_store, clock):
+    await otp_store.issue("ST001", "111111")
+    clock.now += 200
+    await otp_store.issue("ST002", "222222")
+    await otp_store.issue("ST001", "333333")  # re-issued: the first expiry is stale
+    clock.now += 150
+
+    assert await otp_store.sweep() == 0
+    assert otp_store.live_count() == 2
+    clock.now += 200
+    assert await otp_store.sweep() == 2
+    assert otp_store.live_count() == 0
@@ -0,0 +1,96 @@
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+import rate_limit
+from rate_limit import InMemoryRateLimiter, admit, client_ip
+
+pytestmark = pytest.mark.anyio
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def limiter(monkeypatch, clock):
+    """Rate limiting switched on, with fresh in-memory buckets"""
+    limiter = InMemoryRateLimiter(clock=clock)
+    monkeypatch.setattr(rate_limit, "RATE_LIMIT_ENABLED", True)
+    monkeypatch.setattr(rate_limit, "rate_limiter", limiter)
+    return limiter
+
+
+def make_request(peer="10.0.0.9", forwarded=None):
+    headers = [(b"x-forwarded-for", forwarded.encode())] if forwarded else []
+    return Request({"type": "http", "headers": headers, "client": (peer, 40000)})
+
+
+async def test_bucket_refills_at_its_rate(limiter, clock):
+    bucket = [("chat:session:s1", 2, 0.5)]
+    assert await limiter.acquire(bucket, 1) == (True, 0.0)
+    assert await limiter.acquire(bucket, 1) == (True, 0.0)
+    allowed, retry_after = await limiter.acquire(bucket, 1)
+    assert not allowed and retry_after == pytest.approx(2.0)
+
+    clock.now += 2
+    assert (await limiter.acquire(bucket, 1))[0]
+
+
+async def test_rejection_charges_no_bucket(limiter):
+    full, empty = ("a", 10, 1.0), ("b", 1, 1.0)
+    await limiter.acquire([empty], 1)
+    assert not (await limiter.acquire([full, empty], 1))[0]
+    assert await limiter.acquire([("a", 10, 1.0)], 10) == (True, 0.0)
+
+
+async def test_over_limit_raises_429_with_retry_after(limiter):
+    identities = {"student": "ST001", "ip": "10.0.0.9"}
+    for _ in range(3):
+        await admit("otp", identities)
+    with pytest.raises(HTTPException) as rejected:
+        await admit("otp", identities)
+    assert rejected.value.status_code == 429
+    # The student bucket refills one OTP every 200 seconds
+    assert rejected.value.headers["Retry-After"] == "200"
+
+
+def test_forwarded_for_is_ignored_without_trusted_proxies():
+    assert client_ip(make_request(forwarded="203.0.113.7")) == "10.0.0.9"
+
+
+@pytest.mark.parametrize("forwarded, hops, expected", [
+    ("198.51.100.4", 1, "198.51.100.4"),
+    ("1.2.3.4, 198.51.100.4", 1, "198.51.100.4"),  # client-supplied entry before the proxy's
+    ("1.2.3.4, 198.51.100.4, 10.0.0.2", 2, "198.51.100.4"),
+    ("198.51.100.4", 2, "198.51.100.4"),
+])
+def test_forwarded_for_hop_is_counted_from_the_right(monkeypatch, forwarded, hops, expected):
+    monkeypatch.setattr(rate_limit, "TRUSTED_PROXY_HOPS", hops)
+    assert client_ip(make_request(forwarded=forwarded)) == expected
+
+
+async def test_rotating_forwarded_for_does_not_escape_the_ip_limit(client, base_url, limiter):
+    if base_url:
+        pytest.skip("switches rate limiting on in-process")
+    statuses = []
+    for i in range(12):
+        response = await client.post(
+            "/api/demo/whatsapp/request-otp",
+            json={"student_id": f"ST9{i:02d}", "phone": "+6500000000"},
+            headers={"X-Forwarded-For": f"203.0.113.{i}"},
+        )
+        statuses.append(response.status_code)
+    # 10 OTP requests per client address, however many addresses the client claims to have
+    assert statuses[:10] == [200] * 10
+    assert statuses[10:] == [429, 429]
+    assert response.headers["Retry-After"]
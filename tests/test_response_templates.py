@@ -0,0 +1,28 @@
+import copy
+
+import response_templates
+from demo_auth import DEMO_STUDENTS
+
+
+def test_changed_fees_render_afresh():
+    student = copy.deepcopy(DEMO_STUDENTS["ST001"])
+    assert "Outstanding Balance: $171.44" in response_templates.render_fees(student)
+
+    # A payment recorded in the student database, with no version field or invalidation call
+    student["fees"].update(paid_amount=671.44, outstanding=0.0, last_payment="2026-01-10")
+    rendered = response_templates.render_fees(student)
+    assert "PAID IN FULL" in rendered and "2026-01-10" in rendered
+    assert "Outstanding Fees:** $0.00" in response_templates.render_profile(student)
+
+
+def test_changed_enrolments_render_afresh():
+    student = copy.deepcopy(DEMO_STUDENTS["ST003"])
+    assert "J2 Chemistry" not in response_templates.render_schedule(student)
+
+    student["enrollments"].append({
+        "course": "J2 Chemistry", "location": "Bishan", "tutor": "Mr Leonard Teo",
+        "schedule": "Thu 7:30-9:30pm", "start_date": "2026-02-05",
+    })
+    assert "J2 Chemistry" in response_templates.render_schedule(student)
+    assert "Current Enrollments:** 2 subjects" in response_templates.render_profile(student)
+
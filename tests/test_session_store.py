@@ -0,0 +1,73 @@
+import pytest
+
+from session_store import InMemorySessionStore, RedisSessionStore
+
+pytestmark = pytest.mark.anyio
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture(params=["memory", "redis"])
+def store(request):
+    if request.param == "memory":
+        return InMemorySessionStore()
+    redis_client = request.getfixturevalue("redis_client")
+    return RedisSessionStore(None, prefix=request.getfixturevalue("redis_prefix"), client=redis_client)
+
+
+async def test_round_trip_and_delete(store):
+    session = {"student_id": "ST001", "scopes": ["student"]}
+    await store.set("token-1", session, ttl_seconds=60)
+    assert await store.get("token-1") == session
+    assert await store.get("token-2") is None
+
+    await store.delete("token-1")
+    assert await store.get("token-1") is None
+
+
+async def test_redis_entries_expire_server_side(redis_client, redis_prefix):
+    store = RedisSessionStore(None, prefix=redis_prefix, client=redis_client)
+    await store.set("token-1", {"student_id": "ST001"}, ttl_seconds=30)
+    assert 0 < await redis_client.ttl(redis_prefix + "token-1") <= 30
+
+
+async def test_expired_entries_are_evicted():
+    clock = FakeClock()
+    store = InMemorySessionStore(clock=clock)
+    await store.set("short", {"n": 1}, ttl_seconds=10)
+    await store.set("long", {"n": 2}, ttl_seconds=100)
+
+    clock.now += 10
+    assert await store.get("short") is None
+    assert len(store) == 1
+    assert await store.get("long") == {"n": 2}
+
+
+async def test_reset_entry_keeps_its_later_expiry():
+    clock = FakeClock()
+    store = InMemorySessionStore(clock=clock)
+    await store.set("token", {"n": 1}, ttl_seconds=10)
+    await store.set("token", {"n": 2}, ttl_seconds=100)
+
+    clock.now += 50
+    assert await store.get("token") == {"n": 2}
+
+
+async def test_full_store_evicts_the_entry_closest_to_expiry():
+    store = InMemorySessionStore(max_entries=2, clock=FakeClock())
+    await store.set("a", {"n": 1}, ttl_seconds=100)
+    await store.set("b", {"n": 2}, ttl_seconds=10)
+    await store.set("a", {"n": 3}, ttl_seconds=200)  # overwriting does not evict
+    assert len(store) == 2
+
+    await store.set("c", {"n": 4}, ttl_seconds=50)
+    assert len(store) == 2
+    assert await store.get("b") is None
+    assert await store.get("a") == {"n": 3}
+    assert await store.get("c") == {"n": 4}
@@ -0,0 +1,74 @@
+import json
+
+import pytest
+
+import session_tokens
+from session_tokens import issue_token, verify_token, authenticate, revoke_token, _b64decode, _b64encode
+
+
+def test_issued_token_verifies():
+    token, claims = issue_token("ST001")
+    verified = verify_token(token)
+    assert verified == claims
+    assert verified["sid"] == "ST001" and verified["scope"] == "student"
+
+
+def test_tampered_signature_is_rejected():
+    token, _ = issue_token("ST001")
+    version, payload, signature = token.split(".")
+    flipped = ("A" if signature[0] != "A" else "B") + signature[1:]
+    assert verify_token(f"{version}.{payload}.{flipped}") is None
+
+
+def test_tampered_claims_are_rejected():
+    token, _ = issue_token("ST001")
+    version, payload, signature = token.split(".")
+    claims = json.loads(_b64decode(payload))
+    claims["sid"] = "ST002"
+    forged = _b64encode(json.dumps(claims, separators=(",", ":")).encode())
+    assert verify_token(f"{version}.{forged}.{signature}") is None
+
+
+@pytest.mark.parametrize("token", [None, "", "not-a-token", "rmss1.only-two", "rmss0.e30.c2ln"])
+def test_malformed_tokens_are_rejected(token):
+    assert verify_token(token) is None
+
+
+def test_expired_token_is_rejected():
+    token, _ = issue_token("ST001", ttl_seconds=-1)
+    assert verify_token(token) is None
+
+
+def test_wrong_scope_is_rejected():
+    token, _ = issue_token("ST001", scope="otp")
+    assert verify_token(token) is None
+    assert verify_token(token, scope="otp")["sid"] == "ST001"
+
+
+@pytest.mark.anyio
+async def test_revoked_token_is_rejected_when_revocation_is_enabled(monkeypatch):
+    monkeypatch.setattr(session_tokens, "REVOCATION_ENABLED", True)
+    token, claims = issue_token("ST001")
+    other, _ = issue_token("ST001")
+    assert (await authenticate(token))["jti"] == claims["jti"]
+
+    await revoke_token(claims)
+    assert await authenticate(token) is None
+    # Other sessions of the same student stay valid
+    assert await authenticate(other) is not None
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("enabled", [True, False])
+async def test_logout_only_reports_success_when_the_token_is_revoked(client, base_url, monkeypatch, enabled):
+    if base_url:
+        pytest.skip("toggles revocation in-process")
+    monkeypatch.setattr(session_tokens, "REVOCATION_ENABLED", enabled)
+    token, claims = issue_token("ST001")
+
+    response = await client.post("/api/demo/logout", json={"session_token": token})
+    assert response.status_code == 200
+    assert response.json()["success"] is enabled
+    assert (await authenticate(token) is None) is enabled
+    if not enabled:
+        assert "valid until it expires" in response.json()["message"]
@@ -0,0 +1,25 @@
+import logging
+
+from structured_logging import RequestQueueHandler, configure_logging, stop_logging
+
+
+def test_stop_logging_restores_the_root_handlers():
+    stop_logging()  # the app configures logging at import
+    root = logging.getLogger()
+    records = []
+    sentinel = logging.Handler()
+    sentinel.emit = records.append
+    root.addHandler(sentinel)
+    try:
+        configure_logging()
+        assert sentinel not in root.handlers
+        assert any(isinstance(handler, RequestQueueHandler) for handler in root.handlers)
+
+        stop_logging()
+        assert not any(isinstance(handler, RequestQueueHandler) for handler in root.handlers)
+        assert sentinel in root.handlers
+        logging.getLogger("rmss.test").warning("after shutdown")
+        assert [record.getMessage() for record in records] == ["after shutdown"]
+    finally:
+        root.removeHandler(sentinel)
+        configure_logging()
@@ -0,0 +1,97 @@
+import copy
+
+import pytest
+
+from demo_auth import DEMO_STUDENTS, DemoAuthService
+from offline_backends import in_memory_database
+from student_repository import CachedStudentRepository, FixtureStudentRepository, MongoStudentRepository
+
+pytestmark = pytest.mark.anyio
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class CountingRepository(FixtureStudentRepository):
+    """Returns copies, like a database would, and counts the lookups that reach it"""
+
+    def __init__(self, students: dict):
+        super().__init__(students)
+        self.lookups = 0
+
+    async def get_by_id(self, student_id: str):
+        self.lookups += 1
+        return copy.deepcopy(await super().get_by_id(student_id))
+
+
+@pytest.fixture
+def students():
+    students = copy.deepcopy(DEMO_STUDENTS)
+    # A sibling registered with the same parent's phone number as ST001
+    students["ST004"] = dict(copy.deepcopy(students["ST001"]), student_id="ST004", full_name="Ethan Tan")
+    return students
+
+
+@pytest.fixture
+def backend(students):
+    return CountingRepository(students)
+
+
+async def test_cache_serves_repeat_lookups_until_the_ttl(backend):
+    clock = FakeClock()
+    repository = CachedStudentRepository(backend, ttl_seconds=60, clock=clock)
+
+    assert (await repository.get_by_id("st001"))["student_id"] == "ST001"
+    assert (await repository.get_by_id("ST001"))["student_id"] == "ST001"
+    assert backend.lookups == 1
+    assert (repository.hits, repository.misses) == (1, 1)
+
+    clock.now += 60
+    await repository.get_by_id("ST001")
+    assert backend.lookups == 2
+
+
+async def test_invalidate_drops_the_cached_record(backend, students):
+    repository = CachedStudentRepository(backend, ttl_seconds=60, clock=FakeClock())
+    assert (await repository.get_by_id("ST001"))["fees"]["outstanding"] == 171.44
+
+    students["ST001"]["fees"]["outstanding"] = 0.0
+    assert (await repository.get_by_id("ST001"))["fees"]["outstanding"] == 171.44
+    await repository.invalidate("st001")
+    assert (await repository.get_by_id("ST001"))["fees"]["outstanding"] == 0.0
+
+
+async def test_unknown_student_is_not_cached(backend):
+    repository = CachedStudentRepository(backend, ttl_seconds=60, clock=FakeClock())
+    assert await repository.get_by_id("ST999") is None
+    assert await repository.get_by_id("ST999") is None
+    assert backend.lookups == 2
+
+
+async def test_mongo_repository_looks_students_up_by_id(students):
+    collection = in_memory_database("rmss_repository_test").students
+    repository = MongoStudentRepository(collection)
+    await repository.ensure_indexes()
+    await collection.insert_many([copy.deepcopy(student) for student in students.values()])
+
+    student = await repository.get_by_id("st004")
+    assert student["full_name"] == "Ethan Tan"
+    assert "_id" not in student
+    assert await repository.get_by_id("ST999") is None
+
+
+async def test_siblings_sharing_a_phone_can_each_verify(students, monkeypatch):
+    import demo_auth
+
+    monkeypatch.setattr(demo_auth, "student_repository",
+                        CachedStudentRepository(FixtureStudentRepository(students), clock=FakeClock()))
+    phone = students["ST001"]["phone"]
+    for student_id in ("ST001", "ST004"):
+        student = await DemoAuthService.verify_student_credentials(student_id, phone=phone)
+        assert student["student_id"] == student_id
+    assert await DemoAuthService.verify_student_credentials("ST002", phone=phone) is None
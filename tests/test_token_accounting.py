@@ -0,0 +1,42 @@
+import pytest
+
+import token_accounting
+from token_accounting import TokenLedger
+
+pytestmark = pytest.mark.anyio
+
+SYSTEM_PROMPT = "You are an AI assistant for RMSS. " * 50
+
+
+async def test_system_prompt_is_tokenized_once(monkeypatch):
+    counted = []
+    count_tokens = token_accounting.count_tokens
+
+    def counting(text, model="gpt-4o-mini"):
+        counted.append(text)
+        return count_tokens(text, model)
+
+    monkeypatch.setattr(token_accounting, "count_tokens", counting)
+    token_accounting.count_static_tokens.cache_clear()
+    await token_accounting.warm_up_tokenizer([SYSTEM_PROMPT])
+
+    ledger = TokenLedger()
+    for message in ("How much is J2 math?", "Bishan"):
+        counters = ledger.record("s1", {"system": SYSTEM_PROMPT, "request": message}, "Reply")
+        assert counters["sections"]["system"] > 0
+
+    assert counted.count(SYSTEM_PROMPT) == 1
+
+
+async def test_usage_reads_are_admin_routes_without_a_flush(client, base_url, admin_headers, monkeypatch):
+    if base_url:
+        pytest.skip("inspects the in-process ledger")
+
+    async def no_flush(db):
+        raise AssertionError("usage reads must not flush the ledger")
+
+    monkeypatch.setattr(token_accounting.token_ledger, "flush", no_flush)
+    assert (await client.get("/api/usage/rollups")).status_code == 404
+    assert (await client.get("/api/admin/usage/rollups")).status_code == 403
+    assert (await client.get("/api/admin/usage/rollups", headers=admin_headers)).status_code == 200
+    assert (await client.get("/api/admin/usage/sessions/unknown", headers=admin_headers)).status_code == 404